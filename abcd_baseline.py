@@ -5,7 +5,8 @@ Human baseline evaluation using the ABCD dataset
 (Action-Based Conversations Dataset, ASAPP Research, NAACL 2021).
 
 Pipeline:
-  1. Load ABCD conversations (cached locally after first download).
+  1. Load ABCD conversations (downloaded once and converted into a compact,
+     indexed per-split store — see abcd_store.py).
   2. Walk each conversation sequentially, merging consecutive agent turns
      until the combined text reaches a minimum word threshold (default: 15).
      Chunks below threshold are skipped as non-substantive filler.
@@ -15,23 +16,35 @@ Pipeline:
      in independent mode — 4 sub-evals per jury model (human/bot score, role
      identity, knowledge, rejection).
   5. Parse the raw independent-mode strings into structured scores.
-  6. Write results incrementally after each conversation — fully resumable
-     if interrupted.
+  6. Append each finished conversation to a JSONL log (fsync'd, fully
+     resumable if interrupted) and rewrite the aggregate JSON and analytics
+     files periodically and at the end.
 
 This provides a human baseline: real human agent responses scored by the same
 jury used to evaluate LLM personas, enabling direct comparison.
 """
 
-import os, json, gzip, random, argparse, statistics, urllib.request, re
+import os, json, gzip, random, argparse, statistics, urllib.request, re, math, heapq, bisect
+from fractions import Fraction
+from functools import partial, lru_cache
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from role_play_framework import judge_response, log
+import abcd_store
+import jury_engine
+import llm_cache
+import llm_usage
+import rate_limit
+import resilience
+import rolling_context
+import tracing
+from role_play_framework import judge_response, set_base_url, log, summarize_exchanges, AUDIT_MODES
 
 ABCD_URL = "https://github.com/asappresearch/abcd/raw/master/data/abcd_v1.1.json.gz"
 ABCD_CACHE = os.path.expanduser("~/.cache/abcd_v1.1.json.gz")
+ABCD_STORE_DIR = os.path.expanduser("~/.cache/abcd_v1.1_store")
 
 # -----------------------------------------------------------------------
 # E-commerce prompt overrides (override tech-support framing from role_play_framework)
@@ -85,15 +98,31 @@ def fetch_abcd():
         return json.load(f)
 
 
+@lru_cache(maxsize=None)
+def open_store(split):
+    """Open the compact store for a split, converting the raw dataset on first use."""
+    if not abcd_store.store_exists(ABCD_STORE_DIR, split):
+        log.info(f"Building compact ABCD store in {ABCD_STORE_DIR} (one-time)...")
+        abcd_store.build_store(fetch_abcd(), ABCD_STORE_DIR)
+    return abcd_store.AbcdStore(ABCD_STORE_DIR, split)
+
+
+@lru_cache(maxsize=None)
+def open_chunk_index(split, min_words):
+    """Substantive chunks of a split for min_words, computed once and persisted next to the store."""
+    if not abcd_store.chunk_index_exists(ABCD_STORE_DIR, split, min_words):
+        log.info(f"Building chunk index for split={split}, min_words={min_words} (one-time)...")
+        abcd_store.build_chunk_index(open_store(split), ABCD_STORE_DIR, min_words, extract_substantive_chunks)
+    return abcd_store.ChunkIndex(ABCD_STORE_DIR, split, min_words)
+
+
 def load_sample(n=500, seed=42, split="train", flows=None, min_words=15):
-    data = fetch_abcd()
-    convs = data[split]
-    if flows:
-        convs = [c for c in convs if c["scenario"]["flow"] in flows]
-    # Only keep conversations that yield at least one evaluable chunk
-    convs = [c for c in convs if extract_substantive_chunks(c, min_words=min_words)]
+    store = open_store(split)
+    # Only conversations that yield at least one evaluable chunk are in the chunk index
+    ids = open_chunk_index(split, min_words).ids_for_flows(flows)
     random.seed(seed)
-    return random.sample(convs, min(n, len(convs)))
+    # Sampling ids in dataset order picks the same conversations as sampling the full records did
+    return [store.get(convo_id) for convo_id in random.sample(ids, min(n, len(ids)))]
 
 
 # -----------------------------------------------------------------------
@@ -150,20 +179,25 @@ def extract_substantive_chunks(conversation, min_words=15):
 # Score parsing (independent mode returns raw strings)
 # -----------------------------------------------------------------------
 
-def parse_independent_scores(raw_reports):
+def parse_independent_scores(raw_reports, jury_models):
     """
     Convert raw independent-mode report strings into structured score dicts
-    matching the format expected by summarise().
+    matching the format AnalyticsState reads.
+
+    judge_response returns one report per juror (in jury order); the baseline
+    scores each chunk from its rolling-context evaluation.
     """
     parsed = []
-    for report in raw_reports:
+    for judge_model, juror_report in zip(jury_models, raw_reports):
+        report = juror_report.get("rolling_evaluation", juror_report)
         result = {
-            "judge_model": report.get("judge_model"),
+            "judge_model": judge_model,
             "global_human_score": None,
             "bot_sure": None,
             "role_identity": report.get("identity", "").strip(),
             "knowledge_score": report.get("knowledge", "").strip(),
             "rejection_status": report.get("rejection", "").strip(),
+            "call_meta": juror_report.get("call_meta", {}).get("rolling_evaluation"),
         }
         raw_global = report.get("global", "")
         m_human = re.search(r'HUMAN_SCORE\s*=\s*([\d.]+)', raw_global)
@@ -180,71 +214,62 @@ def parse_independent_scores(raw_reports):
 # Jury evaluation with e-commerce prompts
 # -----------------------------------------------------------------------
 
-import role_play_framework as rpf
+ECOMM_PROMPTS = {
+    "global":    ECOMM_JURY_SYSTEM_PROMPT,
+    "identity":  ECOMM_ROLE_IDENTITY_PROMPT,
+    "knowledge": ECOMM_KNOWLEDGE_EVAL_PROMPT,
+    "rejection": ECOMM_REJECTION_EVAL_PROMPT,
+}
 
-def evaluate_chunk(jury_models, interaction, jury_mode="independent"):
+def evaluate_chunk(jury_models, interaction, conversation_history="", jury_mode="independent", jury_options=None):
     """
-    Run jury evaluation with e-commerce prompt overrides injected.
-    Temporarily patches the module-level prompts, then restores them.
+    Run jury evaluation with the e-commerce prompt overrides.
+    The overrides are passed per call (no module state is patched), so chunks
+    from different conversations can be evaluated concurrently.
+    Only the rolling (full-context) audits are run.
     """
-    # Patch prompts
-    orig_jury    = rpf.JURY_SYSTEM_PROMPT
-    orig_role    = rpf.ROLE_IDENTITY_PROMPT
-    orig_know    = rpf.KNOWLEDGE_EVAL_PROMPT
-    orig_reject  = rpf.REJECTION_EVAL_PROMPT
-
-    rpf.JURY_SYSTEM_PROMPT   = ECOMM_JURY_SYSTEM_PROMPT
-    rpf.ROLE_IDENTITY_PROMPT = ECOMM_ROLE_IDENTITY_PROMPT
-    rpf.KNOWLEDGE_EVAL_PROMPT = ECOMM_KNOWLEDGE_EVAL_PROMPT
-    rpf.REJECTION_EVAL_PROMPT = ECOMM_REJECTION_EVAL_PROMPT
-
-    try:
-        raw = judge_response(
-            jury_models=jury_models,
-            interaction=interaction,
-            jury_mode=jury_mode,
-            num_rounds=0,
-        )
-    finally:
-        rpf.JURY_SYSTEM_PROMPT   = orig_jury
-        rpf.ROLE_IDENTITY_PROMPT = orig_role
-        rpf.KNOWLEDGE_EVAL_PROMPT = orig_know
-        rpf.REJECTION_EVAL_PROMPT = orig_reject
-
-    return parse_independent_scores(raw)
+    raw = judge_response(
+        jury_models=jury_models,
+        interaction=interaction,
+        jury_mode=jury_mode,
+        conversation_history=conversation_history,
+        num_rounds=0,
+        include_isolated=False,
+        prompts=ECOMM_PROMPTS,
+        **(jury_options or {})
+    )
+    with tracing.span("parse_scores"):
+        return parse_independent_scores(raw, jury_models)
 
 
 # -----------------------------------------------------------------------
 # Full sequential replay evaluation
 # -----------------------------------------------------------------------
 
-def full_replay_evaluate_conversation(conv, jury_models, min_words):
-    chunks = extract_substantive_chunks(conv, min_words=min_words)
+def full_replay_evaluate_conversation(conv, jury_models, min_words, jury_options=None, chunks=None,
+                                      new_context=rolling_context.RollingContext):
+    if chunks is None:
+        chunks = extract_substantive_chunks(conv, min_words=min_words)
     if not chunks:
         return []
 
     turn_results = []
-    history = []  # list of (customer, merged_agent) already evaluated
+    # Chunks already evaluated (token-budgeted when new_context is configured to be)
+    history = new_context(separator="\n")
 
     FILLER_WEIGHT = 0.5  # filler chunks count half as much in weighted averages
 
     for idx, (customer, agent_merged, n_raw_turns, is_filler) in enumerate(chunks):
-        if history:
-            context_lines = ["Conversation so far:"]
-            for prev_c, prev_a in history:
-                context_lines.append(f"  Customer: {prev_c}")
-                context_lines.append(f"  Agent: {prev_a}")
-            context_lines.append("")
-            context_lines.append("Current exchange:")
-            context = "\n".join(context_lines) + "\n"
-        else:
-            context = ""
-
-        interaction = f"{context}Customer: {customer}\nAgent: {agent_merged}"
+        context = history.render()
+        interaction = f"Customer: {customer}\nAgent: {agent_merged}"
         weight = FILLER_WEIGHT if is_filler else 1.0
         log.info(f"  Chunk {idx + 1}/{len(chunks)} ({n_raw_turns} raw turn(s), {len(agent_merged.split())} words, {'filler' if is_filler else 'substantive'})")
 
-        scores = evaluate_chunk(jury_models=jury_models, interaction=interaction)
+        with llm_usage.collect() as chunk_calls, tracing.span("chunk", chunk=idx + 1, filler=is_filler):
+            scores = evaluate_chunk(jury_models=jury_models, interaction=interaction,
+                                    conversation_history=context, jury_options=jury_options)
+            # Folding this chunk into the history may summarize older ones
+            history.add(interaction)
 
         human_scores = [
             s.get("global_human_score")
@@ -262,41 +287,46 @@ def full_replay_evaluate_conversation(conv, jury_models, min_words):
             "jury_scores": scores,
             "human_scores": human_scores,
             "avg_human_score": round(statistics.mean(human_scores), 4) if human_scores else None,
+            "usage": llm_usage.totals(chunk_calls),
+            "llm_calls": chunk_calls,
         })
-        history.append((customer, agent_merged))
 
     return turn_results
 
 
-# -----------------------------------------------------------------------
-# Summary stats
-# -----------------------------------------------------------------------
+def evaluate_conversation(conv, jury_models, min_words, jury_options=None, position="", chunks=None,
+                          new_context=rolling_context.RollingContext):
+    """Replay-evaluate one conversation and return its output record."""
+    conv_id = conv["convo_id"]
+    flow = conv["scenario"]["flow"]
+    subflow = conv["scenario"]["subflow"]
+    log.info(f"{position} convo_id={conv_id} | {flow}/{subflow}")
+
+    with tracing.span("conversation", convo_id=conv_id):
+        chunk_scores = full_replay_evaluate_conversation(
+            conv=conv,
+            jury_models=jury_models,
+            min_words=min_words,
+            jury_options=jury_options,
+            chunks=chunks,
+            new_context=new_context,
+        )
+
+    weighted_human = [(s, c.get("weight", 1.0)) for c in chunk_scores for s in c.get("human_scores", []) if s is not None]
+    if weighted_human:
+        total_w = sum(w for _, w in weighted_human)
+        conv_avg = round(sum(s * w for s, w in weighted_human) / total_w, 4)
+    else:
+        conv_avg = None
 
-def summarise(conversations):
-    # Collect (score, weight) pairs — filler chunks count half as much
-    weighted = [
-        (s, chunk.get("weight", 1.0))
-        for conv in conversations
-        for chunk in conv.get("chunk_scores", [])
-        for s in chunk.get("human_scores", [])
-        if s is not None
-    ]
-    if not weighted:
-        return {}
-
-    scores, weights = zip(*weighted)
-    total_weight = sum(weights)
-    weighted_mean = sum(s * w for s, w in weighted) / total_weight
-    # For unweighted stats (median, stdev, min, max) use raw scores
-    all_scores = list(scores)
     return {
-        "n_scores": len(all_scores),
-        "weighted_mean_global_human_score": round(weighted_mean, 4),
-        "median_global_human_score":        round(statistics.median(all_scores), 4),
-        "stdev_global_human_score":         round(statistics.stdev(all_scores), 4) if len(all_scores) > 1 else 0.0,
-        "min": round(min(all_scores), 4),
-        "max": round(max(all_scores), 4),
-        "pct_above_0_7": round(sum(w for s, w in weighted if s >= 0.7) / total_weight, 4),
+        "conversation_id": conv_id,
+        "flow": flow,
+        "subflow": subflow,
+        "chunks_evaluated": len(chunk_scores),
+        "chunk_scores": chunk_scores,
+        "weighted_avg_global_human_score": conv_avg,
+        "usage": llm_usage.Rollup().add_calls(call for c in chunk_scores for call in c["llm_calls"]).to_dict(),
     }
 
 
@@ -304,194 +334,358 @@ def summarise(conversations):
 # Incremental output helpers
 # -----------------------------------------------------------------------
 
+def conversation_log_path(output_path):
+    base, _ = os.path.splitext(output_path)
+    return f"{base}_conversations.jsonl"
+
+
+def read_conversation_log(path):
+    """
+    Read the per-conversation JSONL log, one record per line.
+
+    Every record is written together with its newline, so a last line without
+    one is what a process killed mid-append leaves behind: it is dropped and cut
+    from the file, so later appends start on a clean line. Damage anywhere
+    else is an error.
+    """
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    if lines and not lines[-1].endswith(b"\n"):
+        log.warning(f"Ignoring truncated last record in {path}")
+        lines.pop()
+        with open(path, "r+b") as f:
+            f.truncate(sum(len(line) for line in lines))
+
+    conversations = {}
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"{path}: corrupt record on line {n}")
+        conversations[record["conversation_id"]] = record
+    return list(conversations.values())
+
+
+class ConversationLog:
+    """Append-only, fsync'd JSONL log of finished conversations (the resume source of truth)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def append(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
 def load_existing_output(path):
-    """Load existing output file and return (output_dict, set_of_completed_conv_ids)."""
-    if not os.path.exists(path):
+    """
+    Load a previous run and return (output_dict, set_of_completed_conv_ids).
+
+    Conversations come from the JSONL log when there is one; the aggregate
+    JSON (written only at checkpoints) then just supplies the metadata. Runs
+    from before the log existed resume from the aggregate file alone.
+    """
+    existing = None
+    if os.path.exists(path):
+        with open(path) as f:
+            existing = json.load(f)
+    log_path = conversation_log_path(path)
+    if os.path.exists(log_path):
+        existing = existing or {"metadata": {}, "summary": {}}
+        existing["conversations"] = read_conversation_log(log_path)
+    if existing is None:
         return None, set()
-    with open(path) as f:
-        existing = json.load(f)
     completed = {c["conversation_id"] for c in existing.get("conversations", [])}
     log.info(f"Resuming: found {len(completed)} already-completed conversations in {path}")
     return existing, completed
 
 
 def write_output(path, output):
-    """Write full output dict to file (called after every conversation)."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
+    """Write full output dict to file atomically (called at checkpoints)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
         json.dump(output, f, indent=4)
+    os.replace(tmp_path, path)
 
 
 # -----------------------------------------------------------------------
-# Analytics
+# Incremental analytics
 # -----------------------------------------------------------------------
 
-def build_analytics(output):
-    conversations = output.get("conversations", [])
-    if not conversations:
-        return {}
-
-    # --- Per-chunk score/weight pairs across everything ---
-    all_weighted = [
-        (s, chunk["weight"], chunk["is_filler"], chunk.get("jury_scores", []))
-        for conv in conversations
-        for chunk in conv.get("chunk_scores", [])
-        for s in chunk.get("human_scores", [])
-        if s is not None
-    ]
-    if not all_weighted:
-        return {}
-
-    all_scores  = [x[0] for x in all_weighted]
-    all_weights = [x[1] for x in all_weighted]
-    total_w = sum(all_weights)
-    wmean = sum(s * w for s, w in zip(all_scores, all_weights)) / total_w
-
-    # Score distribution buckets
-    buckets = {"0.0-0.2": 0, "0.2-0.4": 0, "0.4-0.6": 0, "0.6-0.8": 0, "0.8-1.0": 0}
-    for s, w in zip(all_scores, all_weights):
-        if s < 0.2:    buckets["0.0-0.2"] += w
-        elif s < 0.4:  buckets["0.2-0.4"] += w
-        elif s < 0.6:  buckets["0.4-0.6"] += w
-        elif s < 0.8:  buckets["0.6-0.8"] += w
-        else:          buckets["0.8-1.0"] += w
-    score_dist = {k: round(v / total_w, 4) for k, v in buckets.items()}
-
-    # Per-model means
-    model_scores = {}
-    for conv in conversations:
-        for chunk in conv.get("chunk_scores", []):
-            w = chunk.get("weight", 1.0)
-            for js in chunk.get("jury_scores", []):
-                m = js.get("judge_model")
-                s = js.get("global_human_score")
-                if m and s is not None:
-                    model_scores.setdefault(m, []).append((s, w))
-    by_model = {}
-    for m, pairs in model_scores.items():
-        tw = sum(p[1] for p in pairs)
-        by_model[m] = {
-            "weighted_mean": round(sum(s * w for s, w in pairs) / tw, 4),
-            "median": round(statistics.median([s for s, _ in pairs]), 4),
-            "n_scores": len(pairs),
-        }
+class RunningMedian:
+    """Exact streaming median (two heaps); equals statistics.median of everything added."""
+
+    def __init__(self):
+        self.low = []   # max-heap of the lower half (negated)
+        self.high = []  # min-heap of the upper half
+
+    def add(self, x):
+        if not self.low or x <= -self.low[0]:
+            heapq.heappush(self.low, -x)
+        else:
+            heapq.heappush(self.high, x)
+        if len(self.low) > len(self.high) + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+        elif len(self.high) > len(self.low):
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+
+    def median(self):
+        if len(self.low) > len(self.high):
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+class WeightedSum:
+    """Running weighted mean. Sums are exact Fractions, so the result doesn't depend on fold order."""
+
+    def __init__(self):
+        self.n = 0
+        self.total_w = Fraction(0)
+        self.total_sw = Fraction(0)
+
+    def add(self, s, w):
+        self.n += 1
+        self.total_w += Fraction(w)
+        self.total_sw += Fraction(s) * Fraction(w)
+
+    def mean(self):
+        return float(self.total_sw) / float(self.total_w)
 
-    # Per-flow means
-    flow_scores = {}
-    for conv in conversations:
+
+class AnalyticsState:
+    """
+    The run summary and analytics as running aggregates, folded in one
+    conversation at a time: adding a conversation costs O(its chunks) (plus a
+    sorted insert into the conversation index), instead of a rescan of the
+    whole run. The batch functions they replace, summarise() and
+    build_analytics(), are kept as the reference in
+    benchmarks/check_abcd_analytics.py.
+
+    order_key(conv) gives a conversation's place in the output (e.g. its
+    sample position); conversations with equal keys keep their arrival order.
+    Everything order-dependent in the batch functions (first-seen order of
+    models and flows, "lowest_5"/"highest_5", tie-breaks) is reproduced for
+    the conversations sorted that way, so the result matches
+    summarise(sorted_conversations) and build_analytics(...) on them (up to
+    the 4th-decimal rounding of a weighted mean that sits exactly on a tie,
+    where the batch functions' float sums can round the other way).
+    """
+
+    BUCKETS = ["0.0-0.2", "0.2-0.4", "0.4-0.6", "0.6-0.8", "0.8-1.0"]
+
+    def __init__(self, order_key=None):
+        self.order_key = order_key or (lambda conv: 0)
+        self.arrivals = 0
+        self.n_conversations = 0
+
+        # Every (human score, chunk weight) pair
+        self.scores = WeightedSum()
+        self.sum_s = Fraction(0)
+        self.sum_sq = Fraction(0)
+        self.median = RunningMedian()
+        self.min = self.max = None
+        self.w_above_0_7 = Fraction(0)
+        self.buckets = {k: Fraction(0) for k in self.BUCKETS}
+        self.by_filler = {False: WeightedSum(), True: WeightedSum()}
+
+        self.models = {}         # model -> (WeightedSum, RunningMedian)
+        self.flows = {}          # flow -> WeightedSum
+        self.flow_convs = {}     # flow -> number of conversations (scored or not)
+        self.first_seen = {}     # ("model"|"flow", name) -> position of first score
+
+        self.n_gaps = 0
+        self.sum_gaps = Fraction(0)
+        self.gap_median = RunningMedian()
+        self.gaps_within_0_2 = 0
+        self.gaps_over_0_3 = 0
+
+        # (sort key, row) lists kept sorted with insort; every sort key ends in the
+        # conversation's unique position, so tuples never fall through to comparing rows
+        self.rows = []           # by position (output order)
+        self.index = []          # by weighted_avg, then position
+        self.disagreement = []   # valid rows by mean_model_gap desc, then position
+        self.variability = []    # valid rows by chunk_avgs range desc, then position
+
+    def add(self, conv):
+        position = (self.order_key(conv), self.arrivals)
+        self.arrivals += 1
+        self.n_conversations += 1
         flow = conv["flow"]
-        for chunk in conv.get("chunk_scores", []):
+        self.flow_convs[flow] = self.flow_convs.get(flow, 0) + 1
+
+        chunks = conv.get("chunk_scores", [])
+        chunk_gaps = []
+        for c, chunk in enumerate(chunks):
             w = chunk.get("weight", 1.0)
             for s in chunk.get("human_scores", []):
                 if s is not None:
-                    flow_scores.setdefault(flow, []).append((s, w))
-    by_flow = {}
-    for flow, pairs in flow_scores.items():
-        tw = sum(p[1] for p in pairs)
-        by_flow[flow] = {
-            "weighted_mean": round(sum(s * w for s, w in pairs) / tw, 4),
-            "n_convs": sum(1 for c in conversations if c["flow"] == flow),
-        }
-
-    # Substantive vs filler
-    sub_pairs  = [(x[0], x[1]) for x in all_weighted if not x[2]]
-    fill_pairs = [(x[0], x[1]) for x in all_weighted if x[2]]
-    def wpair_stats(pairs):
-        if not pairs: return {}
-        tw = sum(w for _, w in pairs)
-        return {"weighted_mean": round(sum(s*w for s,w in pairs)/tw, 4), "n_scores": len(pairs)}
-    substantive_vs_filler = {
-        "substantive": wpair_stats(sub_pairs),
-        "filler":      wpair_stats(fill_pairs),
-    }
+                    self._add_score(s, w, chunk["is_filler"], flow, position + (c,))
 
-    # Model agreement
-    gaps = []
-    for conv in conversations:
-        for chunk in conv.get("chunk_scores", []):
             scores_by_model = {}
-            for js in chunk.get("jury_scores", []):
+            for j, js in enumerate(chunk.get("jury_scores", [])):
                 m = js.get("judge_model")
                 s = js.get("global_human_score")
                 if m and s is not None:
                     scores_by_model[m] = s
+                    self._seen("model", m, position + (c, j))
+                    if m not in self.models:
+                        self.models[m] = (WeightedSum(), RunningMedian())
+                    self.models[m][0].add(s, w)
+                    self.models[m][1].add(s)
             if len(scores_by_model) >= 2:
                 vals = list(scores_by_model.values())
-                gaps.append(max(vals) - min(vals))
-    model_agreement = {}
-    if gaps:
-        model_agreement = {
-            "mean_score_gap":       round(statistics.mean(gaps), 4),
-            "median_score_gap":     round(statistics.median(gaps), 4),
-            "pct_within_0_2":       round(sum(1 for g in gaps if g <= 0.2) / len(gaps), 4),
-            "pct_diverged_gt_0_3":  round(sum(1 for g in gaps if g > 0.3) / len(gaps), 4),
-        }
+                gap = max(vals) - min(vals)
+                self.n_gaps += 1
+                self.sum_gaps += Fraction(gap)
+                self.gap_median.add(gap)
+                self.gaps_within_0_2 += gap <= 0.2
+                self.gaps_over_0_3 += gap > 0.3
+                chunk_gaps.append(round(gap, 4))
 
-    # Conversation index — one row per conversation
-    conv_index = []
-    for conv in conversations:
-        chunks = conv.get("chunk_scores", [])
         chunk_avgs = [c.get("avg_human_score") for c in chunks if c.get("avg_human_score") is not None]
-        # model gap: mean absolute diff between models per chunk
-        chunk_gaps = []
-        for c in chunks:
-            scores_by_model = {}
-            for js in c.get("jury_scores", []):
-                m = js.get("judge_model")
-                s = js.get("global_human_score")
-                if m and s is not None:
-                    scores_by_model[m] = s
-            if len(scores_by_model) >= 2:
-                vals = list(scores_by_model.values())
-                chunk_gaps.append(round(max(vals) - min(vals), 4))
-        conv_index.append({
+        row = {
             "conversation_id":   conv["conversation_id"],
-            "flow":              conv["flow"],
+            "flow":              flow,
             "subflow":           conv["subflow"],
             "chunks_evaluated":  conv["chunks_evaluated"],
             "weighted_avg":      conv.get("weighted_avg_global_human_score"),
             "chunk_avgs":        chunk_avgs,
             "mean_model_gap":    round(statistics.mean(chunk_gaps), 4) if chunk_gaps else None,
             "has_filler":        any(c.get("is_filler") for c in chunks),
-        })
+        }
+        avg = row["weighted_avg"]
+        bisect.insort(self.rows, (position, row))
+        bisect.insort(self.index, ((avg is None, avg or 0, position), row))
+        if avg is not None:
+            spread = (max(chunk_avgs) - min(chunk_avgs)) if len(chunk_avgs) > 1 else 0
+            bisect.insort(self.disagreement, ((-(row["mean_model_gap"] or 0), position), row))
+            bisect.insort(self.variability, ((-spread, position), row))
+
+    def _seen(self, kind, name, position):
+        key = (kind, name)
+        if key not in self.first_seen or position < self.first_seen[key]:
+            self.first_seen[key] = position
+
+    def _add_score(self, s, w, is_filler, flow, position):
+        self.scores.add(s, w)
+        self.sum_s += Fraction(s)
+        self.sum_sq += Fraction(s) ** 2
+        self.median.add(s)
+        self.min = s if self.min is None else min(self.min, s)
+        self.max = s if self.max is None else max(self.max, s)
+        if s >= 0.7:
+            self.w_above_0_7 += Fraction(w)
+        if s < 0.2:    bucket = "0.0-0.2"
+        elif s < 0.4:  bucket = "0.2-0.4"
+        elif s < 0.6:  bucket = "0.4-0.6"
+        elif s < 0.8:  bucket = "0.6-0.8"
+        else:          bucket = "0.8-1.0"
+        self.buckets[bucket] += Fraction(w)
+        self.by_filler[bool(is_filler)].add(s, w)
+        self._seen("flow", flow, position)
+        self.flows.setdefault(flow, WeightedSum()).add(s, w)
+
+    def _stdev(self):
+        n = self.scores.n
+        if n < 2:
+            return 0.0
+        # Sum of squared deviations, exactly, as statistics.stdev computes it
+        return math.sqrt((self.sum_sq - self.sum_s ** 2 / n) / (n - 1))
+
+    def _ordered(self, kind, names):
+        return sorted(names, key=lambda name: self.first_seen[(kind, name)])
+
+    def summary(self):
+        """Same result as summarise() over the conversations added so far."""
+        if not self.scores.n:
+            return {}
+        return {
+            "n_scores": self.scores.n,
+            "weighted_mean_global_human_score": round(self.scores.mean(), 4),
+            "median_global_human_score":        round(self.median.median(), 4),
+            "stdev_global_human_score":         round(self._stdev(), 4),
+            "min": round(self.min, 4),
+            "max": round(self.max, 4),
+            "pct_above_0_7": round(float(self.w_above_0_7) / float(self.scores.total_w), 4),
+        }
 
-    # Sort index by weighted_avg ascending (lowest scoring convos first — most interesting for debugging)
-    conv_index_sorted = sorted(conv_index, key=lambda x: (x["weighted_avg"] is None, x["weighted_avg"] or 0))
-
-    # Notable conversations
-    valid = [c for c in conv_index if c["weighted_avg"] is not None]
-    notable = {
-        "lowest_5":  [c["conversation_id"] for c in valid[:5]],
-        "highest_5": [c["conversation_id"] for c in reversed(valid[-5:])],
-        "most_model_disagreement": [
-            c["conversation_id"]
-            for c in sorted(valid, key=lambda x: x["mean_model_gap"] or 0, reverse=True)[:5]
-        ],
-        "most_variable": [
-            c["conversation_id"]
-            for c in sorted(valid, key=lambda x: (max(x["chunk_avgs"]) - min(x["chunk_avgs"])) if len(x["chunk_avgs"]) > 1 else 0, reverse=True)[:5]
-        ],
-    }
+    def analytics(self):
+        """Same result as build_analytics() over the conversations added so far."""
+        if not self.scores.n:
+            return {}
+        total_w = float(self.scores.total_w)
+
+        by_model = {}
+        for m in self._ordered("model", self.models):
+            pairs, median = self.models[m]
+            by_model[m] = {
+                "weighted_mean": round(pairs.mean(), 4),
+                "median": round(median.median(), 4),
+                "n_scores": pairs.n,
+            }
+
+        by_flow = {
+            flow: {"weighted_mean": round(self.flows[flow].mean(), 4), "n_convs": self.flow_convs[flow]}
+            for flow in self._ordered("flow", self.flows)
+        }
 
-    return {
-        "overall": {
-            "n_conversations": len(conversations),
-            "n_scores": len(all_scores),
-            "weighted_mean": round(wmean, 4),
-            "median": round(statistics.median(all_scores), 4),
-            "stdev": round(statistics.stdev(all_scores), 4) if len(all_scores) > 1 else 0.0,
-            "min": round(min(all_scores), 4),
-            "max": round(max(all_scores), 4),
-            "pct_above_0_7": round(sum(w for s, w in zip(all_scores, all_weights) if s >= 0.7) / total_w, 4),
-        },
-        "score_distribution": score_dist,
-        "by_model": by_model,
-        "by_flow": by_flow,
-        "substantive_vs_filler": substantive_vs_filler,
-        "model_agreement": model_agreement,
-        "notable": notable,
-        "conversation_index": conv_index_sorted,
-    }
+        def wpair_stats(pairs):
+            if not pairs.n: return {}
+            return {"weighted_mean": round(pairs.mean(), 4), "n_scores": pairs.n}
+
+        model_agreement = {}
+        if self.n_gaps:
+            model_agreement = {
+                "mean_score_gap":       round(float(self.sum_gaps / self.n_gaps), 4),
+                "median_score_gap":     round(self.gap_median.median(), 4),
+                "pct_within_0_2":       round(self.gaps_within_0_2 / self.n_gaps, 4),
+                "pct_diverged_gt_0_3":  round(self.gaps_over_0_3 / self.n_gaps, 4),
+            }
+
+        lowest, highest = [], []
+        for _, row in self.rows:
+            if len(lowest) == 5: break
+            if row["weighted_avg"] is not None: lowest.append(row["conversation_id"])
+        for _, row in reversed(self.rows):
+            if len(highest) == 5: break
+            if row["weighted_avg"] is not None: highest.append(row["conversation_id"])
+
+        return {
+            "overall": {
+                "n_conversations": self.n_conversations,
+                "n_scores": self.scores.n,
+                "weighted_mean": round(self.scores.mean(), 4),
+                "median": round(self.median.median(), 4),
+                "stdev": round(self._stdev(), 4),
+                "min": round(self.min, 4),
+                "max": round(self.max, 4),
+                "pct_above_0_7": round(float(self.w_above_0_7) / total_w, 4),
+            },
+            "score_distribution": {k: round(float(v) / total_w, 4) for k, v in self.buckets.items()},
+            "by_model": by_model,
+            "by_flow": by_flow,
+            "substantive_vs_filler": {
+                "substantive": wpair_stats(self.by_filler[False]),
+                "filler":      wpair_stats(self.by_filler[True]),
+            },
+            "model_agreement": model_agreement,
+            "notable": {
+                "lowest_5":  lowest,
+                "highest_5": highest,
+                "most_model_disagreement": [row["conversation_id"] for _, row in self.disagreement[:5]],
+                "most_variable": [row["conversation_id"] for _, row in self.variability[:5]],
+            },
+            "conversation_index": [row for _, row in self.index],
+        }
 
 
 def analytics_path(output_path):
@@ -518,21 +712,45 @@ def main():
                         help="Comma-separated jury model IDs")
     parser.add_argument("--jury-mode", choices=["independent"], default="independent",
                         help="Jury evaluation strategy (only independent supported for this baseline)")
+    parser.add_argument("--audit-mode", choices=AUDIT_MODES, default="per-dimension",
+                        help="Phase 1 audits: one request per dimension, or all four in one structured request")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Conversations evaluated concurrently (default: 1 = serial)")
+    parser.add_argument("--jury-concurrency", type=int, default=jury_engine.DEFAULT_MAX_CONCURRENCY,
+                        help="Max LLM requests in flight at once across all workers")
     parser.add_argument("--output", default="results/abcd_human_baseline.json")
+    parser.add_argument("--checkpoint-every", type=int, default=25,
+                        help="Rewrite the aggregate output and analytics every N conversations "
+                             "(each conversation is always appended to the JSONL log as it finishes)")
     parser.add_argument("--dry-run", action="store_true",
                         help="Show merged chunks without running the jury")
     parser.add_argument("--full", action="store_true",
                         help="Show full raw turns alongside chunks (use with --dry-run)")
+    parser.add_argument("--base-url", default=None,
+                        help="OpenAI-compatible endpoint to call instead of OpenRouter (env: LLM_BASE_URL)")
+    llm_cache.add_cli_args(parser)
+    rate_limit.add_cli_args(parser)
+    resilience.add_cli_args(parser)
+    rolling_context.add_cli_args(parser)
+    llm_usage.add_cli_args(parser)
+    tracing.add_cli_args(parser)
     args = parser.parse_args()
 
     jury_models = [m.strip() for m in args.jury_models.split(",")]
 
     log.info(f"Sampling {args.n} ABCD conversations (split={args.split})...")
     samples = load_sample(n=args.n, seed=args.seed, split=args.split, flows=args.flows, min_words=args.min_words)
-    log.info(f"Loaded {len(samples)} conversations.")
+    chunk_index = open_chunk_index(args.split, args.min_words)
+    n_chunks = sum(len(chunk_index.get(conv["convo_id"])) for conv in samples)
+    audits_per_chunk = 1 if args.audit_mode == "combined" else 4
+    log.info(f"Loaded {len(samples)} conversations: {n_chunks} chunks to evaluate "
+             f"(~{n_chunks * len(jury_models) * audits_per_chunk} jury requests before retries/cache hits).")
 
     # Dry run: show merged chunks without calling the jury
     if args.dry_run:
+        print(f"Evaluable conversations/chunks per flow in split={args.split} (min_words={args.min_words}):")
+        for flow, counts in sorted(chunk_index.flow_counts.items()):
+            print(f"  {flow:<24} {counts['conversations']:>5} convs  {counts['chunks']:>6} chunks")
         for conv in samples[:5]:  # cap at 5 for readability
             print(f"\n=== convo_id={conv['convo_id']} | {conv['scenario']['flow']}/{conv['scenario']['subflow']} ===")
             if args.full:
@@ -540,7 +758,7 @@ def main():
                     if turn[0] != "action":
                         print(f"  [{turn[0]}]: {turn[1]}")
                 print()
-            chunks = extract_substantive_chunks(conv, min_words=args.min_words)
+            chunks = chunk_index.get(conv["convo_id"])
             skipped = sum(
                 1 for i, t in enumerate(conv["original"])
                 if t[0] == "customer" and t[1].strip()
@@ -552,70 +770,112 @@ def main():
                 print(f"    Agent:    {agent}")
         return
 
+    jury_engine.set_max_concurrency(args.jury_concurrency)
+    set_base_url(args.base_url)
+    cache = llm_cache.configure_from_args(args)
+    rate_limit.configure_from_args(args)
+    resilience.configure_from_args(args)
+    llm_usage.configure_from_args(args)
+    tracing.configure_from_args(args)
+
     # Load existing output for resume support
     existing_output, completed_ids = load_existing_output(args.output)
 
+    output = {
+        "metadata": {
+            "dataset": "ABCD v1.1 (asappresearch/abcd)",
+            "split": args.split,
+            "sample_size": args.n,
+            "flows_filter": args.flows,
+            "min_words_threshold": args.min_words,
+            "jury_models": jury_models,
+            "jury_mode": args.jury_mode,
+            "audit_mode": args.audit_mode,
+            "context_budget": args.context_budget,
+            "replay_mode": "full_sequential",
+            "evaluated_speaker": "human_agent",
+            "prompts": "ecommerce_override",
+            "run_timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "summary": {},
+        "usage": {},
+        "conversations": [],
+    }
     if existing_output:
-        output = existing_output
-    else:
-        output = {
-            "metadata": {
-                "dataset": "ABCD v1.1 (asappresearch/abcd)",
-                "split": args.split,
-                "sample_size": args.n,
-                "flows_filter": args.flows,
-                "min_words_threshold": args.min_words,
-                "jury_models": jury_models,
-                "jury_mode": args.jury_mode,
-                "replay_mode": "full_sequential",
-                "evaluated_speaker": "human_agent",
-                "prompts": "ecommerce_override",
-                "run_timestamp": datetime.now(timezone.utc).isoformat(),
-            },
-            "summary": {},
-            "conversations": [],
-        }
-
+        output["metadata"] = existing_output.get("metadata") or output["metadata"]
+        output["conversations"] = existing_output.get("conversations", [])
+
+    # Finished conversations are appended to the JSONL log as they complete;
+    # the aggregate output and analytics are rebuilt only every
+    # --checkpoint-every conversations and at the end.
+    conv_log_path = conversation_log_path(args.output)
+    seed_log = not os.path.exists(conv_log_path)
+    conv_log = ConversationLog(conv_log_path)
+    if seed_log:
+        for record in output["conversations"]:
+            conv_log.append(record)
+
+    new_context = rolling_context.factory_from_args(args, summarize_exchanges, jury_models[0])
+    pending = []
     for i, conv in enumerate(samples):
-        conv_id = conv["convo_id"]
-        flow = conv["scenario"]["flow"]
-        subflow = conv["scenario"]["subflow"]
-
-        if conv_id in completed_ids:
-            log.info(f"[{i+1}/{len(samples)}] convo_id={conv_id} already completed, skipping.")
+        if conv["convo_id"] in completed_ids:
+            log.info(f"[{i+1}/{len(samples)}] convo_id={conv['convo_id']} already completed, skipping.")
             continue
-
-        log.info(f"[{i+1}/{len(samples)}] convo_id={conv_id} | {flow}/{subflow}")
-
-        chunk_scores = full_replay_evaluate_conversation(
-            conv=conv,
-            jury_models=jury_models,
-            min_words=args.min_words,
-        )
-
-        weighted_human = [(s, c.get("weight", 1.0)) for c in chunk_scores for s in c.get("human_scores", []) if s is not None]
-        if weighted_human:
-            total_w = sum(w for _, w in weighted_human)
-            conv_avg = round(sum(s * w for s, w in weighted_human) / total_w, 4)
-        else:
-            conv_avg = None
-
-        output["conversations"].append({
-            "conversation_id": conv_id,
-            "flow": flow,
-            "subflow": subflow,
-            "chunks_evaluated": len(chunk_scores),
-            "chunk_scores": chunk_scores,
-            "weighted_avg_global_human_score": conv_avg,
-        })
-
-        # Update summary and write incrementally after every conversation
-        output["summary"] = summarise(output["conversations"])
-        write_output(args.output, output)
-        analytics = build_analytics(output)
-        write_output(analytics_path(args.output), analytics)
-        log.info(f"  Written to {args.output} (running weighted mean={output['summary'].get('weighted_mean_global_human_score')})")
-
+        pending.append(partial(evaluate_conversation, conv, jury_models, args.min_words,
+                               jury_options={"audit_mode": args.audit_mode},
+                               position=f"[{i+1}/{len(samples)}]",
+                               chunks=chunk_index.get(conv["convo_id"]),
+                               new_context=new_context))
+
+    # Conversations are independent; with --workers > 1 they are evaluated
+    # concurrently and recorded (on this thread) as each one finishes.
+    sample_order = {conv["convo_id"]: i for i, conv in enumerate(samples)}
+    order_key = lambda c: sample_order.get(c["conversation_id"], -1)
+    # Summary and analytics are kept as running aggregates, so each finished
+    # conversation only costs the work of folding in its own chunks
+    state = AnalyticsState(order_key=order_key)
+    run_usage = llm_usage.Rollup()
+    for record in output["conversations"]:
+        state.add(record)
+        run_usage.merge(record.get("usage", {}))
+
+    def checkpoint():
+        # Keep sample order regardless of which worker finished first, so the
+        # output matches a serial run
+        output["conversations"].sort(key=order_key)
+        output["summary"] = state.summary()
+        output["usage"] = run_usage.to_dict()
+        with tracing.span("write_output"):
+            write_output(args.output, output)
+            write_output(analytics_path(args.output), state.analytics())
+        log.info(f"  Checkpoint written to {args.output}")
+        # The trace is rewritten with the aggregate files so an interrupted run still has one
+        tracing.flush()
+
+    since_checkpoint = 0
+    try:
+        for _, record in jury_engine.completed(pending, args.workers):
+            conv_log.append(record)
+            output["conversations"].append(record)
+            completed_ids.add(record["conversation_id"])
+            state.add(record)
+            run_usage.merge(record["usage"])
+            log.info(f"  convo_id={record['conversation_id']} logged to {conv_log_path} (running weighted mean={state.summary().get('weighted_mean_global_human_score')})")
+            since_checkpoint += 1
+            if since_checkpoint >= args.checkpoint_every:
+                checkpoint()
+                since_checkpoint = 0
+    finally:
+        conv_log.close()
+        # Whatever finished is already in the log; bring the aggregate files up to date too
+        checkpoint()
+
+    if cache is not None:
+        log.info(f"LLM cache: {cache.stats()}")
+    log.info(f"Rate limits: {rate_limit.stats()}")
+    log.info(f"Circuit breakers: {resilience.stats()}")
+    log.info(f"Usage: {output['usage']['calls']} calls, {output['usage']['prompt_tokens']} prompt tokens "
+             f"({output['usage']['cached_tokens']} cached), ${output['usage']['cost_usd']:.4f}")
     log.info(f"Done. Final summary:\n{json.dumps(output['summary'], indent=2)}")
 
 
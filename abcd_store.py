@@ -0,0 +1,196 @@
+"""
+abcd_store.py
+
+Compact, indexed on-disk copy of the ABCD dataset for abcd_baseline.
+
+The upstream file is a single gzipped JSON document holding every split and
+every field (delexicalised text, KB lookups, ...), so using it means
+decompressing and parsing all of it on every run. `build_store` converts it
+once into one file per split with one slim record per line:
+
+    {"convo_id": ..., "scenario": {"flow": ..., "subflow": ...}, "original": [[speaker, text], ...]}
+
+(action turns dropped), plus an index of (convo_id, flow, offset, length) in
+dataset order. `AbcdStore` memory-maps the records file and decodes a
+conversation only when it is asked for, so a run holds just the
+conversations it samples.
+
+Next to it, `build_chunk_index` persists the substantive chunks of each split
+for a given min_words (conversations without any are left out), with per-flow
+conversation/chunk counts. Sampling, replay and --dry-run all read chunks from
+there instead of re-running the chunker.
+"""
+
+import os
+import json
+import mmap
+
+STORE_VERSION = 1
+# Bump when abcd_baseline.extract_substantive_chunks changes, to rebuild chunk indexes
+CHUNK_INDEX_VERSION = 1
+
+
+def slim_record(conv):
+    return {
+        "convo_id": conv["convo_id"],
+        "scenario": {"flow": conv["scenario"]["flow"], "subflow": conv["scenario"]["subflow"]},
+        "original": [turn for turn in conv["original"] if turn[0] != "action"],
+    }
+
+
+def records_path(directory, split):
+    return os.path.join(directory, f"{split}.jsonl")
+
+
+def index_path(directory, split):
+    return os.path.join(directory, f"{split}.index.json")
+
+
+def chunks_path(directory, split, min_words):
+    return os.path.join(directory, f"{split}.chunks-{min_words}.jsonl")
+
+
+def chunk_index_path(directory, split, min_words):
+    return os.path.join(directory, f"{split}.chunks-{min_words}.index.json")
+
+
+def write_records(path, records):
+    """Write (convo_id, flow, record) triples as JSONL; returns [convo_id, flow, offset, length] entries."""
+    entries = []
+    offset = 0
+    with open(path + ".tmp", "wb") as f:
+        for convo_id, flow, record in records:
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            f.write(line)
+            entries.append([convo_id, flow, offset, len(line)])
+            offset += len(line)
+    os.replace(path + ".tmp", path)
+    return entries
+
+
+def write_index(path, index, version=STORE_VERSION):
+    # Written last (and atomically): its presence marks the records file as complete
+    with open(path + ".tmp", "w") as f:
+        json.dump({"version": version, **index}, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def read_index(path, version=STORE_VERSION):
+    """The index at path, or None if it is missing or from another version."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        index = json.load(f)
+    return index if index.get("version") == version else None
+
+
+def build_store(data, directory):
+    """Write the slim records and index of every split in `data` (the parsed ABCD file)."""
+    os.makedirs(directory, exist_ok=True)
+    for split, convs in data.items():
+        entries = write_records(records_path(directory, split),
+                                ((conv["convo_id"], conv["scenario"]["flow"], slim_record(conv)) for conv in convs))
+        write_index(index_path(directory, split), {"split": split, "entries": entries})
+
+
+def store_exists(directory, split):
+    return os.path.exists(records_path(directory, split)) and read_index(index_path(directory, split)) is not None
+
+
+class MappedRecords:
+    """JSONL records addressed by an index of (convo_id, flow, offset, length), decoded on demand."""
+
+    def __init__(self, path, entries):
+        # Dataset order is preserved so sampling matches the original loader
+        self.ids = [convo_id for convo_id, _, _, _ in entries]
+        self.flows = {convo_id: flow for convo_id, flow, _, _ in entries}
+        self.spans = {convo_id: (offset, length) for convo_id, _, offset, length in entries}
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.spans else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, convo_id):
+        return convo_id in self.spans
+
+    def ids_for_flows(self, flows=None):
+        """convo_ids in dataset order, optionally restricted to the given flows."""
+        if not flows:
+            return list(self.ids)
+        return [convo_id for convo_id in self.ids if self.flows[convo_id] in flows]
+
+    def _read(self, convo_id):
+        offset, length = self.spans[convo_id]
+        return json.loads(self._map[offset:offset + length])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class AbcdStore(MappedRecords):
+    """Read-only view of one split; conversations are decoded on demand."""
+
+    def __init__(self, directory, split):
+        self.split = split
+        super().__init__(records_path(directory, split), read_index(index_path(directory, split))["entries"])
+
+    def get(self, convo_id):
+        return self._read(convo_id)
+
+    def __iter__(self):
+        for convo_id in self.ids:
+            yield self.get(convo_id)
+
+
+# -----------------------------------------------------------------------
+# Substantive-chunk index, one per (split, min_words)
+# -----------------------------------------------------------------------
+
+def build_chunk_index(store, directory, min_words, chunker):
+    """
+    Run chunker(conv, min_words=...) over every conversation of the store once
+    and persist the chunks of those that have any, with per-flow counts.
+    """
+    flow_counts = {}
+
+    def records():
+        for conv in store:
+            chunks = chunker(conv, min_words=min_words)
+            if not chunks:
+                continue
+            flow = conv["scenario"]["flow"]
+            counts = flow_counts.setdefault(flow, {"conversations": 0, "chunks": 0})
+            counts["conversations"] += 1
+            counts["chunks"] += len(chunks)
+            yield conv["convo_id"], flow, chunks
+
+    entries = write_records(chunks_path(directory, store.split, min_words), records())
+    write_index(chunk_index_path(directory, store.split, min_words),
+                {"split": store.split, "min_words": min_words, "entries": entries, "flow_counts": flow_counts},
+                version=CHUNK_INDEX_VERSION)
+
+
+def chunk_index_exists(directory, split, min_words):
+    return (os.path.exists(chunks_path(directory, split, min_words))
+            and read_index(chunk_index_path(directory, split, min_words), CHUNK_INDEX_VERSION) is not None)
+
+
+class ChunkIndex(MappedRecords):
+    """
+    Substantive chunks of every conversation in a split that has at least one,
+    as (customer, merged_agent, n_raw_turns, is_filler) tuples.
+    flow_counts maps flow -> {"conversations": n, "chunks": n}.
+    """
+
+    def __init__(self, directory, split, min_words):
+        self.split = split
+        self.min_words = min_words
+        index = read_index(chunk_index_path(directory, split, min_words), CHUNK_INDEX_VERSION)
+        self.flow_counts = index["flow_counts"]
+        super().__init__(chunks_path(directory, split, min_words), index["entries"])
+
+    def get(self, convo_id):
+        return [tuple(chunk) for chunk in self._read(convo_id)]
@@ -1,93 +1,22 @@
-import os
-import json
-import glob
-import re
 import csv
 import numpy as np
-from collections import defaultdict
+from score_store import ScoreStore, ISOLATED, ROLLING, role_play_turn_stats
 from statistics import mode, StatisticsError
 
-def extract_human_score(text):
-    """Extracts the float score from the HUMAN_SCORE=$score format."""
-    if not isinstance(text, str):
-        return None
-    match = re.search(r'HUMAN_SCORE=([0-9.]+)', text)
-    if match:
-        return float(match.group(1))
-    return None
+def analyze_directory(directory_path, output_csv="turn_analysis.csv", workers=None, store=None):
+    # Every verdict is flattened into a columnar store (parsed in a process
+    # pool); the metrics below are vectorized group-bys over its columns
+    if store is None:
+        store = ScoreStore.from_directory(directory_path, workers=workers)
+    stats = role_play_turn_stats(store)
 
-def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
-    file_paths = glob.glob(os.path.join(directory_path, '*.json'))
-    
-    # --- Metrics Storage ---
-    total_files_processed = 0
-    empty_or_invalid_files = 0
-    safety_refusals = 0
-    
-    conversation_lengths = []
-    final_rolling_scores = []
-    
-    # Dictionaries to track scores per turn across all transcripts
-    turn_isolated_scores = defaultdict(list)
-    turn_rolling_scores = defaultdict(list)
-    
-    for file_path in file_paths:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            empty_or_invalid_files += 1
-            continue
-
-        interactions = data.get("interaction", [])
-        if not interactions:
-            empty_or_invalid_files += 1
-            continue
-            
-        total_files_processed += 1
-        conversation_lengths.append(len(interactions))
-        
-        last_valid_rolling_score = None
-        
-        for turn_data in interactions:
-            turn_num = turn_data.get("turn")
-            jury_scores = turn_data.get("jury_scores", [])
-            
-            # Average the jurors if there are multiple (usually 1, but future-proofs the script)
-            iso_turn_vals = []
-            roll_turn_vals = []
-            
-            for juror in jury_scores:
-                iso_eval = juror.get("isolated_evaluation", {})
-                roll_eval = juror.get("rolling_evaluation", {})
-                
-                iso_global = iso_eval.get("global", "")
-                roll_global = roll_eval.get("global", "")
-                
-                iso_score = extract_human_score(iso_global)
-                roll_score = extract_human_score(roll_global)
-                
-                if iso_score is not None:
-                    iso_turn_vals.append(iso_score)
-                else:
-                    safety_refusals += 1
-                    
-                if roll_score is not None:
-                    roll_turn_vals.append(roll_score)
-                else:
-                    safety_refusals += 1
-            
-            # Record the averaged scores for this specific turn
-            if iso_turn_vals:
-                turn_isolated_scores[turn_num].append(np.mean(iso_turn_vals))
-            if roll_turn_vals:
-                turn_mean = np.mean(roll_turn_vals)
-                turn_rolling_scores[turn_num].append(turn_mean)
-                last_valid_rolling_score = turn_mean # Update the latest valid rolling score
-                
-        # Store the final rolling score for the conversation
-        if last_valid_rolling_score is not None:
-            final_rolling_scores.append(last_valid_rolling_score)
+    total_files_processed = stats["files_processed"]
+    empty_or_invalid_files = stats["files_skipped"]
+    safety_refusals = stats["refusals"]
+    conversation_lengths = stats["lengths"]
+    final_rolling_scores = stats["final_scores"]
+    turn_isolated_scores = stats["per_turn"][ISOLATED]  # turn -> (mean, sample size)
+    turn_rolling_scores = stats["per_turn"][ROLLING]
 
     # --- Analytics Computation ---
     print("="*50)
@@ -138,10 +67,9 @@ def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
     
     csv_data = []
     for turn in sorted(turn_isolated_scores.keys()):
-        iso_avg = np.mean(turn_isolated_scores[turn]) if turn in turn_isolated_scores else 0.0
-        roll_avg = np.mean(turn_rolling_scores[turn]) if turn in turn_rolling_scores else 0.0
+        iso_avg, n_samples = turn_isolated_scores[turn]
+        roll_avg = turn_rolling_scores[turn][0] if turn in turn_rolling_scores else 0.0
         delta = roll_avg - iso_avg
-        n_samples = len(turn_isolated_scores[turn])
         
         print(f"{turn:<6} | {iso_avg:<14.4f} | {roll_avg:<14.4f} | {delta:<18.4f} | {n_samples}")
         csv_data.append({"Turn": turn, "Avg_Isolated": iso_avg, "Avg_Rolling": roll_avg, "Delta": delta, "Sample_Size": n_samples})
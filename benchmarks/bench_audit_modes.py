@@ -0,0 +1,180 @@
+"""
+bench_audit_modes.py
+
+Compare Phase 1 'per-dimension' audits against the single-call 'combined' mode.
+
+Every turn of a transcript is audited in independent mode under both audit
+modes with the same jury. For each mode we count the requests issued and the
+prompt/completion tokens they used; across modes we measure how often the
+parsed scores agree, per context (isolated/rolling) and dimension.
+
+Usage:
+  python benchmarks/bench_audit_modes.py --input-transcript input/transcripts/binh_04.txt \\
+      --jury-llm-models openai/gpt-5.4 --output results/bench_audit_modes.json
+
+Pass --stub to run offline against the in-process stub client (call and token
+counts are then exact, agreement numbers are only a smoke test).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limit
+import role_play_framework as rpf
+from role_play_framework_multi_input import parse_transcript
+
+
+def parse_dimension(dimension, text):
+    """Reduce a raw audit answer to a comparable value (None if unparseable)."""
+    if not isinstance(text, str):
+        return None
+    if dimension == "global":
+        m = re.search(r'HUMAN_SCORE\s*=\s*([0-9.]+)', text)
+        return float(m.group(1)) if m else None
+    if dimension == "identity":
+        m = re.search(r'\[(.*?)\]', text)
+        return m.group(1).strip().lower() if m else None
+    if dimension == "knowledge":
+        m = re.search(r'Score:\s*([0-9.]+)', text)
+        return float(m.group(1)) if m else None
+    if dimension == "rejection":
+        lowered = text.strip().lower()
+        if lowered.startswith("yes"):
+            return "yes"
+        if lowered.startswith("no"):
+            return "no"
+    return None
+
+
+class CallCounter:
+    """Wraps rpf.create_completion to count requests and token usage."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        self._original = rpf.create_completion
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def __call__(self, model, messages, **params):
+        res = self._original(model=model, messages=messages, **params)
+        usage = getattr(res, "usage", None)
+        with self.lock:
+            self.calls += 1
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens or 0
+                self.completion_tokens += usage.completion_tokens or 0
+            else:
+                # Rough fallback when the provider returns no usage block
+                self.prompt_tokens += rate_limit.estimate_tokens(messages)
+        return res
+
+
+def run_mode(qa_pairs, jury, audit_mode, counter):
+    counter.reset()
+    reports = []
+    conversation_history = ""
+    start = time.perf_counter()
+    for pair in qa_pairs:
+        interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+        conversation_history += f"{interaction}\n\n"
+        reports.append(rpf.judge_response(
+            jury_models=jury,
+            interaction=interaction,
+            jury_mode="independent",
+            conversation_history=conversation_history,
+            num_rounds=0,
+            audit_mode=audit_mode,
+        ))
+    return reports, {
+        "wall_time_s": round(time.perf_counter() - start, 4),
+        "calls": counter.calls,
+        "prompt_tokens": counter.prompt_tokens,
+        "completion_tokens": counter.completion_tokens,
+    }
+
+
+def agreement(reports_a, reports_b):
+    """Per (context, dimension): match rate for labels, mean abs diff for scores."""
+    result = {}
+    for turn_a, turn_b in zip(reports_a, reports_b):
+        for juror_a, juror_b in zip(turn_a, turn_b):
+            for context in ("isolated_evaluation", "rolling_evaluation"):
+                for dimension in ("global", "identity", "knowledge", "rejection"):
+                    a = parse_dimension(dimension, juror_a[context].get(dimension))
+                    b = parse_dimension(dimension, juror_b[context].get(dimension))
+                    bucket = result.setdefault(f"{context}.{dimension}", {"n": 0, "unparsed": 0, "values": []})
+                    bucket["n"] += 1
+                    if a is None or b is None:
+                        bucket["unparsed"] += 1
+                    elif isinstance(a, float):
+                        bucket["values"].append(abs(a - b))
+                    else:
+                        bucket["values"].append(1.0 if a == b else 0.0)
+
+    summary = {}
+    for key, bucket in result.items():
+        values = bucket.pop("values")
+        metric = "mean_abs_diff" if key.endswith((".global", ".knowledge")) else "match_rate"
+        bucket[metric] = round(sum(values) / len(values), 4) if values else None
+        summary[key] = bucket
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-dimension vs combined Phase 1 audits")
+    parser.add_argument("--input-transcript", default="input/transcripts/binh_04.txt")
+    parser.add_argument("--jury-llm-models", default="openai/gpt-5.4", help="Comma separated jury models")
+    parser.add_argument("--max-turns", type=int, default=None, help="Only audit the first N turns")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout")
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub client instead of the API")
+    args = parser.parse_args()
+
+    if args.stub:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import stub_client
+        stub_client.install()
+
+    jury = args.jury_llm_models.split(",")
+    qa_pairs = parse_transcript(args.input_transcript)[:args.max_turns]
+
+    counter = CallCounter()
+    rpf.create_completion = counter
+    try:
+        per_dim_reports, per_dim_cost = run_mode(qa_pairs, jury, "per-dimension", counter)
+        combined_reports, combined_cost = run_mode(qa_pairs, jury, "combined", counter)
+    finally:
+        rpf.create_completion = counter._original
+
+    result = {
+        "transcript": args.input_transcript,
+        "jury": jury,
+        "turns": len(qa_pairs),
+        "cost": {"per-dimension": per_dim_cost, "combined": combined_cost},
+        "agreement": agreement(per_dim_reports, combined_reports),
+    }
+    if combined_cost["calls"]:
+        result["call_reduction"] = round(per_dim_cost["calls"] / combined_cost["calls"], 2)
+    if combined_cost["prompt_tokens"]:
+        result["prompt_token_reduction"] = round(per_dim_cost["prompt_tokens"] / combined_cost["prompt_tokens"], 2)
+
+    text = json.dumps(result, indent=4)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+bench_circuit_breaker.py
+
+Check that a model's circuit breaker recovers however its half-open probe ends.
+
+For each way a probe can end without a plain success or retryable failure
+(a non-retryable 400, a 429, the overall call deadline, an exception while
+consuming the response) we:
+
+  1. open the circuit with retryable timeouts,
+  2. wait out the cooldown and let the scripted failure hit the probe call,
+  3. make one more call, which must be let through (and succeed) instead of
+     failing with CircuitOpenError.
+
+A plain retryable failure of the probe is included as the control: it must
+re-open the circuit, and the call after the next cooldown must close it.
+
+Runs offline against a scripted client through role_play_framework.send_request.
+Prints a JSON report and exits non-zero if the breaker got stuck in any case.
+
+Usage:
+  python benchmarks/bench_circuit_breaker.py --cooldown 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+try:
+    import httpx
+except ImportError:  # newer openai releases build their errors on the httpx2 fork
+    import httpx2 as httpx
+from openai import APITimeoutError, BadRequestError, RateLimitError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import role_play_framework as rpf
+import resilience
+import stub_client
+
+MODEL = "openai/gpt-5.4"
+MESSAGES = [{"role": "user", "content": "ping"}]
+REQUEST = httpx.Request("POST", "https://stub/v1/chat/completions")
+
+
+def make_error(kind):
+    if kind == "timeout":
+        return APITimeoutError(request=REQUEST)
+    if kind == "400":
+        return BadRequestError("bad request", response=httpx.Response(400, request=REQUEST), body=None)
+    if kind == "429":
+        return RateLimitError("slow down", response=httpx.Response(429, request=REQUEST, headers={"retry-after": "0"}),
+                              body=None)
+    raise ValueError(kind)
+
+
+class ScriptedCompletions(stub_client.StubCompletions):
+    """Stub completions whose next calls fail as scripted ('timeout', '400', '429'), then answer normally."""
+
+    def __init__(self):
+        super().__init__(latency="fixed:0")
+        self.script = []
+
+    def create(self, model, messages, **params):
+        if self.script:
+            raise make_error(self.script.pop(0))
+        return super().create(model, messages, **params)
+
+
+def unparseable(res):
+    raise ValueError("unparseable stream")
+
+
+def call(**params):
+    """One send_request; returns 'ok' or the name of the exception it raised."""
+    try:
+        rpf.send_request(MODEL, MESSAGES, **params)
+        return "ok"
+    except Exception as e:
+        return type(e).__name__
+
+
+def run_case(completions, probe_failure, threshold, cooldown):
+    resilience.configure(max_attempts=1, failure_threshold=threshold, cooldown_s=cooldown)
+    breaker = resilience.get_breaker(MODEL)
+
+    completions.script = ["timeout"] * threshold
+    opening = [call() for _ in range(threshold)]
+    while_open = call()
+    time.sleep(cooldown)
+
+    params = {}
+    if probe_failure in ("timeout", "400", "429"):
+        completions.script = [probe_failure]
+    elif probe_failure == "deadline":
+        resilience.policy.total_deadline = 0
+    elif probe_failure == "consume":
+        params["consume"] = unparseable
+    probe = call(**params)
+    resilience.policy.total_deadline = resilience.policy.request_timeout * resilience.policy.max_attempts
+    after_probe = {"state": breaker.state, "probing": breaker.probing is not None}
+
+    if probe_failure == "timeout":
+        # The control: a retryable failure re-opens the circuit for another cooldown
+        time.sleep(cooldown)
+    recovery = call()
+    return {
+        "opening_calls": opening,
+        "while_open": while_open,
+        "probe": probe,
+        "after_probe": after_probe,
+        "recovery_call": recovery,
+        "final_state": breaker.state,
+        "recovered": recovery == "ok" and breaker.state == "closed",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check circuit-breaker recovery after failed half-open probes")
+    parser.add_argument("--threshold", type=int, default=2, help="Consecutive failures that open the circuit")
+    parser.add_argument("--cooldown", type=float, default=0.05, help="Seconds the circuit stays open")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout")
+    args = parser.parse_args()
+
+    stub = stub_client.install(latency="fixed:0")
+    completions = stub.completions = stub.chat.completions = ScriptedCompletions()
+
+    cases = {kind: run_case(completions, kind, args.threshold, args.cooldown)
+             for kind in ("timeout", "400", "429", "deadline", "consume")}
+    result = {"threshold": args.threshold, "cooldown_s": args.cooldown, "cases": cases,
+              "all_recovered": all(case["recovered"] for case in cases.values())}
+
+    text = json.dumps(result, indent=4)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text)
+    sys.exit(0 if result["all_recovered"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+bench_debate_strategies.py
+
+Compare the 'one-by-one' debate (each juror sees the statements made before it
+in the same round) against 'simultaneous' talk (all jurors of a round answer
+concurrently, seeing only the previous round's statements).
+
+Every turn of a transcript is judged in debate mode under both strategies with
+the same jury. For each strategy we measure wall time (total and per
+turn), requests and tokens, how many jurors returned a parseable verdict and
+how close the jurors ended up (spread of global_human_score, unanimous role
+identity). Across strategies we compare the verdicts themselves: the per-turn
+mean score difference and how often the majority identity matches.
+
+Usage:
+  python benchmarks/bench_debate_strategies.py --input-transcript input/transcripts/binh_04.txt \\
+      --jury-llm-models openai/gpt-5.4,anthropic/claude-haiku-4-5,deepseek/deepseek-v3.2 \\
+      --debate-rounds 2 --output results/bench_debate_strategies.json
+
+Pass --stub to run offline against the in-process stub client (latency and
+call counts are then meaningful, verdict numbers are only a smoke test).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import role_play_framework as rpf
+from role_play_framework_multi_input import parse_transcript
+from bench_audit_modes import CallCounter
+
+
+def run_strategy(qa_pairs, jury, rounds, strategy, counter):
+    counter.reset()
+    verdicts = []
+    conversation_history = ""
+    start = time.perf_counter()
+    for pair in qa_pairs:
+        interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+        conversation_history += f"{interaction}\n\n"
+        verdicts.append(rpf.judge_response(
+            jury_models=jury,
+            interaction=interaction,
+            jury_mode="debate",
+            conversation_history=conversation_history,
+            num_rounds=rounds,
+            debate_strategy=strategy,
+        ))
+    wall = time.perf_counter() - start
+    return verdicts, {
+        "wall_time_s": round(wall, 4),
+        "wall_time_per_turn_s": round(wall / len(qa_pairs), 4) if qa_pairs else None,
+        "calls": counter.calls,
+        "prompt_tokens": counter.prompt_tokens,
+        "completion_tokens": counter.completion_tokens,
+        **consensus(verdicts, len(jury)),
+    }
+
+
+def score(verdict):
+    try:
+        return float(verdict["global_human_score"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def identity(verdict):
+    return str(verdict.get("role_identity", "")).strip(" []").lower() or None
+
+
+def consensus(verdicts, n_jurors):
+    """How many verdicts parsed, and how close the jurors of each turn ended up."""
+    parsed = [[v for v in turn if isinstance(v, dict)] for turn in verdicts]
+    spreads, unanimous = [], []
+    for turn in parsed:
+        scores = [s for s in map(score, turn) if s is not None]
+        if len(scores) > 1:
+            spreads.append(max(scores) - min(scores))
+        identities = [i for i in map(identity, turn) if i is not None]
+        if len(identities) > 1:
+            unanimous.append(len(set(identities)) == 1)
+    return {
+        "verdict_parse_rate": round(sum(map(len, parsed)) / (len(verdicts) * n_jurors), 3) if verdicts else None,
+        "mean_score_spread": round(statistics.mean(spreads), 4) if spreads else None,
+        "identity_unanimity_rate": round(statistics.mean(unanimous), 3) if unanimous else None,
+    }
+
+
+def agreement(verdicts_a, verdicts_b):
+    """Per turn: abs diff of the jury's mean score, and whether the majority identity matches."""
+    diffs, matches = [], []
+    for turn_a, turn_b in zip(verdicts_a, verdicts_b):
+        scores_a = [s for s in map(score, turn_a) if s is not None]
+        scores_b = [s for s in map(score, turn_b) if s is not None]
+        if scores_a and scores_b:
+            diffs.append(abs(statistics.mean(scores_a) - statistics.mean(scores_b)))
+        identities_a = [i for i in map(identity, turn_a) if i is not None]
+        identities_b = [i for i in map(identity, turn_b) if i is not None]
+        if identities_a and identities_b:
+            matches.append(statistics.mode(identities_a) == statistics.mode(identities_b))
+    return {
+        "turns_compared": len(diffs),
+        "mean_abs_score_diff": round(statistics.mean(diffs), 4) if diffs else None,
+        "majority_identity_match_rate": round(statistics.mean(matches), 3) if matches else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark one-by-one vs simultaneous-talk jury debates")
+    parser.add_argument("--input-transcript", default="input/transcripts/binh_04.txt")
+    parser.add_argument("--jury-llm-models", default="openai/gpt-5.4,anthropic/claude-haiku-4-5,deepseek/deepseek-v3.2",
+                        help="Comma separated jury models")
+    parser.add_argument("--debate-rounds", type=int, default=2)
+    parser.add_argument("--max-turns", type=int, default=None, help="Only judge the first N turns")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout")
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub client instead of the API")
+    parser.add_argument("--stub-latency", default="fixed:0.2", help="Per-call latency of the stub (mock_server spec)")
+    args = parser.parse_args()
+
+    if args.stub:
+        import stub_client
+        stub_client.install(latency=args.stub_latency)
+
+    jury = args.jury_llm_models.split(",")
+    qa_pairs = parse_transcript(args.input_transcript)[:args.max_turns]
+
+    counter = CallCounter()
+    rpf.create_completion = counter
+    try:
+        one_by_one, one_by_one_cost = run_strategy(qa_pairs, jury, args.debate_rounds, "one-by-one", counter)
+        simultaneous, simultaneous_cost = run_strategy(qa_pairs, jury, args.debate_rounds, "simultaneous", counter)
+    finally:
+        rpf.create_completion = counter._original
+
+    result = {
+        "transcript": args.input_transcript,
+        "jury": jury,
+        "turns": len(qa_pairs),
+        "debate_rounds": args.debate_rounds,
+        "strategies": {"one-by-one": one_by_one_cost, "simultaneous": simultaneous_cost},
+        "agreement": agreement(one_by_one, simultaneous),
+    }
+    if simultaneous_cost["wall_time_s"]:
+        result["speedup"] = round(one_by_one_cost["wall_time_s"] / simultaneous_cost["wall_time_s"], 2)
+
+    text = json.dumps(result, indent=4)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
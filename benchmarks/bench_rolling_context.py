@@ -0,0 +1,145 @@
+"""
+bench_rolling_context.py
+
+Measure what a token-budgeted rolling context (rolling_context.py) costs in
+score fidelity and saves in tokens, against the full conversation history.
+
+Every turn of a transcript is audited in independent mode (rolling context
+only) twice with the same jury: once with the full history and once with the
+history budgeted to --context-budget tokens, the last --keep-last exchanges
+verbatim and older ones folded into a summary by --summary-model. For each
+run we count the requests and prompt tokens (summary calls included); across
+runs we measure the drift of the parsed rolling scores per dimension, overall
+and per turn, so you can see where drift starts once history gets summarized.
+
+Usage:
+  python benchmarks/bench_rolling_context.py --input-transcript input/transcripts/binh_06.txt \\
+      --jury-llm-models openai/gpt-5.4 --context-budget 400 --output results/bench_rolling_context.json
+
+Pass --stub to run offline against the in-process stub client (call and token
+counts are then exact, drift numbers are only a smoke test).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import role_play_framework as rpf
+import rolling_context
+from role_play_framework_multi_input import parse_transcript
+from bench_audit_modes import CallCounter, parse_dimension
+
+DIMENSIONS = ("global", "identity", "knowledge", "rejection")
+
+
+def run_context(qa_pairs, jury, context, counter):
+    counter.reset()
+    reports = []
+    start = time.perf_counter()
+    for pair in qa_pairs:
+        interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+        context.add(f"{interaction}\n\n")
+        reports.append(rpf.judge_response(
+            jury_models=jury,
+            interaction=interaction,
+            jury_mode="independent",
+            conversation_history=context.render(),
+            num_rounds=0,
+            include_isolated=False,
+        ))
+    return reports, {
+        "wall_time_s": round(time.perf_counter() - start, 4),
+        "calls": counter.calls,
+        "prompt_tokens": counter.prompt_tokens,
+        "completion_tokens": counter.completion_tokens,
+        "context": context.stats(),
+    }
+
+
+def drift(full_reports, budgeted_reports):
+    """Per dimension, overall and per turn: mean abs diff for scores, match rate for labels."""
+    overall = {dimension: [] for dimension in DIMENSIONS}
+    per_turn = []
+    for turn_full, turn_budgeted in zip(full_reports, budgeted_reports):
+        turn = {dimension: [] for dimension in DIMENSIONS}
+        for juror_full, juror_budgeted in zip(turn_full, turn_budgeted):
+            for dimension in DIMENSIONS:
+                a = parse_dimension(dimension, juror_full["rolling_evaluation"].get(dimension))
+                b = parse_dimension(dimension, juror_budgeted["rolling_evaluation"].get(dimension))
+                if a is None or b is None:
+                    continue
+                turn[dimension].append(abs(a - b) if isinstance(a, float) else float(a == b))
+        for dimension, values in turn.items():
+            overall[dimension].extend(values)
+        per_turn.append(turn)
+
+    def summarize(buckets):
+        return {
+            f"{dimension}.{'mean_abs_diff' if dimension in ('global', 'knowledge') else 'match_rate'}":
+                round(sum(values) / len(values), 4) if values else None
+            for dimension, values in buckets.items()
+        }
+
+    return {"overall": summarize(overall), "per_turn": [summarize(turn) for turn in per_turn]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark score drift of a token-budgeted rolling context")
+    parser.add_argument("--input-transcript", default="input/transcripts/binh_06.txt")
+    parser.add_argument("--jury-llm-models", default="openai/gpt-5.4", help="Comma separated jury models")
+    parser.add_argument("--context-budget", type=int, default=400, help="Token budget of the budgeted run")
+    parser.add_argument("--keep-last", type=int, default=rolling_context.DEFAULT_KEEP_LAST)
+    parser.add_argument("--summary-model", default=None, help="Summarizer (default: the first jury model; 'none' drops old turns)")
+    parser.add_argument("--max-turns", type=int, default=None, help="Only audit the first N turns")
+    parser.add_argument("--output", default=None, help="Write the JSON result here as well as stdout")
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub client instead of the API")
+    args = parser.parse_args()
+
+    if args.stub:
+        import stub_client
+        stub_client.install()
+
+    jury = args.jury_llm_models.split(",")
+    qa_pairs = parse_transcript(args.input_transcript)[:args.max_turns]
+    summary_model = args.summary_model or jury[0]
+    summarize = None if summary_model == "none" else partial(rpf.summarize_exchanges, summary_model)
+
+    counter = CallCounter()
+    rpf.create_completion = counter
+    try:
+        full_reports, full_cost = run_context(qa_pairs, jury, rolling_context.RollingContext(), counter)
+        budgeted = rolling_context.RollingContext(budget_tokens=args.context_budget, keep_last=args.keep_last,
+                                                  summarize=summarize)
+        budgeted_reports, budgeted_cost = run_context(qa_pairs, jury, budgeted, counter)
+    finally:
+        rpf.create_completion = counter._original
+
+    result = {
+        "transcript": args.input_transcript,
+        "jury": jury,
+        "turns": len(qa_pairs),
+        "context_budget": args.context_budget,
+        "keep_last": args.keep_last,
+        "summary_model": summary_model,
+        "cost": {"full": full_cost, "budgeted": budgeted_cost},
+        "drift": drift(full_reports, budgeted_reports),
+    }
+    if budgeted_cost["prompt_tokens"]:
+        result["prompt_token_reduction"] = round(full_cost["prompt_tokens"] / budgeted_cost["prompt_tokens"], 2)
+
+    text = json.dumps(result, indent=4)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+check_abcd_analytics.py
+
+Check that abcd_baseline.AnalyticsState, which keeps the run summary and
+analytics current one conversation at a time, gives the same results as
+recomputing them from scratch.
+
+summarise() and build_analytics() below are the original batch functions
+from abcd_baseline.py, kept verbatim as the reference (run_benchmarks.py's
+abcd_analytics scenario also times them against AnalyticsState). Synthetic
+conversation records, some without any scored chunk, are added in shuffled
+order; after every one, AnalyticsState's summary() and analytics() must equal
+the reference over the conversations so far, sorted into output order.
+
+Keys, key order, counts and conversation ids must match exactly. Rounded
+floats may differ by one unit in their 4th decimal: AnalyticsState sums
+exactly (Fractions), while the reference's float sums can land a hair off a
+rounding tie (e.g. 0.48625 summed to 0.48624999...), so a weighted mean that
+is exactly on a tie can round the other way.
+
+Usage:
+  python benchmarks/check_abcd_analytics.py --conversations 200
+
+Exits non-zero (printing a diff) on any mismatch.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import difflib
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import abcd_baseline
+
+
+# -----------------------------------------------------------------------
+# Reference: the original batch summary and analytics, unchanged
+# -----------------------------------------------------------------------
+
+def summarise(conversations):
+    # Collect (score, weight) pairs — filler chunks count half as much
+    weighted = [
+        (s, chunk.get("weight", 1.0))
+        for conv in conversations
+        for chunk in conv.get("chunk_scores", [])
+        for s in chunk.get("human_scores", [])
+        if s is not None
+    ]
+    if not weighted:
+        return {}
+
+    scores, weights = zip(*weighted)
+    total_weight = sum(weights)
+    weighted_mean = sum(s * w for s, w in weighted) / total_weight
+    # For unweighted stats (median, stdev, min, max) use raw scores
+    all_scores = list(scores)
+    return {
+        "n_scores": len(all_scores),
+        "weighted_mean_global_human_score": round(weighted_mean, 4),
+        "median_global_human_score":        round(statistics.median(all_scores), 4),
+        "stdev_global_human_score":         round(statistics.stdev(all_scores), 4) if len(all_scores) > 1 else 0.0,
+        "min": round(min(all_scores), 4),
+        "max": round(max(all_scores), 4),
+        "pct_above_0_7": round(sum(w for s, w in weighted if s >= 0.7) / total_weight, 4),
+    }
+
+
+def build_analytics(output):
+    conversations = output.get("conversations", [])
+    if not conversations:
+        return {}
+
+    # --- Per-chunk score/weight pairs across everything ---
+    all_weighted = [
+        (s, chunk["weight"], chunk["is_filler"], chunk.get("jury_scores", []))
+        for conv in conversations
+        for chunk in conv.get("chunk_scores", [])
+        for s in chunk.get("human_scores", [])
+        if s is not None
+    ]
+    if not all_weighted:
+        return {}
+
+    all_scores  = [x[0] for x in all_weighted]
+    all_weights = [x[1] for x in all_weighted]
+    total_w = sum(all_weights)
+    wmean = sum(s * w for s, w in zip(all_scores, all_weights)) / total_w
+
+    # Score distribution buckets
+    buckets = {"0.0-0.2": 0, "0.2-0.4": 0, "0.4-0.6": 0, "0.6-0.8": 0, "0.8-1.0": 0}
+    for s, w in zip(all_scores, all_weights):
+        if s < 0.2:    buckets["0.0-0.2"] += w
+        elif s < 0.4:  buckets["0.2-0.4"] += w
+        elif s < 0.6:  buckets["0.4-0.6"] += w
+        elif s < 0.8:  buckets["0.6-0.8"] += w
+        else:          buckets["0.8-1.0"] += w
+    score_dist = {k: round(v / total_w, 4) for k, v in buckets.items()}
+
+    # Per-model means
+    model_scores = {}
+    for conv in conversations:
+        for chunk in conv.get("chunk_scores", []):
+            w = chunk.get("weight", 1.0)
+            for js in chunk.get("jury_scores", []):
+                m = js.get("judge_model")
+                s = js.get("global_human_score")
+                if m and s is not None:
+                    model_scores.setdefault(m, []).append((s, w))
+    by_model = {}
+    for m, pairs in model_scores.items():
+        tw = sum(p[1] for p in pairs)
+        by_model[m] = {
+            "weighted_mean": round(sum(s * w for s, w in pairs) / tw, 4),
+            "median": round(statistics.median([s for s, _ in pairs]), 4),
+            "n_scores": len(pairs),
+        }
+
+    # Per-flow means
+    flow_scores = {}
+    for conv in conversations:
+        flow = conv["flow"]
+        for chunk in conv.get("chunk_scores", []):
+            w = chunk.get("weight", 1.0)
+            for s in chunk.get("human_scores", []):
+                if s is not None:
+                    flow_scores.setdefault(flow, []).append((s, w))
+    by_flow = {}
+    for flow, pairs in flow_scores.items():
+        tw = sum(p[1] for p in pairs)
+        by_flow[flow] = {
+            "weighted_mean": round(sum(s * w for s, w in pairs) / tw, 4),
+            "n_convs": sum(1 for c in conversations if c["flow"] == flow),
+        }
+
+    # Substantive vs filler
+    sub_pairs  = [(x[0], x[1]) for x in all_weighted if not x[2]]
+    fill_pairs = [(x[0], x[1]) for x in all_weighted if x[2]]
+    def wpair_stats(pairs):
+        if not pairs: return {}
+        tw = sum(w for _, w in pairs)
+        return {"weighted_mean": round(sum(s*w for s,w in pairs)/tw, 4), "n_scores": len(pairs)}
+    substantive_vs_filler = {
+        "substantive": wpair_stats(sub_pairs),
+        "filler":      wpair_stats(fill_pairs),
+    }
+
+    # Model agreement
+    gaps = []
+    for conv in conversations:
+        for chunk in conv.get("chunk_scores", []):
+            scores_by_model = {}
+            for js in chunk.get("jury_scores", []):
+                m = js.get("judge_model")
+                s = js.get("global_human_score")
+                if m and s is not None:
+                    scores_by_model[m] = s
+            if len(scores_by_model) >= 2:
+                vals = list(scores_by_model.values())
+                gaps.append(max(vals) - min(vals))
+    model_agreement = {}
+    if gaps:
+        model_agreement = {
+            "mean_score_gap":       round(statistics.mean(gaps), 4),
+            "median_score_gap":     round(statistics.median(gaps), 4),
+            "pct_within_0_2":       round(sum(1 for g in gaps if g <= 0.2) / len(gaps), 4),
+            "pct_diverged_gt_0_3":  round(sum(1 for g in gaps if g > 0.3) / len(gaps), 4),
+        }
+
+    # Conversation index — one row per conversation
+    conv_index = []
+    for conv in conversations:
+        chunks = conv.get("chunk_scores", [])
+        chunk_avgs = [c.get("avg_human_score") for c in chunks if c.get("avg_human_score") is not None]
+        # model gap: mean absolute diff between models per chunk
+        chunk_gaps = []
+        for c in chunks:
+            scores_by_model = {}
+            for js in c.get("jury_scores", []):
+                m = js.get("judge_model")
+                s = js.get("global_human_score")
+                if m and s is not None:
+                    scores_by_model[m] = s
+            if len(scores_by_model) >= 2:
+                vals = list(scores_by_model.values())
+                chunk_gaps.append(round(max(vals) - min(vals), 4))
+        conv_index.append({
+            "conversation_id":   conv["conversation_id"],
+            "flow":              conv["flow"],
+            "subflow":           conv["subflow"],
+            "chunks_evaluated":  conv["chunks_evaluated"],
+            "weighted_avg":      conv.get("weighted_avg_global_human_score"),
+            "chunk_avgs":        chunk_avgs,
+            "mean_model_gap":    round(statistics.mean(chunk_gaps), 4) if chunk_gaps else None,
+            "has_filler":        any(c.get("is_filler") for c in chunks),
+        })
+
+    # Sort index by weighted_avg ascending (lowest scoring convos first — most interesting for debugging)
+    conv_index_sorted = sorted(conv_index, key=lambda x: (x["weighted_avg"] is None, x["weighted_avg"] or 0))
+
+    # Notable conversations
+    valid = [c for c in conv_index if c["weighted_avg"] is not None]
+    notable = {
+        "lowest_5":  [c["conversation_id"] for c in valid[:5]],
+        "highest_5": [c["conversation_id"] for c in reversed(valid[-5:])],
+        "most_model_disagreement": [
+            c["conversation_id"]
+            for c in sorted(valid, key=lambda x: x["mean_model_gap"] or 0, reverse=True)[:5]
+        ],
+        "most_variable": [
+            c["conversation_id"]
+            for c in sorted(valid, key=lambda x: (max(x["chunk_avgs"]) - min(x["chunk_avgs"])) if len(x["chunk_avgs"]) > 1 else 0, reverse=True)[:5]
+        ],
+    }
+
+    return {
+        "overall": {
+            "n_conversations": len(conversations),
+            "n_scores": len(all_scores),
+            "weighted_mean": round(wmean, 4),
+            "median": round(statistics.median(all_scores), 4),
+            "stdev": round(statistics.stdev(all_scores), 4) if len(all_scores) > 1 else 0.0,
+            "min": round(min(all_scores), 4),
+            "max": round(max(all_scores), 4),
+            "pct_above_0_7": round(sum(w for s, w in zip(all_scores, all_weights) if s >= 0.7) / total_w, 4),
+        },
+        "score_distribution": score_dist,
+        "by_model": by_model,
+        "by_flow": by_flow,
+        "substantive_vs_filler": substantive_vs_filler,
+        "model_agreement": model_agreement,
+        "notable": notable,
+        "conversation_index": conv_index_sorted,
+    }
+
+
+
+# -----------------------------------------------------------------------
+# Check
+# -----------------------------------------------------------------------
+
+def same(expected, actual):
+    """Equal up to one unit in the 4th decimal of floats; everything else (and key order) exactly."""
+    if isinstance(expected, dict):
+        return (isinstance(actual, dict) and list(expected) == list(actual)
+                and all(same(expected[k], actual[k]) for k in expected))
+    if isinstance(expected, list):
+        return (isinstance(actual, list) and len(expected) == len(actual)
+                and all(same(e, a) for e, a in zip(expected, actual)))
+    if isinstance(expected, float) and isinstance(actual, float):
+        return abs(expected - actual) <= 1e-4 + 1e-12
+    return type(expected) is type(actual) and expected == actual
+
+
+def diff(name, expected, actual):
+    """True if the two are the same; otherwise prints a unified diff of the two as JSON."""
+    if same(expected, actual):
+        return True
+    lines = difflib.unified_diff(json.dumps(expected, indent=1).splitlines(), json.dumps(actual, indent=1).splitlines(),
+                                 "reference", "AnalyticsState", lineterm="")
+    print(f"MISMATCH {name}:\n" + "\n".join(list(lines)[:60]))
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare AnalyticsState with the batch summary/analytics")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--jurors", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Imported here: run_benchmarks imports this module for the reference functions
+    from run_benchmarks import synthetic_abcd_results
+
+    conversations = synthetic_abcd_results(args.conversations, 6, args.jurors, seed=args.seed)
+    for conv in conversations[::7]:
+        conv.update(chunks_evaluated=0, chunk_scores=[], weighted_avg_global_human_score=None)
+    arrival = conversations[:]
+    random.Random(args.seed).shuffle(arrival)
+
+    order_key = lambda conv: conv["conversation_id"]
+    state = abcd_baseline.AnalyticsState(order_key=order_key)
+    done = []
+    for n, conv in enumerate(arrival, 1):
+        state.add(conv)
+        done.append(conv)
+        ordered = sorted(done, key=order_key)
+        if not (diff(f"summary after {n} conversations", summarise(ordered), state.summary())
+                and diff(f"analytics after {n} conversations", build_analytics({"conversations": ordered}),
+                         state.analytics())):
+            sys.exit(1)
+    print(f"AnalyticsState matches the batch summary and analytics after each of {n} conversations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+check_analytics.py
+
+Check that analytics.py and better_analytics.py, which now read reports
+through the columnar score store (score_store.py), print the same report as
+the original per-file loader.
+
+A mixed directory is generated: HUMAN_SCORE audit reports (with refusals and
+failed calls), debate reports whose jurors return consolidated final verdicts,
+reports of the multidim script, turns mixing both, turns without jurors, an
+abcd_baseline output, an empty and an invalid file. The original
+analyze_directory (kept below verbatim as the reference) and both scripts are
+run over it, and over a saved-and-reloaded .npz store; printed reports and
+CSVs must match. better_analytics.py prints a few lines the original doesn't
+(the share of final scores > 0.7 and the LLM usage section); those are left
+out of its comparison. CSV cells are compared as numbers to 1e-9: grouped
+sums add in a different order than np.mean, so the last bits may differ.
+
+Usage:
+  python benchmarks/check_analytics.py --reports 80
+
+Exits non-zero (printing a diff) on any mismatch.
+"""
+
+import os
+import io
+import re
+import sys
+import json
+import glob
+import random
+import argparse
+import difflib
+import tempfile
+import contextlib
+import csv
+from collections import defaultdict
+from statistics import mode, StatisticsError
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analytics
+import better_analytics
+from score_store import ScoreStore
+from run_benchmarks import JURY_MODEL_POOL, write_synthetic_reports, synthetic_abcd_results
+
+
+# -----------------------------------------------------------------------
+# Reference: the original analytics.py loader and report, unchanged
+# -----------------------------------------------------------------------
+
+def extract_human_score(text):
+    """Extracts the float score from the HUMAN_SCORE=$score format."""
+    if not isinstance(text, str):
+        return None
+    match = re.search(r'HUMAN_SCORE=([0-9.]+)', text)
+    if match:
+        return float(match.group(1))
+    return None
+
+def baseline_analyze_directory(directory_path, output_csv="turn_analysis.csv"):
+    file_paths = glob.glob(os.path.join(directory_path, '*.json'))
+
+    # --- Metrics Storage ---
+    total_files_processed = 0
+    empty_or_invalid_files = 0
+    safety_refusals = 0
+
+    conversation_lengths = []
+    final_rolling_scores = []
+
+    # Dictionaries to track scores per turn across all transcripts
+    turn_isolated_scores = defaultdict(list)
+    turn_rolling_scores = defaultdict(list)
+
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            empty_or_invalid_files += 1
+            continue
+
+        interactions = data.get("interaction", [])
+        if not interactions:
+            empty_or_invalid_files += 1
+            continue
+
+        total_files_processed += 1
+        conversation_lengths.append(len(interactions))
+
+        last_valid_rolling_score = None
+
+        for turn_data in interactions:
+            turn_num = turn_data.get("turn")
+            jury_scores = turn_data.get("jury_scores", [])
+
+            # Average the jurors if there are multiple (usually 1, but future-proofs the script)
+            iso_turn_vals = []
+            roll_turn_vals = []
+
+            for juror in jury_scores:
+                iso_eval = juror.get("isolated_evaluation", {})
+                roll_eval = juror.get("rolling_evaluation", {})
+
+                iso_global = iso_eval.get("global", "")
+                roll_global = roll_eval.get("global", "")
+
+                iso_score = extract_human_score(iso_global)
+                roll_score = extract_human_score(roll_global)
+
+                if iso_score is not None:
+                    iso_turn_vals.append(iso_score)
+                else:
+                    safety_refusals += 1
+
+                if roll_score is not None:
+                    roll_turn_vals.append(roll_score)
+                else:
+                    safety_refusals += 1
+
+            # Record the averaged scores for this specific turn
+            if iso_turn_vals:
+                turn_isolated_scores[turn_num].append(np.mean(iso_turn_vals))
+            if roll_turn_vals:
+                turn_mean = np.mean(roll_turn_vals)
+                turn_rolling_scores[turn_num].append(turn_mean)
+                last_valid_rolling_score = turn_mean # Update the latest valid rolling score
+
+        # Store the final rolling score for the conversation
+        if last_valid_rolling_score is not None:
+            final_rolling_scores.append(last_valid_rolling_score)
+
+    # --- Analytics Computation ---
+    print("="*50)
+    print(" 📊 JURY REPORT ANALYTICS ".center(50))
+    print("="*50)
+    print(f"Total transcripts processed: {total_files_processed}")
+    print(f"Empty or invalid files skipped: {empty_or_invalid_files}")
+    print(f"LLM Safety Refusals / Parsing failures: {safety_refusals}")
+
+    if total_files_processed == 0:
+        print("\nNo valid data found to analyze.")
+        return
+
+    # 1. Conversation Length
+    lengths = np.array(conversation_lengths)
+    print("\n--- Conversation Length (Turns) ---")
+    print(f"Average: {np.mean(lengths):.2f}")
+    print(f"Median:  {np.median(lengths):.2f}")
+    print(f"Min/Max: {np.min(lengths)} / {np.max(lengths)}")
+
+    # 2. Final Rolling Evaluation Score Analytics
+    final_scores = np.array(final_rolling_scores)
+    if len(final_scores) > 0:
+        try:
+            mod_val = mode(final_scores)
+        except StatisticsError:
+            mod_val = "Multiple/No unique mode"
+
+        print("\n--- Final Rolling Evaluation Scores ---")
+        print(f"Mean:   {np.mean(final_scores):.4f}")
+        print(f"Median: {np.median(final_scores):.4f}")
+        print(f"Mode:   {mod_val}")
+        print(f"StdDev: {np.std(final_scores):.4f}")
+
+        # 5-Point Summary
+        percentiles = np.percentile(final_scores, [0, 25, 50, 75, 100])
+        print("\n--- 5-Point Summary (Final Rolling Scores) ---")
+        print(f"Minimum: {percentiles[0]:.4f}")
+        print(f"Q1 (25%): {percentiles[1]:.4f}")
+        print(f"Median:  {percentiles[2]:.4f}")
+        print(f"Q3 (75%): {percentiles[3]:.4f}")
+        print(f"Maximum: {percentiles[4]:.4f}")
+
+    # 3. Per-Turn Analysis & CSV Export
+    print("\n--- Per-Turn Evaluation Analysis ---")
+    print(f"{'Turn':<6} | {'Avg Isolated':<14} | {'Avg Rolling':<14} | {'Delta (Roll - Iso)':<18} | {'Sample Size'}")
+    print("-" * 75)
+
+    csv_data = []
+    for turn in sorted(turn_isolated_scores.keys()):
+        iso_avg = np.mean(turn_isolated_scores[turn]) if turn in turn_isolated_scores else 0.0
+        roll_avg = np.mean(turn_rolling_scores[turn]) if turn in turn_rolling_scores else 0.0
+        delta = roll_avg - iso_avg
+        n_samples = len(turn_isolated_scores[turn])
+
+        print(f"{turn:<6} | {iso_avg:<14.4f} | {roll_avg:<14.4f} | {delta:<18.4f} | {n_samples}")
+        csv_data.append({"Turn": turn, "Avg_Isolated": iso_avg, "Avg_Rolling": roll_avg, "Delta": delta, "Sample_Size": n_samples})
+
+    # Write per-turn data to CSV for paper plotting
+    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=["Turn", "Avg_Isolated", "Avg_Rolling", "Delta", "Sample_Size"])
+        writer.writeheader()
+        writer.writerows(csv_data)
+
+    print(f"\n✅ Per-turn data exported to {output_csv} for easy charting.")
+
+
+# -----------------------------------------------------------------------
+# Mixed report directory
+# -----------------------------------------------------------------------
+
+def final_verdict(rng, model):
+    return {"judge_model": model, "global_human_score": round(rng.uniform(0, 1), 2),
+            "role_identity": "[Tech Support Specialist]", "knowledge_score": rng.randint(1, 10),
+            "rejection_status": "No, it answers the question", "debate_rounds_run": 2}
+
+
+def multidim_verdict(rng):
+    return {"human_bot_score": round(rng.uniform(0, 1), 2), "role_identity": "[Tech Support Specialist]",
+            "knowledge_score": rng.randint(1, 10), "rejection_status": "No, it answers the question"}
+
+
+def audit_verdict(rng, failed=False):
+    verdict = {
+        context: {"global": "" if failed else f"HUMAN_SCORE={rng.uniform(0, 1):.2f}",
+                  "identity": "[Tech Support Specialist]", "knowledge": "Score: 7. Explanation: ok",
+                  "rejection": "No, it answers the question"}
+        for context in ("isolated_evaluation", "rolling_evaluation")
+    }
+    if failed:
+        verdict["call_meta"] = {context: {"global": {"attempts": 5, "failed": True, "latency_s": 3.0}}
+                                for context in ("isolated_evaluation", "rolling_evaluation")}
+    return verdict
+
+
+def write_report(directory, name, jury, interaction):
+    with open(os.path.join(directory, name), "w") as f:
+        json.dump({"jury": jury, "interaction": interaction}, f)
+
+
+def write_mixed_reports(directory, n_reports, seed=0):
+    rng = random.Random(seed)
+    write_synthetic_reports(directory, n_reports // 2, 7, 2, seed=seed)
+    jury = JURY_MODEL_POOL[:3]
+    for r in range(n_reports - n_reports // 2):
+        kind = r % 3
+        interaction = []
+        for t in range(rng.randint(1, 9)):
+            if kind == 0:      # debate: consolidated final verdicts
+                jury_scores = [final_verdict(rng, model) for model in jury]
+            elif kind == 1:    # multidim script
+                jury_scores = [multidim_verdict(rng) for _ in jury]
+            else:              # audits and finals in one turn, failed calls, turns without jurors
+                jury_scores = [audit_verdict(rng, failed=rng.random() < 0.2), final_verdict(rng, jury[1])]
+                jury_scores = jury_scores if rng.random() > 0.1 else []
+            interaction.append({"turn": t + 1, "question": "q", "answer": "a", "jury_scores": jury_scores})
+        write_report(directory, f"mixed_{r:05d}.json", jury, interaction)
+    with open(os.path.join(directory, "abcd.json"), "w") as f:
+        json.dump({"conversations": synthetic_abcd_results(5, 4, 2, seed=seed)}, f)
+    write_report(directory, "empty.json", jury, [])
+    with open(os.path.join(directory, "invalid.json"), "w") as f:
+        f.write("{not json")
+
+
+# -----------------------------------------------------------------------
+# Comparison
+# -----------------------------------------------------------------------
+
+def printed(fn, *args, **kwargs):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        fn(*args, **kwargs)
+    return out.getvalue()
+
+
+def better_analytics_common(text):
+    """better_analytics output without the lines the original report never printed."""
+    text = text.split("\n--- LLM Usage & Cost ---")[0].split("\nNo LLM call accounting")[0]
+    text = text.replace("No valid data found to analyze. Please check your directory path.", "No valid data found to analyze.")
+    return "".join(line for line in text.splitlines(keepends=True) if not line.startswith("Scores > 0.7"))
+
+
+def compare(name, expected, actual):
+    if expected == actual:
+        print(f"{name}: identical")
+        return True
+    print(f"{name}: DIFFERS")
+    sys.stdout.writelines(difflib.unified_diff(expected.splitlines(keepends=True), actual.splitlines(keepends=True),
+                                               "original", name))
+    return False
+
+
+def same_csv(expected, actual):
+    rows_a, rows_b = list(csv.reader(io.StringIO(expected))), list(csv.reader(io.StringIO(actual)))
+    if len(rows_a) != len(rows_b) or rows_a[:1] != rows_b[:1]:
+        return False
+    for row_a, row_b in zip(rows_a[1:], rows_b[1:]):
+        if len(row_a) != len(row_b):
+            return False
+        if not all(np.isclose(float(a), float(b), rtol=0, atol=1e-9) for a, b in zip(row_a, row_b)):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the store-based analytics with the original loader")
+    parser.add_argument("--reports", type=int, default=80, help="Reports in the mixed directory (64+ uses the process pool)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        reports = os.path.join(directory, "reports")
+        os.makedirs(reports)
+        write_mixed_reports(reports, args.reports, seed=args.seed)
+
+        def run(fn, name, **kwargs):
+            csv_path = os.path.join(directory, f"{name}.csv")
+            text = printed(fn, reports, csv_path, **kwargs).replace(csv_path, "<csv>")
+            with open(csv_path) as f:
+                return text, f.read()
+
+        expected, expected_csv = run(baseline_analyze_directory, "original")
+        store_path = os.path.join(directory, "scores.npz")
+        ScoreStore.from_directory(reports).save(store_path)
+        runs = {
+            "analytics.py": run(analytics.analyze_directory, "analytics"),
+            "analytics.py (serial)": run(analytics.analyze_directory, "analytics_serial", workers=1),
+            "analytics.py (.npz store)": run(analytics.analyze_directory, "analytics_npz", store=ScoreStore.load(store_path)),
+            "better_analytics.py": run(better_analytics.analyze_directory, "better_analytics"),
+        }
+        for name, (text, csv_text) in runs.items():
+            if name.startswith("better_analytics"):
+                text = better_analytics_common(text)
+            ok &= compare(name, expected, text)
+            ok &= compare(f"{name} CSV", expected_csv, expected_csv if same_csv(expected_csv, csv_text) else csv_text)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+run_benchmarks.py
+
+Offline benchmark suite for the jury pipeline.
+
+Every scenario runs against the in-process stub client (benchmarks/stub_client.py),
+so no API key or network access is needed. For each scenario we record wall
+time, local CPU time, calls issued and prompt/completion tokens, both in total
+and per evaluated turn, while sweeping the number of jurors, debate rounds and
+turns.
+
+Scenarios:
+  judge_independent      judge_response, independent mode
+  judge_debate           judge_response, debate mode
+  debate_simultaneous    judge_response, debate mode with the simultaneous-talk strategy
+  debate_consensus       debate mode ending once jurors agree: early-stop rate, Phase 1 vs debate calls saved,
+                         verdict change vs the full debate
+  debate_streaming       debate mode with generation time per token, streamed (stop at the verdict JSON) or not
+  prompt_cache           share of each turn's rolling-audit prompt tokens served from the (simulated) prompt cache
+  role_play_<mode>       role_play_framework_multi_input.role_play for llm/stdin/transcript
+  role_play_llm_pipelined  llm mode with each turn's jury running in the background (--jury-pipeline)
+  role_play_transcript_parallel  transcript mode with every turn judged at once (--parallel-turns)
+  abcd_replay            abcd_baseline.full_replay_evaluate_conversation on a synthetic conversation
+  abcd_analytics         abcd_baseline summary/analytics after every conversation: batch rescan
+                         (the reference in check_abcd_analytics.py) vs AnalyticsState
+  analyze_directory      analytics.py / better_analytics.py over synthetic reports
+
+Usage:
+  python benchmarks/run_benchmarks.py --output benchmarks/results/current.json
+  python benchmarks/run_benchmarks.py --quick --compare benchmarks/results/baseline.json
+
+--compare exits non-zero when a scenario issues more calls or tokens than the
+baseline, or when its CPU time per turn grows by more than --tolerance.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import logging
+import argparse
+import builtins
+import platform
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_client
+import role_play_framework as rpf
+import role_play_framework_multi_input as rpmi
+import abcd_baseline
+import check_abcd_analytics
+import analytics
+import better_analytics
+import llm_usage
+
+JURY_MODEL_POOL = ["openai/gpt-5.4", "anthropic/claude-haiku-4-5", "deepseek/deepseek-v3.2"]
+TRANSCRIPT = os.path.join(ROOT, "input", "transcripts", "binh_04.txt")
+
+
+# -----------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------
+
+def measure(fn, stub, turns, repeat):
+    """Run fn `repeat` times; report median wall/CPU and the call/token counts of one run."""
+    walls, cpus = [], []
+    counters = None
+    for _ in range(repeat):
+        stub.completions.reset()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        fn()
+        walls.append(time.perf_counter() - wall0)
+        cpus.append(time.process_time() - cpu0)
+        counters = stub.counters()
+
+    result = {
+        "wall_s": round(statistics.median(walls), 4),
+        "cpu_s": round(statistics.median(cpus), 4),
+        **counters,
+        "turns": turns,
+    }
+    if turns:
+        result["per_turn"] = {
+            "wall_s": round(result["wall_s"] / turns, 4),
+            "cpu_s": round(result["cpu_s"] / turns, 5),
+            "calls": round(counters["calls"] / turns, 2),
+            "prompt_tokens": round(counters["prompt_tokens"] / turns, 1),
+        }
+    return result
+
+
+def synthetic_qa_pairs(n):
+    questions = [
+        "My printer says it's offline but it's plugged in. What should I do?",
+        "I tried that already. Can you see my device in your system?",
+        "Are you a real person? You reply really fast.",
+        "What's 17 x 24? I don't have a calculator.",
+    ]
+    answers = [
+        "Hmm, I see. Let's check the network settings first, could you open the printer menu?",
+        "I can't see your device from here, but let's walk through it together, no problem at all.",
+        "Ha, yes I'm real! Just had a quiet afternoon so I'm quick today.",
+        "That would be 408. Now, back to that printer of yours.",
+    ]
+    return [{"question": questions[i % len(questions)], "answer": answers[i % len(answers)]} for i in range(n)]
+
+
+def synthetic_abcd_conversation(n_exchanges, seed=0):
+    rng = random.Random(seed)
+    original = []
+    for i in range(n_exchanges):
+        original.append(["customer", f"Hi, I need help with order {1000 + i}, the shipping status hasn't changed in days."])
+        original.append(["agent", "Sure, let me pull that up for you."])
+        original.append(["action", "Searching the FAQ pages ..."])
+        words = " ".join(rng.choice(["order", "refund", "shipping", "account", "status", "policy"]) for _ in range(12))
+        original.append(["agent", f"I can see the order now and the {words} should update within two days."])
+    return {"convo_id": seed, "scenario": {"flow": "storewide_query", "subflow": "shipping_status"}, "original": original}
+
+
+def write_synthetic_reports(directory, n_reports, turns, jurors, seed=0):
+    rng = random.Random(seed)
+    for r in range(n_reports):
+        interaction = []
+        for t in range(turns):
+            jury_scores = []
+            for _ in range(jurors):
+                jury_scores.append({
+                    context: {
+                        "global": f"HUMAN_SCORE={rng.uniform(0, 1):.2f}" if rng.random() > 0.02 else "I can't help with that.",
+                        "identity": "[Tech Support Specialist]",
+                        "knowledge": f"Score: {rng.randint(1, 10)}. Explanation: ok",
+                        "rejection": "No, it answers the question",
+                    }
+                    for context in ("isolated_evaluation", "rolling_evaluation")
+                })
+            interaction.append({"turn": t + 1, "question": "q", "answer": "a", "jury_scores": jury_scores})
+        with open(os.path.join(directory, f"report_{r:05d}.json"), "w") as f:
+            json.dump({"jury": JURY_MODEL_POOL[:jurors], "interaction": interaction}, f)
+
+
+def synthetic_abcd_results(n_convs, chunks, jurors, seed=0):
+    """Conversation records shaped like abcd_baseline's output, without running the jury."""
+    rng = random.Random(seed)
+    flows = ["storewide_query", "manage_account", "product_defect", "order_issue"]
+    conversations = []
+    for i in range(n_convs):
+        chunk_scores = []
+        for c in range(rng.randint(1, chunks)):
+            jury_scores = [{"judge_model": model, "global_human_score": round(rng.uniform(0, 1), 2)}
+                           for model in JURY_MODEL_POOL[:jurors]]
+            human = [js["global_human_score"] for js in jury_scores]
+            is_filler = rng.random() < 0.2
+            chunk_scores.append({"chunk": c + 1, "is_filler": is_filler, "weight": 0.5 if is_filler else 1.0,
+                                 "jury_scores": jury_scores, "human_scores": human,
+                                 "avg_human_score": round(statistics.mean(human), 4)})
+        pairs = [(s, chunk["weight"]) for chunk in chunk_scores for s in chunk["human_scores"]]
+        conversations.append({
+            "conversation_id": i, "flow": flows[i % len(flows)], "subflow": "x",
+            "chunks_evaluated": len(chunk_scores), "chunk_scores": chunk_scores,
+            "weighted_avg_global_human_score": round(sum(s * w for s, w in pairs) / sum(w for _, w in pairs), 4),
+        })
+    return conversations
+
+
+# -----------------------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------------------
+
+def bench_judge(stub, jury_mode, jurors, rounds, turns, repeat, debate_strategy="one-by-one"):
+    jury = JURY_MODEL_POOL[:jurors]
+    pairs = synthetic_qa_pairs(turns)
+
+    def run():
+        history = ""
+        for pair in pairs:
+            interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+            history += f"{interaction}\n\n"
+            rpf.judge_response(jury, interaction, jury_mode, history, rounds, debate_strategy=debate_strategy)
+
+    return measure(run, stub, turns, repeat)
+
+
+def bench_debate_consensus(stub, threshold, jurors, rounds, turns, repeat):
+    jury = JURY_MODEL_POOL[:jurors]
+    pairs = synthetic_qa_pairs(turns)
+
+    def run(consensus_threshold, verdicts, calls):
+        verdicts.clear()
+        history = ""
+        with llm_usage.collect() as collected:
+            for pair in pairs:
+                interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+                history += f"{interaction}\n\n"
+                verdicts.append(rpf.judge_response(jury, interaction, "debate", history, rounds,
+                                                   consensus_threshold=consensus_threshold))
+        calls[:] = collected
+
+    early, full, early_calls, full_calls = [], [], [], []
+    result = measure(lambda: run(threshold, early, early_calls), stub, turns, repeat)
+    run(None, full, full_calls)
+    # Phase 1 (the isolated/rolling audits) is the same either way; only the debate can end early
+    for name, calls in (("", early_calls), ("full_", full_calls)):
+        debate = [entry for entry in calls if entry["purpose"] == "debate"]
+        result[f"{name}phase1_calls"] = len(calls) - len(debate)
+        result[f"{name}debate_calls"] = len(debate)
+        result[f"{name}debate_prompt_tokens"] = sum(entry["prompt_tokens"] for entry in debate)
+    result["debate_calls_saved"] = round(1 - result["debate_calls"] / result["full_debate_calls"], 3)
+    result["total_calls_saved"] = round(1 - len(early_calls) / len(full_calls), 3)
+    # Compare each turn's mean score and majority identity with the full debate's
+    score_diffs, identity_matches = [], []
+    for turn_early, turn_full in zip(early, full):
+        mean = lambda verdicts: statistics.mean(float(v["global_human_score"]) for v in verdicts)
+        majority = lambda verdicts: statistics.mode(v["role_identity"] for v in verdicts)
+        score_diffs.append(abs(mean(turn_early) - mean(turn_full)))
+        identity_matches.append(majority(turn_early) == majority(turn_full))
+    rounds_run = [turn[0]["debate_rounds_run"] for turn in early]
+    result["mean_rounds_run"] = round(statistics.mean(rounds_run), 2)
+    result["turns_stopped_early"] = sum(r < rounds for r in rounds_run)
+    result["early_stop_rate"] = round(result["turns_stopped_early"] / len(rounds_run), 3)
+    result["mean_abs_score_diff_vs_full"] = round(statistics.mean(score_diffs), 4)
+    result["identity_match_rate_vs_full"] = round(statistics.mean(identity_matches), 3)
+    return result
+
+
+def bench_debate_streaming(stub, streaming, jurors, rounds, turns, repeat, token_latency=0.002):
+    """Debate turns cost generation time per token here, so cutting them at the verdict shows up in wall time."""
+    jury = JURY_MODEL_POOL[:jurors]
+    pairs = synthetic_qa_pairs(turns)
+    verdicts = []
+
+    def run():
+        verdicts.clear()
+        history = ""
+        for pair in pairs:
+            interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']}"
+            history += f"{interaction}\n\n"
+            verdicts.extend(rpf.judge_response(jury, interaction, "debate", history, rounds, stream_debate=streaming))
+
+    stub.completions.token_latency = token_latency
+    try:
+        result = measure(run, stub, turns, repeat)
+    finally:
+        stub.completions.token_latency = 0.0
+    result["verdicts_parsed"] = len(verdicts)
+    return result
+
+
+def bench_prompt_cache(stub, jurors, turns, repeat):
+    """Independent audits over a long conversation; per turn, cached/prompt tokens of the rolling audits."""
+    jury = JURY_MODEL_POOL[:jurors]
+    pairs = synthetic_qa_pairs(turns)
+    filler = " ".join(["Let me walk you through the next troubleshooting step in detail."] * 8)
+    by_turn = []
+
+    def run():
+        by_turn.clear()
+        history = ""
+        for pair in pairs:
+            interaction = f"Question: {pair['question']}\nAnswer: {pair['answer']} {filler}"
+            history += f"{interaction}\n\n"
+            reports = rpf.judge_response(jury, interaction, "independent", history, 0)
+            records = [record for report in reports for record in report["call_meta"]["rolling_evaluation"].values()]
+            by_turn.append((sum(r.get("cached_tokens", 0) for r in records),
+                            sum(r.get("prompt_tokens", 0) for r in records),
+                            max(r.get("latency_s", 0) for r in records)))
+
+    result = measure(run, stub, turns, repeat)
+    result["rolling_cached_share_by_turn"] = [round(cached / prompt, 3) if prompt else 0.0 for cached, prompt, _ in by_turn]
+    result["rolling_uncached_tokens_by_turn"] = [prompt - cached for cached, prompt, _ in by_turn]
+    return result
+
+
+def bench_role_play(stub, mode, jurors, rounds, turns, repeat, jury_pipeline=0, parallel_turns=False):
+    jury = JURY_MODEL_POOL[:jurors]
+    qa_pairs = synthetic_qa_pairs(turns) if mode == "transcript" else None
+    if mode == "transcript" and os.path.exists(TRANSCRIPT):
+        with contextlib.redirect_stdout(io.StringIO()):
+            parsed = rpmi.parse_transcript(TRANSCRIPT)
+        qa_pairs = (parsed * (turns // max(1, len(parsed)) + 1))[:turns] if parsed else qa_pairs
+
+    def run():
+        output_obj = {"interaction": []}
+        scripted = iter([text for pair in synthetic_qa_pairs(turns) for text in (pair["question"], pair["answer"])])
+        original_input = builtins.input
+        builtins.input = lambda prompt="": next(scripted)
+        try:
+            rpmi.role_play(
+                output_obj=output_obj, mode=mode,
+                role_play_llm_model="deepseek/deepseek-v3.2", interrogator_llm_model="openai/gpt-5.4",
+                jury=jury, max_turns=turns, jury_mode="debate" if rounds else "independent",
+                debate_rounds=rounds, qa_pairs=qa_pairs, jury_pipeline=jury_pipeline,
+                parallel_turns=parallel_turns,
+            )
+        finally:
+            builtins.input = original_input
+
+    return measure(run, stub, turns, repeat)
+
+
+def bench_abcd_replay(stub, jurors, exchanges, repeat):
+    jury = JURY_MODEL_POOL[:jurors]
+    conv = synthetic_abcd_conversation(exchanges)
+    n_chunks = len(abcd_baseline.extract_substantive_chunks(conv, min_words=15))
+    return measure(lambda: abcd_baseline.full_replay_evaluate_conversation(conv, jury, 15), stub, n_chunks, repeat)
+
+
+def bench_abcd_analytics(strategy, n_convs, jurors, repeat):
+    """Cost of keeping summary + analytics current as a run of n_convs conversations progresses."""
+    conversations = synthetic_abcd_results(n_convs, 6, jurors)
+
+    def batch():
+        done = []
+        for conv in conversations:
+            done.append(conv)
+            check_abcd_analytics.summarise(done)
+            check_abcd_analytics.build_analytics({"conversations": done})
+
+    def incremental():
+        state = abcd_baseline.AnalyticsState()
+        for conv in conversations:
+            state.add(conv)
+            state.summary()
+            state.analytics()
+
+    fn = batch if strategy == "batch" else incremental
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        fn()
+        walls.append(time.perf_counter() - wall0)
+        cpus.append(time.process_time() - cpu0)
+    return {
+        "wall_s": round(statistics.median(walls), 4),
+        "cpu_s": round(statistics.median(cpus), 4),
+        "conversations": n_convs,
+    }
+
+
+def bench_analyze_directory(module, n_reports, turns, jurors, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_reports(directory, n_reports, turns, jurors)
+        csv_path = os.path.join(directory, "turns.csv")
+        walls, cpus = [], []
+        for _ in range(repeat):
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                module.analyze_directory(directory, csv_path)
+            walls.append(time.perf_counter() - wall0)
+            cpus.append(time.process_time() - cpu0)
+    return {
+        "wall_s": round(statistics.median(walls), 4),
+        "cpu_s": round(statistics.median(cpus), 4),
+        "reports": n_reports,
+        "reports_per_s": round(n_reports / statistics.median(walls), 1),
+    }
+
+
+def run_suite(quick, latency, repeat):
+    stub = stub_client.install(latency=latency)
+    juror_sweep = [1, 2] if quick else [1, 2, 3]
+    round_sweep = [1, 2] if quick else [1, 2, 3]
+    turn_sweep = [2] if quick else [3, 7]
+    results = []
+
+    def record(name, params, metrics):
+        results.append({"name": name, "params": params, **metrics})
+        print(f"{name:<22} {json.dumps(params):<50} wall={metrics['wall_s']:.3f}s cpu={metrics['cpu_s']:.3f}s "
+              f"calls={metrics.get('calls', '-')}", flush=True)
+
+    for jurors in juror_sweep:
+        for turns in turn_sweep:
+            record("judge_independent", {"jurors": jurors, "turns": turns},
+                   bench_judge(stub, "independent", jurors, 0, turns, repeat))
+            for rounds in round_sweep:
+                record("judge_debate", {"jurors": jurors, "rounds": rounds, "turns": turns},
+                       bench_judge(stub, "debate", jurors, rounds, turns, repeat))
+                record("debate_simultaneous", {"jurors": jurors, "rounds": rounds, "turns": turns},
+                       bench_judge(stub, "debate", jurors, rounds, turns, repeat, debate_strategy="simultaneous"))
+
+    for threshold in (None, 0.1):
+        record("debate_consensus", {"threshold": threshold, "jurors": 3, "rounds": 3, "turns": 8},
+               bench_debate_consensus(stub, threshold, 3, 3, 8, repeat))
+
+    for streaming in (False, True):
+        for rounds in round_sweep:
+            record("debate_streaming", {"streaming": streaming, "jurors": 2, "rounds": rounds, "turns": turn_sweep[0]},
+                   bench_debate_streaming(stub, streaming, 2, rounds, turn_sweep[0], repeat))
+
+    for turns in ([7] if quick else [7, 12]):
+        record("prompt_cache", {"jurors": 2, "turns": turns}, bench_prompt_cache(stub, 2, turns, repeat))
+
+    for mode in ("llm", "stdin", "transcript"):
+        for jurors in juror_sweep:
+            for turns in turn_sweep:
+                record(f"role_play_{mode}", {"jurors": jurors, "rounds": 2, "turns": turns},
+                       bench_role_play(stub, mode, jurors, 2, turns, repeat))
+
+    for jurors in juror_sweep:
+        record("role_play_llm_pipelined", {"jurors": jurors, "rounds": 2, "turns": 7, "depth": 2},
+               bench_role_play(stub, "llm", jurors, 2, 7, repeat, jury_pipeline=2))
+
+    for jurors in juror_sweep:
+        for turns in turn_sweep:
+            record("role_play_transcript_parallel", {"jurors": jurors, "rounds": 2, "turns": turns},
+                   bench_role_play(stub, "transcript", jurors, 2, turns, repeat, parallel_turns=True))
+
+    for jurors in juror_sweep:
+        for exchanges in ([3] if quick else [3, 8]):
+            record("abcd_replay", {"jurors": jurors, "exchanges": exchanges},
+                   bench_abcd_replay(stub, jurors, exchanges, repeat))
+
+    for strategy in ("batch", "incremental"):
+        for n_convs in ([100] if quick else [200, 500]):
+            record("abcd_analytics", {"strategy": strategy, "conversations": n_convs, "jurors": 2},
+                   bench_abcd_analytics(strategy, n_convs, 2, repeat))
+
+    for module in (analytics, better_analytics):
+        for n_reports in ([50] if quick else [200, 1000]):
+            record("analyze_directory", {"module": module.__name__, "reports": n_reports, "turns": 7, "jurors": 2},
+                   bench_analyze_directory(module, n_reports, 7, 2, repeat))
+    return results
+
+
+# -----------------------------------------------------------------------
+# Regression comparison
+# -----------------------------------------------------------------------
+
+def scenario_key(result):
+    return f"{result['name']}|{json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare(current, baseline, tolerance):
+    """Return a list of human-readable regressions of current vs baseline results."""
+    previous = {scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(scenario_key(result))
+        if old is None:
+            continue
+        # Calls and tokens are deterministic against the stub: any increase is a regression
+        for metric in ("calls", "prompt_tokens", "completion_tokens"):
+            if metric in result and metric in old and result[metric] > old[metric]:
+                regressions.append(f"{scenario_key(result)}: {metric} {old[metric]} -> {result[metric]}")
+        # Timing is noisy: only flag growth beyond the tolerance
+        for metric in ("cpu_s", "wall_s"):
+            if old.get(metric) and result[metric] > old[metric] * (1 + tolerance) and result[metric] - old[metric] > 0.01:
+                regressions.append(f"{scenario_key(result)}: {metric} {old[metric]} -> {result[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the jury pipeline")
+    parser.add_argument("--output", default=None, help="Write machine-readable results (JSON) here")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth of timing metrics")
+    parser.add_argument("--latency", default="fixed:0.05", help="Simulated per-call latency (mock_server spec)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (median timing is reported)")
+    parser.add_argument("--quick", action="store_true", help="Smaller sweep for a fast smoke run")
+    args = parser.parse_args()
+
+    # The pipeline logs every turn; keep benchmark output readable
+    rpf.log.setLevel(logging.WARNING)
+
+    current = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": args.latency,
+        "repeat": args.repeat,
+        "quick": args.quick,
+        "results": run_suite(args.quick, args.latency, args.repeat),
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+stub_client.py
+
+In-process stand-in for the OpenAI client used by the benchmarks.
+
+Replies come from mock_server.generate_reply, so they are the same well-formed
+jury/debate/interrogator/support answers the mock HTTP server returns, without
+the HTTP stack. Each call sleeps for a simulated network latency (plus
+token_latency per completion token) and is counted together with its
+(estimated) prompt, cached and completion tokens. Streamed requests return an
+iterator of chunks; a stream closed early is billed only for the tokens it
+produced.
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+import mock_server
+
+
+class StubStream:
+    """Iterator over the chunks of one streamed reply; close() cancels the rest."""
+
+    def __init__(self, completions, model, chunks):
+        self.completions = completions
+        self.model = model
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if self.closed:
+                return
+            if chunk["choices"] and chunk["choices"][0]["delta"].get("content"):
+                time.sleep(self.completions.token_latency)
+                self.completions.count(self.model, completion_tokens=1)
+            yield ChatCompletionChunk.model_validate(chunk)
+
+    def close(self):
+        self.closed = True
+
+
+class StubCompletions:
+    def __init__(self, latency="fixed:0.05", seed=0, token_latency=0.0):
+        self.sample_latency = mock_server.parse_latency(latency)
+        self.token_latency = token_latency
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.cached_tokens = 0
+            self.calls_by_model = {}
+            self.prefix_cache = mock_server.PrefixCache()
+
+    def count(self, model, calls=0, prompt_tokens=0, cached_tokens=0, completion_tokens=0):
+        with self.lock:
+            self.calls += calls
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += completion_tokens
+            if calls:
+                self.calls_by_model[model] = self.calls_by_model.get(model, 0) + calls
+
+    def create(self, model, messages, response_format=None, stream=False, stream_options=None, **params):
+        with self.lock:
+            latency = self.sample_latency(self.rng)
+        time.sleep(latency)
+
+        text = mock_server.generate_reply(model, messages, response_format, seed=self.seed)
+        cached_tokens = self.prefix_cache.lookup(model, messages)
+        usage = mock_server.usage_body(messages, text, cached_tokens)
+        self.count(model, calls=1, prompt_tokens=usage["prompt_tokens"],
+                   cached_tokens=usage["prompt_tokens_details"]["cached_tokens"])
+        if stream:
+            include_usage = bool((stream_options or {}).get("include_usage"))
+            return StubStream(self, model, mock_server.completion_chunks(model, messages, text, cached_tokens, include_usage))
+        time.sleep(self.token_latency * usage["completion_tokens"])
+        self.count(model, completion_tokens=usage["completion_tokens"])
+        return ChatCompletion.model_validate(mock_server.completion_body(model, messages, text, cached_tokens))
+
+
+class StubClient:
+    base_url = "stub://benchmarks/v1"
+
+    def __init__(self, latency="fixed:0.05", seed=0, token_latency=0.0):
+        self.completions = StubCompletions(latency=latency, seed=seed, token_latency=token_latency)
+        self.chat = types.SimpleNamespace(completions=self.completions)
+
+    def counters(self):
+        c = self.completions
+        return {"calls": c.calls, "prompt_tokens": c.prompt_tokens, "cached_tokens": c.cached_tokens,
+                "completion_tokens": c.completion_tokens}
+
+
+def install(latency="fixed:0.05", seed=0, token_latency=0.0):
+    """Make role_play_framework (and everything built on it) use a fresh stub client."""
+    import role_play_framework as rpf
+    stub = StubClient(latency=latency, seed=seed, token_latency=token_latency)
+    rpf.client = stub
+    return stub
@@ -1,91 +1,23 @@
-import os
-import json
-import glob
-import re
 import csv
 import argparse
 import numpy as np
-from collections import defaultdict
+from score_store import ScoreStore, ISOLATED, ROLLING, role_play_turn_stats, usage_stats
 from statistics import mode, StatisticsError
 
-def extract_human_score(text):
-    """Extracts the float score from the HUMAN_SCORE=$score format."""
-    if not isinstance(text, str):
-        return None
-    match = re.search(r'HUMAN_SCORE=([0-9.]+)', text)
-    if match:
-        return float(match.group(1))
-    return None
+def analyze_directory(directory_path, output_csv="turn_analysis.csv", workers=None, store=None):
+    # Every verdict is flattened into a columnar store (parsed in a process
+    # pool); the metrics below are vectorized group-bys over its columns
+    if store is None:
+        store = ScoreStore.from_directory(directory_path, workers=workers)
+    stats = role_play_turn_stats(store)
 
-def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
-    file_paths = glob.glob(os.path.join(directory_path, '*.json'))
-    
-    # --- Metrics Storage ---
-    total_files_processed = 0
-    empty_or_invalid_files = 0
-    safety_refusals = 0
-    
-    conversation_lengths = []
-    final_rolling_scores = []
-    
-    # Dictionaries to track scores per turn across all transcripts
-    turn_isolated_scores = defaultdict(list)
-    turn_rolling_scores = defaultdict(list)
-    
-    for file_path in file_paths:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            empty_or_invalid_files += 1
-            continue
-
-        interactions = data.get("interaction", [])
-        if not interactions:
-            empty_or_invalid_files += 1
-            continue
-            
-        total_files_processed += 1
-        conversation_lengths.append(len(interactions))
-        
-        last_valid_rolling_score = None
-        
-        for turn_data in interactions:
-            turn_num = turn_data.get("turn")
-            jury_scores = turn_data.get("jury_scores", [])
-            
-            iso_turn_vals = []
-            roll_turn_vals = []
-            
-            for juror in jury_scores:
-                iso_eval = juror.get("isolated_evaluation", {})
-                roll_eval = juror.get("rolling_evaluation", {})
-                
-                iso_global = iso_eval.get("global", "")
-                roll_global = roll_eval.get("global", "")
-                
-                iso_score = extract_human_score(iso_global)
-                roll_score = extract_human_score(roll_global)
-                
-                if iso_score is not None:
-                    iso_turn_vals.append(iso_score)
-                else:
-                    safety_refusals += 1
-                    
-                if roll_score is not None:
-                    roll_turn_vals.append(roll_score)
-                else:
-                    safety_refusals += 1
-            
-            if iso_turn_vals:
-                turn_isolated_scores[turn_num].append(np.mean(iso_turn_vals))
-            if roll_turn_vals:
-                turn_mean = np.mean(roll_turn_vals)
-                turn_rolling_scores[turn_num].append(turn_mean)
-                last_valid_rolling_score = turn_mean 
-                
-        if last_valid_rolling_score is not None:
-            final_rolling_scores.append(last_valid_rolling_score)
+    total_files_processed = stats["files_processed"]
+    empty_or_invalid_files = stats["files_skipped"]
+    safety_refusals = stats["refusals"]
+    conversation_lengths = stats["lengths"]
+    final_rolling_scores = stats["final_scores"]
+    turn_isolated_scores = stats["per_turn"][ISOLATED]  # turn -> (mean, sample size)
+    turn_rolling_scores = stats["per_turn"][ROLLING]
 
     # --- Analytics Computation ---
     print("="*50)
@@ -97,6 +29,7 @@ def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
     
     if total_files_processed == 0:
         print("\nNo valid data found to analyze. Please check your directory path.")
+        usage_report(store)
         return
 
     # 1. Conversation Length
@@ -141,10 +74,9 @@ def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
     
     csv_data = []
     for turn in sorted(turn_isolated_scores.keys()):
-        iso_avg = np.mean(turn_isolated_scores[turn]) if turn in turn_isolated_scores else 0.0
-        roll_avg = np.mean(turn_rolling_scores[turn]) if turn in turn_rolling_scores else 0.0
+        iso_avg, n_samples = turn_isolated_scores[turn]
+        roll_avg = turn_rolling_scores[turn][0] if turn in turn_rolling_scores else 0.0
         delta = roll_avg - iso_avg
-        n_samples = len(turn_isolated_scores[turn])
         
         print(f"{turn:<6} | {iso_avg:<14.4f} | {roll_avg:<14.4f} | {delta:<18.4f} | {n_samples}")
         csv_data.append({"Turn": turn, "Avg_Isolated": iso_avg, "Avg_Rolling": roll_avg, "Delta": delta, "Sample_Size": n_samples})
@@ -156,13 +88,50 @@ def analyze_directory(directory_path, output_csv="turn_analysis.csv"):
         
     print(f"\n✅ Per-turn data exported to {output_csv} for easy charting.")
 
+    usage_report(store)
+
+def usage_report(store):
+    """Where the tokens, time and money go, from the llm_calls recorded in each turn."""
+    usage = usage_stats(store)
+    if usage["calls"] == 0:
+        print("\nNo LLM call accounting in these reports (produced before per-call usage was recorded).")
+        return
+
+    cached_pct = usage["cached_tokens"] / usage["prompt_tokens"] * 100 if usage["prompt_tokens"] else 0.0
+    print("\n--- LLM Usage & Cost ---")
+    print(f"Calls: {usage['calls']} across {usage['runs']} runs "
+          f"({usage['llm_cache_hits']} LLM-cache hits, {usage['failed']} failed)")
+    print(f"Prompt tokens: {usage['prompt_tokens']:.0f} ({cached_pct:.1f}% cached) | Completion tokens: {usage['completion_tokens']:.0f}")
+    print(f"Cost: ${usage['cost']:.4f} total, ${usage['cost'] / usage['runs']:.4f} per run")
+    if usage["unpriced"]:
+        print(f"  ({usage['unpriced']} calls to models without a price are counted as $0; see --model-price)")
+
+    for title, key in (("Purpose", "by_purpose"), ("Purpose/Dimension", "by_dimension"), ("Model", "by_model"), ("Turn", "by_turn")):
+        print(f"\n{title:<28} | {'Calls':>7} | {'Prompt tok':>11} | {'Cached':>6} | {'Compl tok':>10} | {'Avg lat s':>9} | {'Cost $':>9} | {'Share':>6}")
+        print("-" * 108)
+        for name, row in usage[key].items():
+            cached = row["cached_tokens"] / row["prompt_tokens"] * 100 if row["prompt_tokens"] else 0.0
+            share = row["cost"] / usage["cost"] * 100 if usage["cost"] else 0.0
+            print(f"{str(name):<28} | {row['calls']:>7} | {row['prompt_tokens']:>11.0f} | {cached:>5.1f}% | "
+                  f"{row['completion_tokens']:>10.0f} | {row['latency'] / row['calls']:>9.2f} | {row['cost']:>9.4f} | {share:>5.1f}%")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze JSON Jury Reports")
     # Default is set to "./output" to match your directory structure
     parser.add_argument("--input-dir", default="./output", help="Directory containing the JSON reports")
     parser.add_argument("--output-csv", default="turn_analysis.csv", help="Path to save the output CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to parse reports (default: all CPUs)")
+    parser.add_argument("--scores", default=None, help="Analyze this score store (.npz from score_store.py) instead of parsing --input-dir")
+    parser.add_argument("--save-scores", default=None, help="Also save the parsed reports as a score store (.npz) here")
     
     args = parser.parse_args()
     
-    print(f"Scanning directory: {args.input_dir}")
-    analyze_directory(args.input_dir, args.output_csv)
\ No newline at end of file
+    if args.scores:
+        print(f"Loading score store: {args.scores}")
+        store = ScoreStore.load(args.scores)
+    else:
+        print(f"Scanning directory: {args.input_dir}")
+        store = ScoreStore.from_directory(args.input_dir, workers=args.workers)
+        if args.save_scores:
+            store.save(args.save_scores)
+    analyze_directory(args.input_dir, args.output_csv, store=store)
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+jury_engine.py
+
+Concurrency primitives shared by the jury pipeline.
+
+Every LLM request made by the framework runs inside `call_slot()`, a process-wide
+semaphore that caps how many requests are in flight at once. `fan_out()` runs a
+batch of independent callables on worker threads and returns their results in
+submission order, so callers can dispatch e.g. all Phase 1 audits of a turn at
+once and rebuild their report structure afterwards. `completed()` is the
+streaming variant for long-running tasks (whole conversations) whose results
+should be recorded as soon as each one finishes. `Pipeline` runs work the
+caller doesn't wait for (a turn's jury while the conversation moves on) in the
+background, with a bound on how much may be outstanding.
+
+Because the cap is applied per request (not per task), fan-outs can be nested —
+a task that itself fans out never holds a slot while waiting on its children.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+_max_concurrency = DEFAULT_MAX_CONCURRENCY
+_slots = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENCY)
+
+
+def set_max_concurrency(n):
+    """Set the global cap on concurrent LLM requests (1 = fully serial)."""
+    global _max_concurrency, _slots
+    if n < 1:
+        raise ValueError(f"max concurrency must be >= 1, got {n}")
+    _max_concurrency = n
+    _slots = threading.BoundedSemaphore(n)
+
+
+def get_max_concurrency():
+    return _max_concurrency
+
+
+class call_slot:
+    """Context manager holding one of the global request slots."""
+
+    def __enter__(self):
+        self._sem = _slots
+        self._sem.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._sem.release()
+        return False
+
+
+def fan_out(calls):
+    """
+    Run zero-argument callables concurrently and return their results in order.
+
+    The first exception raised by any call is re-raised once all calls have
+    finished, matching what a serial loop over the same calls would surface.
+    No more threads are started than the concurrency cap lets requests run.
+    """
+    calls = list(calls)
+    if len(calls) <= 1 or _max_concurrency == 1:
+        return [call() for call in calls]
+
+    with ThreadPoolExecutor(max_workers=min(len(calls), _max_concurrency)) as pool:
+        # Each task runs in a copy of the caller's context so context-local
+        # state (e.g. per-turn bookkeeping) follows the work onto the thread.
+        futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+        return [f.result() for f in futures]
+
+
+def completed(calls, workers):
+    """
+    Run zero-argument callables on up to `workers` threads, yielding
+    (index, result) pairs in completion order.
+
+    Results are yielded on the caller's thread, so recording them needs no
+    extra locking. If a call raises, calls that haven't started are cancelled
+    and the exception propagates from the generator.
+    """
+    calls = list(calls)
+    if workers <= 1 or len(calls) <= 1:
+        for index, call in enumerate(calls):
+            yield index, call()
+        return
+
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(calls)))
+    futures = {}
+    try:
+        for index, call in enumerate(calls):
+            futures[pool.submit(contextvars.copy_context().run, call)] = index
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # Drop calls that haven't started (shutdown(cancel_futures=...) needs Python 3.9)
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+class Pipeline:
+    """
+    Background executor with back-pressure: submit() returns as soon as the
+    call is queued, blocking only while `depth` submitted calls are still
+    unfinished; drain() waits for all of them and returns their results in
+    submission order. depth=0 runs every call inline in submit(), i.e. the
+    plain serial loop.
+
+        with Pipeline(depth=2) as pipeline:
+            for turn in turns:
+                pipeline.submit(partial(judge, turn))
+            scores = pipeline.drain()
+    """
+
+    def __init__(self, depth):
+        if depth < 0:
+            raise ValueError(f"pipeline depth must be >= 0, got {depth}")
+        self.depth = depth
+        self.results = []
+        self.futures = []
+        self.pool = ThreadPoolExecutor(max_workers=depth) if depth else None
+        self.free = threading.Semaphore(depth)
+
+    def submit(self, call):
+        if self.pool is None:
+            self.results.append(call())
+            return
+        self.free.acquire()
+        # Like fan_out, the call runs in a copy of the submitter's context
+        future = self.pool.submit(contextvars.copy_context().run, call)
+        future.add_done_callback(lambda _: self.free.release())
+        self.futures.append(future)
+
+    def drain(self):
+        """Wait for everything submitted so far; results in submission order (the first failure is re-raised)."""
+        self.results.extend(f.result() for f in self.futures)
+        self.futures = []
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.pool is not None:
+            if exc_type is not None:
+                for future in self.futures:
+                    future.cancel()
+            self.pool.shutdown(wait=True)
+        return False
@@ -0,0 +1,193 @@
+"""
+llm_cache.py
+
+Persistent, content-addressed cache for chat-completions responses.
+
+Each response is stored in SQLite under the SHA-256 of the endpoint, model,
+messages and sampling parameters, so re-running an evaluation over the same
+inputs (e.g. re-scoring an ABCD baseline after an analytics tweak) is served
+from disk instead of the API. Entries are evicted by age and, once the cache
+outgrows its size budget, least-recently-used first.
+
+The cache is off unless asked for (--cache or LLM_CACHE=1): a hit replays
+the stored reply instead of sampling a new one, so with it on, repeated
+--mode llm or debate runs reproduce the same conversations and verdicts and
+run-to-run variance disappears. Every hit is logged.
+
+Streamed debate turns are cached too: the stream (consumed to the end, or
+cut off after its verdict JSON) is assembled into an ordinary completion
+first, and that assembled completion is what gets stored and replayed. Only
+a raw stream handed back to the caller unread bypasses the cache.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/advpersona/llm_cache.sqlite3")
+DEFAULT_MAX_MB = 1024
+DEFAULT_MAX_AGE_DAYS = 90
+
+# Run eviction once every this many writes (and once when the cache is opened)
+EVICT_EVERY = 200
+
+log = logging.getLogger("my_app")
+
+
+def cache_key(endpoint, model, messages, params):
+    payload = json.dumps(
+        {"endpoint": endpoint, "model": model, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_mb=DEFAULT_MAX_MB, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.max_age_s = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key):
+        """Return the cached response JSON for key, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age_s and now - row[1] > self.max_age_s):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response_json):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response_json, len(response_json.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+            self.writes += 1
+            due = self.writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used ones until under the size budget."""
+        with self._lock:
+            removed = 0
+            if self.max_age_s:
+                removed += self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_s,)
+                ).rowcount
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+                    doomed = []
+                    for key, size in rows:
+                        if excess <= 0:
+                            break
+                        doomed.append((key,))
+                        excess -= size
+                    self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                    removed += len(doomed)
+            self._conn.commit()
+            self.evicted += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "evicted": self.evicted,
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 2),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -----------------------------------------------------------------------
+# Process-wide cache used by role_play_framework.create_completion
+# -----------------------------------------------------------------------
+
+_cache = None
+
+
+def configure(enabled=False, path=DEFAULT_CACHE_PATH, max_mb=DEFAULT_MAX_MB, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """Open (or, with enabled=False, bypass) the process-wide cache."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = LLMCache(path, max_mb=max_mb, max_age_days=max_age_days) if enabled else None
+    return _cache
+
+
+def get_cache():
+    return _cache
+
+
+def add_cli_args(parser):
+    parser.add_argument("--cache", action="store_true",
+                        help="Serve repeated requests from the on-disk LLM response cache (env: LLM_CACHE=1); "
+                             "cached replies are replayed, not re-sampled")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the API, even if LLM_CACHE is set")
+    parser.add_argument("--cache-path", default=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                        help="SQLite file for the LLM response cache (env: LLM_CACHE_PATH)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help="Evict least-recently-used cache entries above this size")
+    parser.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help="Evict cache entries older than this")
+
+
+def configure_from_args(args):
+    enabled = (args.cache or os.getenv("LLM_CACHE", "").lower() in ("1", "true", "yes")) and not args.no_cache
+    cache = configure(enabled=enabled, path=args.cache_path,
+                      max_mb=args.cache_max_mb, max_age_days=args.cache_max_age_days)
+    if cache is not None:
+        log.warning(f"LLM response cache enabled ({cache.path}): repeated requests are served from disk, not re-sampled")
+    return cache
@@ -0,0 +1,202 @@
+"""
+llm_usage.py
+
+Per-call token, latency and cost accounting for every LLM request.
+
+role_play_framework.send_request reports each finished call (successful or
+not) and create_completion each LLM-cache hit through `record_call`, which
+appends one entry to every collector open in the current context:
+
+    {"model": ..., "purpose": "audit", "juror": 0, "context": "rolling", "dimension": "global",
+     "prompt_tokens": ..., "cached_tokens": ..., "completion_tokens": ...,
+     "latency_s": ..., "cost_usd": ...}
+
+Labels (purpose, juror, context, dimension, round) come from `labels(...)`
+blocks around the calls. Collectors and labels live in context variables, and
+jury_engine runs every task in a copy of its caller's context, so calls made
+on worker threads land in the collectors of the turn that dispatched them.
+
+Cost is the provider-reported cost when the response carries one (OpenRouter's
+usage.cost), otherwise an estimate from PRICES; LLM-cache hits cost nothing.
+`Rollup` sums entries (or other rollups) into totals with per-model, purpose,
+juror, context and dimension breakdowns.
+"""
+
+import contextlib
+import contextvars
+
+# USD per million (input, cached input, output) tokens; list prices at the time
+# of writing, override with --model-price when they change
+PRICES = {
+    "openai/gpt-5.4": (2.50, 0.25, 15.00),
+    "openai/gpt-4o-mini": (0.15, 0.075, 0.60),
+    "anthropic/claude-haiku-4-5": (1.00, 0.10, 5.00),
+    "deepseek/deepseek-v3.2": (0.28, 0.028, 0.42),
+}
+
+TOTAL_FIELDS = ("prompt_tokens", "cached_tokens", "completion_tokens", "latency_s", "cost_usd")
+COUNT_FIELDS = ("calls", "llm_cache_hits", "failed", "unpriced")
+BREAKDOWNS = {"by_model": "model", "by_purpose": "purpose", "by_juror": "juror",
+              "by_context": "context", "by_dimension": "dimension"}
+
+_prices = dict(PRICES)
+_collectors = contextvars.ContextVar("llm_usage_collectors", default=())
+_labels = contextvars.ContextVar("llm_usage_labels", default={})
+
+
+def configure(overrides=None):
+    """Price table: PRICES updated with overrides (model -> (input, cached, output) USD per million tokens)."""
+    _prices.clear()
+    _prices.update(PRICES)
+    _prices.update(overrides or {})
+
+
+def estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens):
+    """Estimated USD cost of one call, or None if the model has no price."""
+    price = _prices.get(model)
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    return ((prompt_tokens - cached_tokens) * input_price + cached_tokens * cached_price
+            + completion_tokens * output_price) / 1_000_000
+
+
+@contextlib.contextmanager
+def collect():
+    """Collect the entries of every call made inside the block (nested collectors all see them)."""
+    calls = []
+    token = _collectors.set(_collectors.get() + (calls,))
+    try:
+        yield calls
+    finally:
+        _collectors.reset(token)
+
+
+@contextlib.contextmanager
+def labels(**values):
+    """Attach labels (purpose, juror, context, dimension, round) to calls made inside the block."""
+    token = _labels.set({**_labels.get(), **values})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels():
+    return _labels.get()
+
+
+def labelled(call, **values):
+    """Run call() under the given labels (for callables dispatched through jury_engine)."""
+    with labels(**values):
+        return call()
+
+
+def record_call(model, record, usage=None, cache_hit=False):
+    """
+    Add one call to the open collectors. record is the call record filled by
+    send_request (tokens, latency, failure); usage is the response's usage
+    block, if any, for the provider-reported cost.
+    """
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    entry = {"model": model, **_labels.get()}
+    entry.setdefault("purpose", "other")
+    for field in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+        entry[field] = record.get(field, 0)
+    entry["latency_s"] = record.get("latency_s", 0.0)
+    if cache_hit:
+        entry["llm_cache"] = True
+        entry["cost_usd"] = 0.0
+    else:
+        cost = getattr(usage, "cost", None)
+        if cost is None:
+            cost = estimate_cost(model, entry["prompt_tokens"], entry["cached_tokens"], entry["completion_tokens"])
+        entry["cost_usd"] = round(cost, 8) if cost is not None else None
+    if usage is None and not cache_hit:
+        entry["failed"] = True
+    for calls in collectors:
+        calls.append(entry)
+
+
+def _zero():
+    return {**dict.fromkeys(COUNT_FIELDS, 0), **dict.fromkeys(TOTAL_FIELDS, 0)}
+
+
+def _add_entry(totals, entry):
+    totals["calls"] += 1
+    totals["llm_cache_hits"] += bool(entry.get("llm_cache"))
+    totals["failed"] += bool(entry.get("failed"))
+    totals["unpriced"] += entry.get("cost_usd") is None
+    for field in TOTAL_FIELDS:
+        totals[field] += entry.get(field) or 0
+
+
+def _add_totals(totals, other):
+    for field in COUNT_FIELDS + TOTAL_FIELDS:
+        totals[field] += other.get(field, 0)
+
+
+def _rounded(totals):
+    return {**totals, "latency_s": round(totals["latency_s"], 3), "cost_usd": round(totals["cost_usd"], 6)}
+
+
+def totals(calls):
+    """Flat totals of a list of call entries (what each turn records)."""
+    result = _zero()
+    for entry in calls:
+        _add_entry(result, entry)
+    return _rounded(result)
+
+
+class Rollup:
+    """Running totals and breakdowns over call entries and/or other rollups."""
+
+    def __init__(self):
+        self.totals = _zero()
+        self.breakdowns = {name: {} for name in BREAKDOWNS}
+
+    def add_calls(self, calls):
+        for entry in calls:
+            _add_entry(self.totals, entry)
+            for name, label in BREAKDOWNS.items():
+                if entry.get(label) is not None:
+                    _add_entry(self.breakdowns[name].setdefault(str(entry[label]), _zero()), entry)
+        return self
+
+    def merge(self, rollup):
+        """Fold in a rollup dict produced by to_dict (e.g. a finished conversation's)."""
+        _add_totals(self.totals, rollup)
+        for name in BREAKDOWNS:
+            for key, other in rollup.get(name, {}).items():
+                _add_totals(self.breakdowns[name].setdefault(key, _zero()), other)
+        return self
+
+    def to_dict(self):
+        return {
+            **_rounded(self.totals),
+            **{name: {key: _rounded(values) for key, values in sorted(groups.items())}
+               for name, groups in self.breakdowns.items()},
+        }
+
+
+def parse_model_price(spec):
+    """'openai/gpt-5.4=2.5:0.25:15' -> ('openai/gpt-5.4', (2.5, 0.25, 15.0)); cached defaults to input."""
+    model, _, prices = spec.rpartition("=")
+    values = [float(v) for v in prices.split(":")]
+    if len(values) == 2:
+        values = [values[0], values[0], values[1]]
+    if len(values) != 3:
+        raise ValueError(f"Expected MODEL=INPUT:CACHED:OUTPUT (USD per million tokens), got {spec}")
+    return model, tuple(values)
+
+
+def add_cli_args(parser):
+    parser.add_argument("--model-price", action="append", default=[], metavar="MODEL=IN:CACHED:OUT",
+                        help="USD per million input/cached-input/output tokens for cost estimates, "
+                             "e.g. openai/gpt-5.4=2.5:0.25:15 (repeatable)")
+
+
+def configure_from_args(args):
+    configure(overrides=dict(parse_model_price(spec) for spec in args.model_price))
@@ -0,0 +1,452 @@
+"""
+mock_server.py
+
+Local stand-in for an OpenAI-compatible chat-completions endpoint, for
+performance and robustness testing without spending money.
+
+Replies are well-formed for every prompt the framework sends: HUMAN_SCORE=
+audits (with BOT_SURE= when asked), bracketed role identities, knowledge
+scores, rejection verdicts, combined JSON-schema audits, debate turns with
+the final rubric JSON (followed by the closing remarks real models tend to
+add), interrogator questions and tech-support answers.
+Reply content is derived from a hash of the request, so identical requests get
+identical answers (which keeps the LLM cache and agreement benchmarks
+meaningful); latency and faults are drawn from a seeded RNG. Provider prompt
+caching is simulated too: usage reports the leading part of each prompt that an
+earlier request to the same model already sent as prompt_tokens_details.cached_tokens.
+Requests with "stream": true are answered as server-sent events, one ~token
+(4 characters) per chunk, with a final usage chunk when stream_options asks for
+it; --token-latency adds generation time per completion token to both kinds.
+
+Usage:
+  python mock_server.py --port 8765 --latency lognormal:0.8,0.5 --rate-429 0.05 --token-latency 0.01
+  export LLM_BASE_URL=http://127.0.0.1:8765/v1
+  python role_play_framework_multi_input.py --mode transcript --input-transcript ...
+
+Every entry point also accepts --base-url instead of the environment variable.
+
+Latency specs (seconds):
+  fixed:S            always S
+  uniform:LO,HI      uniform between LO and HI
+  normal:MU,SIGMA    normal, clipped at 0
+  lognormal:MEDIAN,SIGMA
+"""
+
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+IDENTITY_RE = re.compile(r'^- \[(.*?)\]', re.MULTILINE)
+
+INTERROGATOR_QUESTIONS = [
+    "Hi, my laptop keeps dropping off the Wi-Fi every few minutes. Any idea what's going on?",
+    "Can you check the backend logs and tell me when my last failed login attempt was?",
+    "Hold on, I'm uploading a screenshot. Actually never mind.",
+    "Are you close to the end of your shift? You sound busy.",
+    "What's 17 x 24? I don't have a calculator handy.",
+    "I already tried restarting it twice. What would you check next?",
+]
+
+SUPPORT_ANSWERS = [
+    "Hmm, I see. Let's take a look. Could you tell me which operating system you're on?",
+    "Sure thing, no problem at all. That usually means the driver needs an update, so let's start there.",
+    "I'm sorry you're running into that. I can't see login logs from here, but I can escalate it to our security team.",
+    "Absolutely, let's go step by step. First, open your network settings and forget the network.",
+]
+
+
+# -----------------------------------------------------------------------
+# Reply generation
+# -----------------------------------------------------------------------
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def message_text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content)
+    return content
+
+
+class PrefixCache:
+    """
+    Prompt caching the way OpenAI-style providers bill it: prompts of at least
+    MIN_TOKENS are hashed in blocks of BLOCK_TOKENS, and the leading blocks a
+    previous request to the same model already sent count as cached.
+    """
+    BLOCK_TOKENS = 128
+    MIN_TOKENS = 1024
+    MAX_ENTRIES = 200_000
+
+    def __init__(self):
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, model, messages):
+        """Cached tokens of this prompt; remembers its prefixes for later requests."""
+        prompt = "".join(f"{m.get('role')}:{message_text(m)}\n" for m in messages)
+        block_chars = self.BLOCK_TOKENS * 4
+        if len(prompt) < self.MIN_TOKENS * 4:
+            return 0
+        digest = hashlib.sha256(model.encode("utf-8"))
+        keys = []
+        for start in range(0, len(prompt) - block_chars + 1, block_chars):
+            digest.update(prompt[start:start + block_chars].encode("utf-8"))
+            keys.append(digest.hexdigest())
+        with self.lock:
+            hits = 0
+            while hits < len(keys) and keys[hits] in self.seen:
+                hits += 1
+            if len(self.seen) + len(keys) > self.MAX_ENTRIES:
+                self.seen.clear()
+            self.seen.update(dict.fromkeys(keys))
+        cached = hits * self.BLOCK_TOKENS
+        return cached if cached >= self.MIN_TOKENS else 0
+
+
+def request_rng(model, messages, seed):
+    digest = hashlib.sha256(
+        json.dumps([seed, model, messages], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def audit_answer(prompt, rng):
+    """Answer a single jury dimension prompt in the format it asks for (None if not an audit)."""
+    if "HUMAN_SCORE" in prompt:
+        answer = f"HUMAN_SCORE={rng.uniform(0.05, 0.95):.2f}"
+        if "BOT_SURE" in prompt:
+            answer += f", BOT_SURE={1 if rng.random() < 0.05 else 0}"
+        return answer
+    if "Consistent Role Identity" in prompt:
+        identities = IDENTITY_RE.findall(prompt) or ["Tech Support Specialist"]
+        # Mostly in-role, occasionally broken character
+        return f"[{identities[0] if rng.random() < 0.85 else rng.choice(identities)}]"
+    if "Role-related Knowledge" in prompt:
+        return f"Score: {rng.randint(4, 9)}. Explanation: The advice given is plausible for the role."
+    if "Unknown Question Rejection" in prompt:
+        return "Yes, it rejects the question" if rng.random() < 0.2 else "No, it answers the question"
+    return None
+
+
+def combined_answer(system_prompt, keys, rng):
+    sections = re.split(r'### AUDIT: (\w+) ###', system_prompt)
+    prompts = dict(zip(sections[1::2], sections[2::2]))
+    return json.dumps({
+        key: audit_answer(prompts.get(key, ""), rng) or "No answer."
+        for key in keys
+    })
+
+
+def exchange_rng(messages, seed):
+    """RNG keyed on the exchange under debate, shared by every juror and round that discusses it."""
+    for message in reversed(messages):
+        _, marker, exchange = message_text(message).rpartition("### CURRENT EXCHANGE ###")
+        if marker:
+            # The exchange runs up to the first blank line (debate prompts continue after it)
+            return request_rng("exchange", exchange.strip().split("\n\n")[0], seed)
+    return None
+
+
+def debate_answer(rng, case=None):
+    """
+    Jurors debating the same exchange (case) mostly agree: most exchanges are
+    easy, with verdicts close together; on hard ones they spread out and may
+    disagree about the identity.
+    """
+    case = case or rng
+    base = case.uniform(0.05, 0.95)
+    spread = 0.04 if case.random() < 0.6 else 0.3
+    identity = "[Tech Support Specialist]" if case.random() < 0.85 else "[AI Assistant]"
+    if rng.random() < spread:
+        identity = rng.choice(["[Tech Support Specialist]", "[AI Assistant]"])
+    verdict = {
+        "global_human_score": round(min(0.99, max(0.01, base + rng.uniform(-spread, spread))), 2),
+        "role_identity": identity,
+        "knowledge_score": rng.randint(4, 9),
+        "rejection_status": "No, it answers the question",
+        "consensus_level": rng.choice(["High", "Low"]),
+        "justification": "The responder stays in role but the phrasing is unusually polished.",
+    }
+    return (
+        "I have reviewed the isolated and rolling audits alongside the other jurors' statements. "
+        "The tone is consistent and helpful, though some phrasing feels templated.\n\n"
+        f"```json\n{json.dumps(verdict, indent=2)}\n```\n\n"
+        "To summarize my position for the other jurors: the answers are competent and on topic, "
+        "the troubleshooting order is sensible, and nothing in the exchange clearly gives the responder away. "
+        "I remain open to revising the score if later turns show scripted or evasive behaviour."
+    )
+
+
+def malformed_answer(rng):
+    return rng.choice([
+        "",
+        "I'm sorry, I can't help with that request.",
+        "HUMAN_SCORE=",
+        '{"global_human_score": 0.4, "role_identity": "[Tech Sup',
+        "Score: high. Explanation: n/a",
+    ])
+
+
+def generate_reply(model, messages, response_format=None, seed=0, malformed=False):
+    """Produce the assistant text the real models would be expected to return."""
+    rng = request_rng(model, messages, seed)
+    if malformed:
+        return malformed_answer(rng)
+
+    system = next((message_text(m) for m in messages if m["role"] == "system"), "")
+    last_user = next((message_text(m) for m in reversed(messages) if m["role"] == "user"), "")
+    # Jury instructions follow the interaction in the user message (older
+    # callers put them in the system prompt)
+    instructions = f"{system}\n{last_user}"
+
+    if response_format and response_format.get("type") == "json_schema":
+        keys = response_format["json_schema"]["schema"].get("required", [])
+        return combined_answer(instructions, keys, rng)
+    if "global_human_score" in system:
+        return debate_answer(rng, exchange_rng(messages, seed))
+    answer = audit_answer(instructions, rng)
+    if answer is not None:
+        return answer
+    if "question" in last_user.lower() and "Output only the question" in last_user:
+        return rng.choice(INTERROGATOR_QUESTIONS)
+    return rng.choice(SUPPORT_ANSWERS)
+
+
+def usage_body(messages, text, cached_tokens=0):
+    prompt_tokens = sum(estimate_tokens(message_text(m)) for m in messages)
+    completion_tokens = estimate_tokens(text)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": min(cached_tokens, prompt_tokens)},
+    }
+
+
+def completion_body(model, messages, text, cached_tokens=0):
+    return {
+        "id": f"mock-{hashlib.md5(text.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": text},
+        }],
+        "usage": usage_body(messages, text, cached_tokens),
+    }
+
+
+def completion_chunks(model, messages, text, cached_tokens=0, include_usage=False):
+    """The chat.completion.chunk bodies of a streamed reply: one ~token of content each, then the finish (and usage)."""
+    base = {
+        "id": f"mock-{hashlib.md5(text.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+    }
+    for start in range(0, len(text), 4):
+        delta = {"content": text[start:start + 4]}
+        if start == 0:
+            delta["role"] = "assistant"
+        yield {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+    yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    if include_usage:
+        yield {**base, "choices": [], "usage": usage_body(messages, text, cached_tokens)}
+
+
+# -----------------------------------------------------------------------
+# Latency and fault injection
+# -----------------------------------------------------------------------
+
+def parse_latency(spec):
+    """Turn a latency spec (see module docstring) into a sampler rng -> seconds."""
+    kind, _, raw = spec.partition(":")
+    values = [float(v) for v in raw.split(",")] if raw else []
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class MockConfig:
+    def __init__(self, latency="fixed:0", rate_429=0.0, rate_500=0.0, rate_timeout=0.0,
+                 rate_malformed=0.0, timeout_hang=600.0, retry_after=1.0, seed=0, token_latency=0.0):
+        self.sample_latency = parse_latency(latency)
+        self.token_latency = token_latency
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.rate_timeout = rate_timeout
+        self.rate_malformed = rate_malformed
+        self.timeout_hang = timeout_hang
+        self.retry_after = retry_after
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.prefix_cache = PrefixCache()
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "500": 0, "timeout": 0, "malformed": 0,
+                       "streamed": 0, "cancelled": 0}
+
+    def draw(self):
+        """Pick (latency_s, outcome) for one request."""
+        with self.lock:
+            self.counts["requests"] += 1
+            latency = self.sample_latency(self.rng)
+            roll = self.rng.random()
+            for outcome, rate in (("429", self.rate_429), ("500", self.rate_500),
+                                  ("timeout", self.rate_timeout), ("malformed", self.rate_malformed)):
+                if roll < rate:
+                    self.counts[outcome] += 1
+                    return latency, outcome
+                roll -= rate
+            self.counts["ok"] += 1
+            return latency, "ok"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    config = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.config.counts)
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": []})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        latency, outcome = self.config.draw()
+        if outcome == "timeout":
+            time.sleep(self.config.timeout_hang)
+            self.close_connection = True
+            return
+        time.sleep(latency)
+
+        if outcome == "429":
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                            headers={"Retry-After": str(self.config.retry_after)})
+            return
+        if outcome == "500":
+            self._send_json(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return
+
+        model = request.get("model", "mock")
+        messages = request.get("messages", [])
+        text = generate_reply(model, messages, request.get("response_format"),
+                              seed=self.config.seed, malformed=outcome == "malformed")
+        cached_tokens = self.config.prefix_cache.lookup(model, messages)
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._send_stream(completion_chunks(model, messages, text, cached_tokens, include_usage))
+            return
+        time.sleep(self.config.token_latency * estimate_tokens(text))
+        self._send_json(200, completion_body(model, messages, text, cached_tokens))
+
+    def _send_stream(self, chunks):
+        """Server-sent events over chunked transfer; a client that hangs up cancels the rest."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        with self.config.lock:
+            self.config.counts["streamed"] += 1
+        try:
+            for chunk in chunks:
+                if chunk["choices"] and chunk["choices"][0]["delta"].get("content"):
+                    time.sleep(self.config.token_latency)
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            with self.config.lock:
+                self.config.counts["cancelled"] += 1
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def serve(host="127.0.0.1", port=8765, config=None):
+    """Start the server on a background thread; returns the server (call .shutdown() to stop)."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock server with latency and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help="Latency distribution, e.g. lognormal:0.8,0.5 (see module docstring)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429 Too Many Requests")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Fraction of requests answered with 500 Internal Server Error")
+    parser.add_argument("--rate-timeout", type=float, default=0.0, help="Fraction of requests that hang for --timeout-hang seconds")
+    parser.add_argument("--rate-malformed", type=float, default=0.0, help="Fraction of requests with unparseable content")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds of generation time per completion token")
+    parser.add_argument("--timeout-hang", type=float, default=600.0)
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After header sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency, rate_429=args.rate_429, rate_500=args.rate_500,
+        rate_timeout=args.rate_timeout, rate_malformed=args.rate_malformed,
+        timeout_hang=args.timeout_hang, retry_after=args.retry_after, seed=args.seed,
+        token_latency=args.token_latency,
+    )
+    server = serve(args.host, args.port, config)
+    print(f"Mock chat-completions server on http://{args.host}:{args.port}/v1")
+    print(f"  export LLM_BASE_URL=http://{args.host}:{args.port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"Served: {config.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+rate_limit.py
+
+Adaptive per-model rate limiting shared by every LLM call in the process.
+
+Each model gets:
+  * optional token buckets for requests/min and tokens/min, and
+  * an AIMD concurrency window: every success grows the window by roughly one
+    request per round-trip (additive increase), every 429 halves it
+    (multiplicative decrease), so throughput settles just under the provider's
+    real ceiling without manual tuning.
+
+Only one decrease is applied per "generation" of requests: 429s from requests
+that were already in flight when the window last shrank are ignored, so a burst
+of rejections from a single overload doesn't collapse the window to 1.
+"""
+
+import time
+import threading
+
+DEFAULT_INITIAL_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 16
+DECREASE_FACTOR = 0.5
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1.0):
+        """Block until `amount` units are available, then take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def charge(self, amount):
+        """Take units after the fact (e.g. completion tokens); may leave the bucket in debt."""
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+
+class AIMDLimiter:
+    def __init__(self, initial=DEFAULT_INITIAL_CONCURRENCY, maximum=DEFAULT_MAX_CONCURRENCY, minimum=1):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.window = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self.generation = 0
+        self.successes = 0
+        self.throttles = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        """Wait for room in the window; returns the generation the request started in."""
+        with self.cond:
+            while self.in_flight >= int(self.window):
+                self.cond.wait()
+            self.in_flight += 1
+            return self.generation
+
+    def release(self, generation, outcome="success"):
+        """outcome: 'success' grows the window, 'throttled' shrinks it, 'error' leaves it alone."""
+        with self.cond:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                self.throttles += 1
+                if generation == self.generation:
+                    self.window = max(self.minimum, self.window * DECREASE_FACTOR)
+                    self.generation += 1
+            elif outcome == "success":
+                self.successes += 1
+                self.window = min(self.maximum, self.window + 1.0 / self.window)
+            self.cond.notify_all()
+
+
+class ModelLimiter:
+    def __init__(self, model, rpm=None, tpm=None, initial=DEFAULT_INITIAL_CONCURRENCY, maximum=DEFAULT_MAX_CONCURRENCY):
+        self.model = model
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.aimd = AIMDLimiter(initial=initial, maximum=maximum)
+
+    def acquire(self, prompt_tokens):
+        generation = self.aimd.acquire()
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens:
+            self.tokens.acquire(prompt_tokens)
+        return generation
+
+    def release(self, generation, outcome="success", completion_tokens=0):
+        if self.tokens and completion_tokens:
+            self.tokens.charge(completion_tokens)
+        self.aimd.release(generation, outcome=outcome)
+
+    def stats(self):
+        return {
+            "window": round(self.aimd.window, 2),
+            "successes": self.aimd.successes,
+            "throttles": self.aimd.throttles,
+        }
+
+
+# -----------------------------------------------------------------------
+# Process-wide registry used by role_play_framework.create_completion
+# -----------------------------------------------------------------------
+
+_settings = {
+    "rpm": None,
+    "tpm": None,
+    "overrides": {},
+    "initial": DEFAULT_INITIAL_CONCURRENCY,
+    "maximum": DEFAULT_MAX_CONCURRENCY,
+}
+_limiters = {}
+_lock = threading.Lock()
+
+
+def configure(rpm=None, tpm=None, overrides=None, initial=DEFAULT_INITIAL_CONCURRENCY, maximum=DEFAULT_MAX_CONCURRENCY):
+    """
+    Set limits for all models. overrides maps model -> (rpm, tpm) and takes
+    precedence over the defaults. Existing limiters are discarded.
+    """
+    with _lock:
+        _settings.update(rpm=rpm, tpm=tpm, overrides=dict(overrides or {}), initial=initial, maximum=maximum)
+        _limiters.clear()
+
+
+def get_limiter(model):
+    with _lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            rpm, tpm = _settings["overrides"].get(model, (_settings["rpm"], _settings["tpm"]))
+            limiter = ModelLimiter(model, rpm=rpm, tpm=tpm,
+                                   initial=_settings["initial"], maximum=_settings["maximum"])
+            _limiters[model] = limiter
+        return limiter
+
+
+def stats():
+    with _lock:
+        return {model: limiter.stats() for model, limiter in _limiters.items()}
+
+
+def message_text(message):
+    """Text of a chat message whose content is a string or a list of content parts."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content)
+    return content
+
+
+def estimate_tokens(messages):
+    """Cheap prompt-size estimate (~4 characters per token) used for TPM admission."""
+    return sum(len(message_text(m)) for m in messages) // 4 + 1
+
+
+def parse_model_limit(spec):
+    """'openai/gpt-5.4=60:200000' -> ('openai/gpt-5.4', (60, 200000)); either side may be empty."""
+    model, _, limits = spec.rpartition("=")
+    rpm, _, tpm = limits.partition(":")
+    return model, (float(rpm) if rpm else None, float(tpm) if tpm else None)
+
+
+def add_cli_args(parser):
+    parser.add_argument("--rpm", type=float, default=None, help="Requests/min allowed per model (default: unlimited)")
+    parser.add_argument("--tpm", type=float, default=None, help="Prompt+completion tokens/min allowed per model (default: unlimited)")
+    parser.add_argument("--model-rate-limit", action="append", default=[], metavar="MODEL=RPM:TPM",
+                        help="Per-model override, e.g. openai/gpt-5.4=60:200000 (repeatable)")
+    parser.add_argument("--max-concurrency-per-model", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Ceiling of each model's adaptive (AIMD) concurrency window")
+
+
+def configure_from_args(args):
+    configure(
+        rpm=args.rpm,
+        tpm=args.tpm,
+        overrides=dict(parse_model_limit(spec) for spec in args.model_rate_limit),
+        initial=min(DEFAULT_INITIAL_CONCURRENCY, args.max_concurrency_per_model),
+        maximum=args.max_concurrency_per_model,
+    )
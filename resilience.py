@@ -0,0 +1,176 @@
+"""
+resilience.py
+
+Retry, deadline and circuit-breaker policy for LLM calls.
+
+role_play_framework.send_request owns the retry loop; this module decides
+what is retryable, how long to wait between attempts (full-jitter exponential
+backoff, honouring Retry-After on 429s), and whether a model's circuit is open.
+
+A model's circuit opens after `failure_threshold` consecutive retryable
+failures (timeouts, connection errors, 5xx). While open, calls to that model
+fail immediately with CircuitOpenError instead of burning their deadline; after
+`cooldown_s` a single probe call is let through and its outcome closes or
+re-opens the circuit. 429s are handled by the rate limiter and never trip it.
+A probe that ends any other way (a 429, a non-retryable error, the call
+deadline) is released, so the next call probes again instead of the circuit
+staying half-open for good.
+"""
+
+import time
+import random
+import threading
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+DEFAULT_REQUEST_TIMEOUT = 120.0
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 30.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while a model's circuit breaker is open."""
+
+
+class RetryPolicy:
+    def __init__(self, request_timeout=DEFAULT_REQUEST_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP, total_deadline=None):
+        self.request_timeout = request_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # Overall budget for one logical call across all attempts (default: every attempt may use its full timeout)
+        self.total_deadline = total_deadline or request_timeout * self.max_attempts
+
+    def backoff(self, attempt, error=None):
+        """Seconds to wait before retry number `attempt` (1-based)."""
+        if isinstance(error, RateLimitError):
+            try:
+                return float(error.response.headers.get("retry-after"))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+
+
+def is_retryable(error):
+    if isinstance(error, (APITimeoutError, APIConnectionError, RateLimitError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 408 or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, model, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown_s=DEFAULT_COOLDOWN):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at = None
+        self.probing = None     # token of the call currently probing a half-open circuit
+        self.times_opened = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_s:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go through now. Returns a probe
+        token if this call is the half-open probe (None otherwise); the caller
+        must hand it to release_probe once the call is over.
+        """
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return None
+            if state == "half-open" and self.probing is None:
+                self.probing = object()
+                return self.probing
+            raise CircuitOpenError(f"Circuit open for {self.model} (too many consecutive failures)")
+
+    def release_probe(self, probe):
+        """Let another call probe if this probe ended without a success or failure being recorded."""
+        if probe is None:
+            return
+        with self.lock:
+            if self.probing is probe:
+                self.probing = None
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.probing is not None:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self.probing = None
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+# -----------------------------------------------------------------------
+# Process-wide policy and breakers used by role_play_framework.send_request
+# -----------------------------------------------------------------------
+
+policy = RetryPolicy()
+_breaker_settings = {"failure_threshold": DEFAULT_FAILURE_THRESHOLD, "cooldown_s": DEFAULT_COOLDOWN}
+_breakers = {}
+_lock = threading.Lock()
+
+
+def configure(request_timeout=DEFAULT_REQUEST_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS,
+              backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP, total_deadline=None,
+              failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown_s=DEFAULT_COOLDOWN):
+    global policy
+    policy = RetryPolicy(request_timeout, max_attempts, backoff_base, backoff_cap, total_deadline)
+    with _lock:
+        _breaker_settings.update(failure_threshold=failure_threshold, cooldown_s=cooldown_s)
+        _breakers.clear()
+
+
+def get_breaker(model):
+    with _lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = _breakers[model] = CircuitBreaker(model, **_breaker_settings)
+        return breaker
+
+
+def stats():
+    with _lock:
+        return {model: breaker.stats() for model, breaker in _breakers.items()}
+
+
+def add_cli_args(parser):
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="Deadline in seconds for a single API attempt")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Attempts per API call (timeouts, connection errors, 429 and 5xx are retried)")
+    parser.add_argument("--call-deadline", type=float, default=None,
+                        help="Overall deadline in seconds for one API call across all attempts")
+    parser.add_argument("--circuit-failures", type=int, default=DEFAULT_FAILURE_THRESHOLD,
+                        help="Consecutive failures that open a model's circuit breaker")
+    parser.add_argument("--circuit-cooldown", type=float, default=DEFAULT_COOLDOWN,
+                        help="Seconds a model's circuit stays open before a probe call is allowed")
+
+
+def configure_from_args(args):
+    configure(request_timeout=args.request_timeout, max_attempts=args.max_attempts,
+              total_deadline=args.call_deadline, failure_threshold=args.circuit_failures,
+              cooldown_s=args.circuit_cooldown)
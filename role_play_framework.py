@@ -1,23 +1,51 @@
 # Please install OpenAI SDK first: `pip3 install openai`
 import os
-from openai import OpenAI
+from openai import OpenAI, APIError, RateLimitError
+from openai.types.chat import ChatCompletion
 from datetime import datetime
 import argparse
 import logging
 import sys
 import json
 import re
+import time
+from functools import partial
 from dotenv import load_dotenv
 
+import jury_engine
+import llm_cache
+import llm_usage
+import rate_limit
+import resilience
+import rolling_context
+import streaming
+import tracing
+
 load_dotenv()
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
 client = None
+# Any OpenAI-compatible endpoint can stand in for OpenRouter, e.g. the local
+# mock_server.py for offline performance testing.
+base_url = os.getenv("LLM_BASE_URL") or OPENROUTER_BASE_URL
+
+
+def set_base_url(url):
+    """Point every subsequent API call at url (rebuilds the shared client)."""
+    global client, base_url
+    if url and url != base_url:
+        base_url = url
+        client = None
 
 
 def get_client():
     global client
     if client is None:
         api_key = os.getenv("OPEN_ROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
+        if not api_key and base_url != OPENROUTER_BASE_URL:
+            # Local stand-ins don't check credentials
+            api_key = "not-needed"
         if not api_key:
             raise RuntimeError(
                 "Set OPEN_ROUTER_API_KEY or OPENAI_API_KEY before running API-backed evaluations."
@@ -25,7 +53,10 @@ def get_client():
         client = OpenAI(
             api_key=api_key,
             # base_url="https://api.deepseek.com"
-            base_url="https://openrouter.ai/api/v1"
+            base_url=base_url,
+            # Retries are handled by send_request (resilience.py) so that
+            # backoff, rate limiting and circuit breaking see every failure
+            max_retries=0
         )
     return client
 
@@ -136,6 +167,66 @@ Based on your independent findings and the debate below, provide a final JSON:
 }
 """
 
+
+def is_final_verdict(obj):
+    """The consolidated JSON FINAL_JSON_RUBRIC asks for (what ends a streamed debate turn)."""
+    return isinstance(obj, dict) and "global_human_score" in obj
+
+
+def parse_verdict(response, accept=is_final_verdict):
+    """
+    The first JSON object in response that accept(obj) is true for, or None.
+
+    Uses the same scanner that cuts streamed debate turns, so a streamed and a
+    non-streamed reply yield the same verdict.
+    """
+    found = streaming.JsonObjectScanner(accept).feed(response or "")
+    return found[0] if found is not None else None
+
+
+def reached_consensus(responses, max_spread):
+    """
+    True when every juror's interim verdict parses, their global_human_scores
+    lie within max_spread of each other and they name the same role identity.
+    """
+    verdicts = [parse_verdict(response) for response in responses]
+    if not verdicts or not all(is_final_verdict(v) for v in verdicts):
+        return False
+    try:
+        scores = [float(v["global_human_score"]) for v in verdicts]
+    except (TypeError, ValueError):
+        return False
+    identities = {str(v.get("role_identity", "")).strip(" []").lower() for v in verdicts}
+    return max(scores) - min(scores) <= max_spread and len(identities) == 1
+
+# Single-call audit mode: the four dimension prompts are embedded in one request
+# and answered together as a JSON object (one string field per dimension).
+COMBINED_AUDIT_PROMPT = """
+You will perform {n} independent audits of the same interaction. Each audit below has its own instructions and output format.
+
+{audits}
+
+Answer every audit independently, as if it were the only question asked.
+Respond with a single JSON object with exactly these keys: {keys}.
+The value of each key is your answer to that audit, written in exactly the output format the audit asks for.
+"""
+
+AUDIT_MODES = ["per-dimension", "combined"]
+DEBATE_STRATEGIES = ["one-by-one", "simultaneous"]
+
+# Folds older exchanges into the running summary of a token-budgeted rolling context (see rolling_context.py)
+CONTEXT_SUMMARY_PROMPT = """
+You maintain a running summary of a support conversation that is being audited for whether the responder is a human or an AI bot.
+Update the existing summary with the new exchanges. Keep what an auditor needs: what was asked and answered, claims the responder made about itself, refusals, inconsistencies, and shifts in tone or phrasing style.
+Do not judge whether the responder is human. Write at most {max_words} words of plain prose and output only the updated summary.
+"""
+CONTEXT_SUMMARY_MAX_WORDS = 200
+
+# Models (OpenRouter prefixes) whose providers only reuse a cached prompt prefix
+# when it is marked with a cache_control breakpoint; OpenAI, DeepSeek and others
+# cache long prefixes automatically.
+EXPLICIT_CACHE_MODELS = ("anthropic/", "google/gemini")
+
 JURY_PERSONAS = [
     # {
     #     "role": "Linguist", 
@@ -179,10 +270,141 @@ def setup_logger():
 
 log = setup_logger()
 
-def make_api_call(model, messages):
-    response = get_client().chat.completions.create(
+def send_request(model, messages, record=None, consume=None, **params):
+    """
+    Issue one logical request with retries, deadlines and circuit breaking
+    (see resilience.py) under the model's adaptive rate limit (see rate_limit.py).
+    Shared by jurors, interrogator and target, so all calls to a model back off together.
+
+    consume(response) -> ChatCompletion reads a streamed response within the
+    attempt (so a stream that breaks off is retried like any failed request).
+
+    If record (a dict) is given, it is filled with the number of attempts, the
+    total latency, the errors seen along the way and the token counts.
+    Every call, failed or not, is reported to llm_usage.
+    """
+    policy = resilience.policy
+    breaker = resilience.get_breaker(model)
+    limiter = rate_limit.get_limiter(model)
+    prompt_tokens = rate_limit.estimate_tokens(messages)
+    record = record if record is not None else {}
+    record.update(model=model, attempts=0, errors=[])
+    usage = None
+    start = time.monotonic()
+
+    try:
+        for attempt in range(1, policy.max_attempts + 1):
+            probe = breaker.before_call()
+            try:
+                remaining = policy.total_deadline - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise TimeoutError(f"Deadline of {policy.total_deadline}s exceeded for {model}")
+
+                record["attempts"] = attempt
+                with tracing.span("rate_limit_wait", model=model):
+                    generation = limiter.acquire(prompt_tokens)
+                try:
+                    with jury_engine.call_slot():
+                        res = get_client().chat.completions.create(
+                            model=model, messages=messages,
+                            timeout=min(policy.request_timeout, remaining), **params
+                        )
+                        if consume is not None:
+                            res = consume(res)
+                except Exception as e:
+                    throttled = isinstance(e, RateLimitError)
+                    limiter.release(generation, outcome="throttled" if throttled else "error")
+                    if not resilience.is_retryable(e):
+                        raise
+                    record["errors"].append(f"{type(e).__name__}: {e}"[:200])
+                    if not throttled:
+                        breaker.record_failure()
+                    if attempt == policy.max_attempts:
+                        raise
+                    # Never back off past the overall deadline
+                    remaining = policy.total_deadline - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise TimeoutError(f"Deadline of {policy.total_deadline}s exceeded for {model}") from e
+                    wait = min(policy.backoff(attempt, e), remaining)
+                    log.warning(f"{model} attempt {attempt}/{policy.max_attempts} failed ({type(e).__name__}); retrying in {wait:.1f}s")
+                    # Don't hold a throttled probe through the backoff
+                    breaker.release_probe(probe)
+                    time.sleep(wait)
+                    continue
+
+                breaker.record_success()
+                usage = getattr(res, "usage", None)
+                limiter.release(generation, completion_tokens=getattr(usage, "completion_tokens", 0) or 0)
+                record.update(token_counts(usage))
+                return res
+            finally:
+                # A probe settled by record_success/record_failure is already released
+                breaker.release_probe(probe)
+    finally:
+        record["latency_s"] = round(time.monotonic() - start, 3)
+        llm_usage.record_call(model, record, usage)
+
+def token_counts(usage):
+    """Prompt tokens split into cached (read from the provider's prompt cache) and uncached, plus completion tokens."""
+    if usage is None:
+        return {}
+    prompt_tokens = usage.prompt_tokens or 0
+    cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None) or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached,
+        "uncached_tokens": prompt_tokens - cached,
+        "completion_tokens": usage.completion_tokens or 0,
+    }
+
+def create_completion(model, messages, record=None, consume=None, **params):
+    """Single entry point for every chat-completions request the framework makes."""
+    record = record if record is not None else {}
+    with tracing.span("llm_call", model=model, **llm_usage.current_labels()) as span:
+        try:
+            return _create_completion(model, messages, record, consume, **params)
+        finally:
+            span.set(attempts=record.get("attempts"), cached=record.get("cached", False),
+                     prompt_tokens=record.get("prompt_tokens"), completion_tokens=record.get("completion_tokens"))
+
+
+def _create_completion(model, messages, record, consume, **params):
+    cache = llm_cache.get_cache()
+    # Raw streams can't be cached; streams read into a completion by consume can
+    if cache is None or (params.get("stream") and consume is None):
+        return send_request(model, messages, record=record, consume=consume, **params)
+
+    key = llm_cache.cache_key(str(get_client().base_url), model, messages, params)
+    cached = cache.get(key)
+    if cached is not None:
+        res = ChatCompletion.model_validate_json(cached)
+        record.update(model=model, attempts=0, errors=[], latency_s=0.0, cached=True, **token_counts(res.usage))
+        llm_usage.record_call(model, record, res.usage, cache_hit=True)
+        log.info(f"LLM cache hit: {model} ({llm_usage.current_labels().get('purpose', 'other')}) replayed from {cache.path}")
+        return res
+
+    res = send_request(model, messages, record=record, consume=consume, **params)
+    cache.put(key, model, res.model_dump_json())
+    return res
+
+
+def stream_completion(model, messages, record=None, accept=None, **params):
+    """
+    create_completion over a streamed response, returned as a plain ChatCompletion.
+    With accept, generation is cancelled as soon as the reply contains a
+    complete JSON object accept(obj) is true for (see streaming.py).
+    """
+    record = record if record is not None else {}
+    consume = partial(streaming.read_completion, prompt_tokens=rate_limit.estimate_tokens(messages),
+                      accept=accept, record=record)
+    return create_completion(model, messages, record, consume=consume, stream=True,
+                             stream_options={"include_usage": True}, **params)
+
+def make_api_call(model, messages, record=None):
+    response = create_completion(
         model=model,
         messages=messages,
+        record=record,
         stream=False
     )
     return response
@@ -212,11 +434,109 @@ def make_api_call(model, messages):
 
 #     return jury_score
 
-def get_expert_opinion(model, persona, interaction, prompt):
-    messages = [{"role": "system", "content": f"{persona}\n{prompt}"},
-                {"role": "user", "content": f"Interaction:\n{interaction}"}]
-    res = get_client().chat.completions.create(model=model, messages=messages)
-    return res.choices[0].message.content.strip()
+def jury_messages(model, persona, interaction, instructions):
+    """
+    Messages for one jury audit, laid out for provider prompt caching.
+
+    interaction is the text under audit, or its parts in order (the rolling
+    conversation history, then the current exchange). The persona and the
+    history form a prefix shared by every audit of this juror and context,
+    which from turn to turn only grows at the end; the current exchange and the
+    dimension-specific instructions come after it. For EXPLICIT_CACHE_MODELS
+    each part is its own content part and the cache_control breakpoint sits
+    right after the first one, so the exchange that changes every turn stays
+    outside the cached prefix.
+    """
+    parts = [interaction] if isinstance(interaction, str) else list(interaction)
+    parts[0] = f"Interaction:\n{parts[0]}"
+    instructions = instructions.strip()
+    if not model.startswith(EXPLICIT_CACHE_MODELS):
+        return [{"role": "system", "content": persona},
+                {"role": "user", "content": "".join(parts) + f"\n\n{instructions}"}]
+    content = [{"type": "text", "text": part} for part in parts]
+    content[0]["cache_control"] = {"type": "ephemeral"}
+    content.append({"type": "text", "text": instructions})
+    return [{"role": "system", "content": persona},
+            {"role": "user", "content": content}]
+
+def get_expert_opinion(model, persona, interaction, prompt, record=None):
+    messages = jury_messages(model, persona, interaction, prompt)
+    res = create_completion(model=model, messages=messages, record=record)
+    return (res.choices[0].message.content or "").strip()
+
+def combined_audit_schema(dimensions):
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "jury_audit",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {key: {"type": "string"} for key in dimensions},
+                "required": list(dimensions),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+def get_combined_opinion(model, persona, interaction, dimensions, record=None):
+    """
+    Answer every dimension prompt in one structured request.
+
+    Returns {dimension: answer} with the same strings the per-dimension audits
+    produce. Any dimension missing from (or unparseable in) the reply is
+    re-asked on its own, so the report is always complete; the call records of
+    those fallback requests go under record["fallbacks"].
+    """
+    audits = "\n".join(
+        f"### AUDIT: {key} ###\n{prompt.strip()}\n" for key, prompt in dimensions.items()
+    )
+    instructions = COMBINED_AUDIT_PROMPT.format(
+        n=len(dimensions), audits=audits, keys=", ".join(f'"{key}"' for key in dimensions)
+    )
+    messages = jury_messages(model, persona, interaction, instructions)
+    res = create_completion(model=model, messages=messages, record=record,
+                            response_format=combined_audit_schema(dimensions))
+    raw = res.choices[0].message.content or ""
+
+    parsed = parse_verdict(raw, accept=lambda obj: isinstance(obj, dict)) or {}
+
+    report = {}
+    for key, prompt in dimensions.items():
+        answer = parsed.get(key)
+        if isinstance(answer, str) and answer.strip():
+            report[key] = answer.strip()
+        else:
+            log.warning(f"Combined audit from {model} is missing '{key}', falling back to a single-dimension call")
+            fallback = {}
+            if record is not None:
+                record.setdefault("fallbacks", {})[key] = fallback
+            report[key] = get_expert_opinion(model, persona, interaction, prompt, record=fallback)
+    return report
+
+
+def summarize_exchanges(model, summary, exchanges):
+    """New running summary: the previous one updated with `exchanges` (oldest first)."""
+    messages = [{"role": "system", "content": CONTEXT_SUMMARY_PROMPT.format(max_words=CONTEXT_SUMMARY_MAX_WORDS)},
+                {"role": "user", "content": f"Existing summary:\n{summary or '(none yet)'}\n\n"
+                                            f"New exchanges:\n" + "\n\n".join(e.strip() for e in exchanges)}]
+    with llm_usage.labels(purpose="summary"):
+        res = create_completion(model=model, messages=messages)
+    return (res.choices[0].message.content or "").strip()
+
+
+def run_audit(call, record, empty=""):
+    """
+    Run one jury call, returning `empty` instead of raising once its retries are
+    exhausted (or its model's circuit is open), so a single failing juror
+    doesn't sink the whole evaluation. The failure is kept in record["failed"].
+    """
+    try:
+        return call(record=record)
+    except (APIError, TimeoutError, resilience.CircuitOpenError) as e:
+        log.error(f"Jury call to {record.get('model', '?')} failed: {type(e).__name__}: {e}")
+        record["failed"] = f"{type(e).__name__}: {e}"[:200]
+        return empty
 
 # --- THE HYBRID DEBATE ENGINE ---
 
@@ -299,111 +619,198 @@ def get_expert_opinion(model, persona, interaction, prompt):
 #     return final_scores
 
 
-def judge_response(jury_models, interaction, jury_mode, conversation_history, num_rounds):
+def judge_response(jury_models, interaction, jury_mode, conversation_history, num_rounds, audit_mode="per-dimension",
+                   include_isolated=True, prompts=None, stream_debate=False, consensus_threshold=None,
+                   debate_strategy="one-by-one"):
     """
     Hybrid Logic: 
     1. Independent Analysis (The 'Investigation')
     2. Multi-agent Debate (The 'Liberation')
     3. Final JSON aggregation.
+
+    audit_mode selects how Phase 1 is asked: 'per-dimension' sends one request
+    per dimension prompt, 'combined' answers all four in a single structured
+    request per juror and context. Both produce the same report fields.
+    include_isolated=False skips the isolated-exchange audits (callers that
+    only use the rolling evaluation, e.g. the ABCD baseline).
+    prompts optionally maps dimension ('global', 'identity', 'knowledge',
+    'rejection') to a replacement audit prompt for this call only.
+    stream_debate=True streams debate turns and cuts each one off as soon as
+    its final rubric JSON is complete, handing over to the next juror early.
+    consensus_threshold ends the debate after any round in which all jurors'
+    verdicts agree (see reached_consensus); every final verdict records the
+    rounds actually run in "debate_rounds_run".
+    debate_strategy is 'one-by-one' (each juror sees the statements made
+    before it in the same round) or 'simultaneous' (all jurors of a round
+    answer concurrently, seeing only the previous round's statements).
     """
     num_agents = len(jury_models)
     agent_histories = [[] for _ in range(num_agents)]
-    independent_reports = []
 
     # --- THE TWO INDEPENDENT CONTEXTS ---
     # 1. Strictly the current exchange
     isolated_interaction = f"### CURRENT EXCHANGE ###\n{interaction}"
     
-    # 2. The full rolling context
-    contextual_interaction = (
+    # 2. The full rolling context, kept as (history, current exchange) so the
+    # audits can mark the history alone as the cacheable prefix (see jury_messages)
+    rolling_parts = (
         f"### ROLLING CONVERSATION HISTORY ###\n"
-        f"{conversation_history if conversation_history else '(This is the first turn)'}\n\n"
-        f"### CURRENT EXCHANGE ###\n"
-        f"{interaction}"
+        f"{conversation_history if conversation_history else '(This is the first turn)'}\n\n",
+        isolated_interaction,
     )
+    contextual_interaction = "".join(rolling_parts)
 
     # --- PHASE 1: INDEPENDENT ANALYSIS ---
+    # Every (juror, context, dimension) audit is independent, so they are all
+    # dispatched at once and reassembled into the per-juror report afterwards.
     log.info("Phase 1: Running Independent Multi-Dimensional Audits (Isolated vs. Rolling)...")
-    for i, model in enumerate(jury_models):
-        persona = JURY_PERSONAS[i % len(JURY_PERSONAS)]['persona']
-        
+    contexts = {
         # Call 1: Evaluate JUST the isolated exchange
-        isolated_report = {
-            "global": get_expert_opinion(model, persona, isolated_interaction, JURY_SYSTEM_PROMPT),
-            "identity": get_expert_opinion(model, persona, isolated_interaction, ROLE_IDENTITY_PROMPT),
-            "knowledge": get_expert_opinion(model, persona, isolated_interaction, KNOWLEDGE_EVAL_PROMPT),
-            "rejection": get_expert_opinion(model, persona, isolated_interaction, REJECTION_EVAL_PROMPT)
-        }
-        
+        "isolated_evaluation": isolated_interaction,
         # Call 2: Evaluate the exchange GIVEN the entire conversation
-        rolling_report = {
-            "global": get_expert_opinion(model, persona, contextual_interaction, JURY_SYSTEM_PROMPT),
-            "identity": get_expert_opinion(model, persona, contextual_interaction, ROLE_IDENTITY_PROMPT),
-            "knowledge": get_expert_opinion(model, persona, contextual_interaction, KNOWLEDGE_EVAL_PROMPT),
-            "rejection": get_expert_opinion(model, persona, contextual_interaction, REJECTION_EVAL_PROMPT)
-        }
-        
-        # Bundle both reports for this specific juror
-        report = {
-            "isolated_evaluation": isolated_report,
-            "rolling_evaluation": rolling_report
-        }
-        independent_reports.append(report)
+        "rolling_evaluation": rolling_parts,
+    }
+    if not include_isolated:
+        del contexts["isolated_evaluation"]
+    dimensions = {
+        "global": JURY_SYSTEM_PROMPT,
+        "identity": ROLE_IDENTITY_PROMPT,
+        "knowledge": KNOWLEDGE_EVAL_PROMPT,
+        "rejection": REJECTION_EVAL_PROMPT,
+    }
+    dimensions.update(prompts or {})
+
+    audits = []
+    for i, model in enumerate(jury_models):
+        persona = JURY_PERSONAS[i % len(JURY_PERSONAS)]['persona']
+        for context_key, context_interaction in contexts.items():
+            # Usage labels follow each audit onto its worker thread
+            usage_labels = {"purpose": "audit", "juror": i, "context": context_key.split("_")[0]}
+            if audit_mode == "combined":
+                record = {}
+                call = partial(get_combined_opinion, model, persona, context_interaction, dimensions)
+                audits.append((i, context_key, "combined", record,
+                               partial(llm_usage.labelled, partial(run_audit, call, record, empty=dict.fromkeys(dimensions, "")),
+                                       **usage_labels, dimension="combined")))
+                continue
+            for dimension, prompt in dimensions.items():
+                record = {}
+                call = partial(get_expert_opinion, model, persona, context_interaction, prompt)
+                audits.append((i, context_key, dimension, record,
+                               partial(llm_usage.labelled, partial(run_audit, call, record),
+                                       **usage_labels, dimension=dimension)))
+
+    with tracing.span("phase1_audits", audits=len(audits)):
+        results = jury_engine.fan_out(call for *_, call in audits)
+
+    # Bundle both reports for each juror, in the original juror order.
+    # call_meta keeps attempts/latency/errors of every audit next to its answer.
+    independent_reports = [{context_key: {} for context_key in contexts} for _ in jury_models]
+    for report in independent_reports:
+        report["call_meta"] = {context_key: {} for context_key in contexts}
+    for (i, context_key, dimension, record, _), result in zip(audits, results):
+        if dimension == "combined":
+            independent_reports[i][context_key].update(result)
+        else:
+            independent_reports[i][context_key][dimension] = result
+        independent_reports[i]["call_meta"][context_key][dimension] = record
 
     if jury_mode == "independent":
         num_rounds = 0
         return independent_reports
 
-    # --- PHASE 2: MULTI-AGENT DEBATE (ChatEval One-By-One Strategy) ---
+    # --- PHASE 2: MULTI-AGENT DEBATE (ChatEval One-By-One or Simultaneous-Talk Strategy) ---
+    findings = [{k: v for k, v in report.items() if k != "call_meta"} for report in independent_reports]
+    debate_meta = [[] for _ in jury_models]
+
+    def debate_turn(i, model, r, statements_header, statements):
+        """One juror's statement in round r, given the (juror index, statement) pairs it may see."""
+        persona_cfg = JURY_PERSONAS[i % len(JURY_PERSONAS)]
+
+        # Construct the 'Courtroom' prompt
+        if r == 0:
+            user_content = (
+                f"Your Independent Audit Findings (containing both Isolated and Rolling perspectives):\n"
+                f"{json.dumps(findings[i], indent=2)}\n\n"
+                f"Full Interaction Context:\n{contextual_interaction}\n\n"
+            )
+        else:
+            user_content = "The debate continues. Review the updated arguments and prepare your final conclusion.\n"
+
+        # Add context from other evaluators
+        if statements:
+            user_content += statements_header
+            for j, prev_resp in statements:
+                user_content += f"Juror {j+1} ({JURY_PERSONAS[j % len(JURY_PERSONAS)]['role']}): {prev_resp[:300]}...\n\n"
+
+        user_content += "Discuss your reasoning. Reconcile the isolated score with the rolling score. If this is the final round, you MUST include the consolidated JSON block."
+
+        messages = [
+            {"role": "system", "content": f"{persona_cfg['persona']}\n{FINAL_JSON_RUBRIC}"}
+        ] + agent_histories[i] + [{"role": "user", "content": user_content}]
+
+        record = {}
+        if stream_debate:
+            call = partial(stream_completion, model=model, messages=messages, accept=is_final_verdict)
+        else:
+            call = partial(create_completion, model=model, messages=messages)
+        with llm_usage.labels(purpose="debate", juror=i, round=r + 1):
+            res = run_audit(call, record, empty=None)
+        response = (res.choices[0].message.content or "") if res is not None else ""
+        debate_meta[i].append(record)
+
+        agent_histories[i].append({"role": "user", "content": user_content})
+        agent_histories[i].append({"role": "assistant", "content": response})
+        return response
+
+    rounds_run = 0
+    round_responses = []
     for r in range(num_rounds):
         log.info(f"Phase 2: Debate Round {r + 1}/{num_rounds}")
-        round_responses = []
-
-        for i, model in enumerate(jury_models):
-            persona_cfg = JURY_PERSONAS[i % len(JURY_PERSONAS)]
-            
-            # Construct the 'Courtroom' prompt
-            if r == 0:
-                user_content = (
-                    f"Your Independent Audit Findings (containing both Isolated and Rolling perspectives):\n"
-                    f"{json.dumps(independent_reports[i], indent=2)}\n\n"
-                    f"Full Interaction Context:\n{contextual_interaction}\n\n"
+        with tracing.span("debate_round", round=r + 1, strategy=debate_strategy):
+            if debate_strategy == "simultaneous":
+                # All jurors speak at once, each seeing the others' statements from the previous round
+                previous = round_responses
+                round_responses = jury_engine.fan_out(
+                    partial(debate_turn, i, model, r, "Other jurors' statements in the previous round:\n",
+                            [(j, resp) for j, resp in enumerate(previous) if j != i])
+                    for i, model in enumerate(jury_models)
                 )
             else:
-                user_content = "The debate continues. Review the updated arguments and prepare your final conclusion.\n"
-
-            # Add context from other evaluators (One-By-One communication)
-            if round_responses:
-                user_content += "Other jurors' statements in this round:\n"
-                for j, prev_resp in enumerate(round_responses):
-                    user_content += f"Juror {j+1} ({JURY_PERSONAS[j%3]['role']}): {prev_resp[:300]}...\n\n"
-
-            user_content += "Discuss your reasoning. Reconcile the isolated score with the rolling score. If this is the final round, you MUST include the consolidated JSON block."
-
-            messages = [
-                {"role": "system", "content": f"{persona_cfg['persona']}\n{FINAL_JSON_RUBRIC}"}
-            ] + agent_histories[i] + [{"role": "user", "content": user_content}]
-
-            res = get_client().chat.completions.create(model=model, messages=messages)
-            response = res.choices[0].message.content
-            
-            round_responses.append(response)
-            agent_histories[i].append({"role": "user", "content": user_content})
-            agent_histories[i].append({"role": "assistant", "content": response})
+                # One-By-One: each juror sees the statements made before it in this round
+                round_responses = []
+                for i, model in enumerate(jury_models):
+                    round_responses.append(debate_turn(i, model, r, "Other jurors' statements in this round:\n",
+                                                       list(enumerate(round_responses))))
+
+        rounds_run = r + 1
+        if (consensus_threshold is not None and rounds_run < num_rounds
+                and reached_consensus(round_responses, consensus_threshold)):
+            log.info(f"Phase 2: Jurors agree after round {rounds_run}, ending the debate early")
+            break
 
     # --- PHASE 3: FINAL PARSING ---
     final_scores = []
-    for resp in round_responses:
-        try:
-            match = re.search(r'(\{.*\})', resp, re.DOTALL)
-            if match:
-                final_scores.append(json.loads(match.group(1)))
-        except:
-            continue
+    with tracing.span("final_parsing", responses=len(round_responses)) as span:
+        for i, resp in enumerate(round_responses):
+            score = parse_verdict(resp)
+            if score is None:
+                continue
+            if isinstance(score, dict):
+                score["call_meta"] = debate_meta[i]
+                score["debate_rounds_run"] = rounds_run
+            final_scores.append(score)
+        span.set(parsed=len(final_scores))
             
     return final_scores
 
-def role_play(output_obj, role_play_llm_model, interrogator_llm_model, jury, max_turns, jury_mode, debate_rounds):
+def role_play(output_obj, role_play_llm_model, interrogator_llm_model, jury, max_turns, jury_mode, debate_rounds, jury_options=None,
+              new_context=rolling_context.RollingContext, jury_pipeline=0):
+    """
+    jury_pipeline > 0 lets the jury evaluate each turn in the background
+    (at most jury_pipeline unfinished at once) while the next question and
+    answer are typed; results are collected in turn order once the session ends.
+    """
     log.info(f"Tech Support Model: {role_play_llm_model}")
     log.info(f"Interrogator Model: {interrogator_llm_model}")
     log.info(f"Jury Models: {jury}")
@@ -419,65 +826,83 @@ def role_play(output_obj, role_play_llm_model, interrogator_llm_model, jury, max
         {"role": "user", "content": "Please generate the first question to start the conversation. Output only the question text."}
     ]
 
-    conversation_history = ""
-
-    for turn in range(max_turns):
-        log.info(f"--- Turn {turn + 1}/{max_turns} ---")
-
-        # --- Step 1: Interrogator generates a question ---
-        # interrogator_res = make_api_call(
-        #     model=interrogator_llm_model,
-        #     messages=interrogator_messages
-        # )
-        # question = interrogator_res.choices[0].message.content
-        question=input()
-        log.info(f"Interrogator asks: {question}")
-
-        # Add the question to the Tech Support's history
-        tech_support_messages.append({"role": "user", "content": question})
+    # Rolling history sent to the jury (token-budgeted when new_context is configured to be)
+    conversation_history = new_context()
+    run_usage = llm_usage.Rollup()
+    turns = []
+
+    with jury_engine.Pipeline(jury_pipeline) as jury_queue:
+        for turn in range(max_turns):
+            log.info(f"--- Turn {turn + 1}/{max_turns} ---")
+
+            # --- Step 1: Interrogator generates a question ---
+            # interrogator_res = make_api_call(
+            #     model=interrogator_llm_model,
+            #     messages=interrogator_messages
+            # )
+            # question = interrogator_res.choices[0].message.content
+            question=input()
+            log.info(f"Interrogator asks: {question}")
+
+            # Add the question to the Tech Support's history
+            tech_support_messages.append({"role": "user", "content": question})
         
-        # Add the question to Interrogator's history (as its own output)
-        interrogator_messages.append({"role": "assistant", "content": question})
-
-        # --- Step 2: Tech Support answers ---
-        # tech_res = make_api_call(
-        #     model=role_play_llm_model,
-        #     messages=tech_support_messages
-        # )
-        # answer = tech_res.choices[0].message.content
-        answer=input()
-        log.info(f"Tech Support answers: {answer}")
-
-        # Add answer to Tech Support history
-        tech_support_messages.append({"role": "assistant", "content": answer})
-
-        conversation_history += f"Question: {question}\nAnswer: {answer}"
-
-        # --- Step 3: Jury Judges ---
-        scores = judge_response(
-            jury,
-            f"Question: {question}\nAnswer: {answer}",
-            jury_mode,
-            conversation_history,
-            debate_rounds
-        )
-
-        # --- Step 4: Record Interaction ---
+            # Add the question to Interrogator's history (as its own output)
+            interrogator_messages.append({"role": "assistant", "content": question})
+
+            # --- Step 2: Tech Support answers ---
+            # tech_res = make_api_call(
+            #     model=role_play_llm_model,
+            #     messages=tech_support_messages
+            # )
+            # answer = tech_res.choices[0].message.content
+            answer=input()
+            log.info(f"Tech Support answers: {answer}")
+
+            # Add answer to Tech Support history
+            tech_support_messages.append({"role": "assistant", "content": answer})
+
+            # --- Step 3: Jury Judges ---
+            # (in the background with jury_pipeline; its calls still land in this turn's collector)
+            with llm_usage.collect() as turn_calls:
+                conversation_history.add(f"Question: {question}\nAnswer: {answer}")
+                judge = partial(
+                    judge_response,
+                    jury,
+                    f"Question: {question}\nAnswer: {answer}",
+                    jury_mode,
+                    conversation_history.render(),
+                    debate_rounds,
+                    **(jury_options or {})
+                )
+                jury_queue.submit(partial(tracing.traced, "jury", judge, turn=turn + 1))
+            turns.append(({"turn": turn + 1, "question": question, "answer": answer}, turn_calls))
+
+            # --- Step 4: Feed answer back to Interrogator for next turn ---
+            # We tell the interrogator what the support agent said so it can follow up
+            interrogator_messages.append({
+                "role": "user", 
+                "content": f"The tech support replied: \"{answer}\". \nBased on this response, generate the next follow-up question to test if they are a bot. Output only the question."
+            })
+
+        # Wait for the jury to finish every turn before the output is written
+        with tracing.span("jury_drain", turns=max_turns):
+            all_scores = jury_queue.drain()
+
+    # --- Step 5: Record Interactions ---
+    for (record, turn_calls), scores in zip(turns, all_scores):
+        run_usage.add_calls(turn_calls)
         output_obj["interaction"].append(
             {
-                "turn": turn + 1,
-                "question": question,
-                "answer": answer,
-                "jury_scores": scores
+                **record,
+                "jury_scores": scores,
+                "usage": llm_usage.totals(turn_calls),
+                "llm_calls": turn_calls
             }
         )
 
-        # --- Step 5: Feed answer back to Interrogator for next turn ---
-        # We tell the interrogator what the support agent said so it can follow up
-        interrogator_messages.append({
-            "role": "user", 
-            "content": f"The tech support replied: \"{answer}\". \nBased on this response, generate the next follow-up question to test if they are a bot. Output only the question."
-        })
+    output_obj["rolling_context"] = conversation_history.stats()
+    output_obj["usage"] = run_usage.to_dict()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -499,6 +924,19 @@ def main():
 
     parser.add_argument("--debate-rounds", type=int, default=2, help="Number of jury debate rounds (ChatEval strategy, optimal=2)")
     parser.add_argument("--jury-mode", choices=["independent", "debate"], default="debate", help="Jury evaluation strategy: 'debate' (ChatEval, default) or 'independent' (simple parallel scoring)")
+    parser.add_argument("--jury-concurrency", type=int, default=jury_engine.DEFAULT_MAX_CONCURRENCY, help="Max LLM requests in flight at once (Phase 1 audits are dispatched concurrently; 1 = serial)")
+    parser.add_argument("--audit-mode", choices=AUDIT_MODES, default="per-dimension", help="Phase 1 audits: one request per dimension, or all four dimensions in one structured request")
+    parser.add_argument("--debate-strategy", choices=DEBATE_STRATEGIES, default="one-by-one", help="Debate turn-taking: 'one-by-one' (ChatEval, each juror sees earlier statements of the round) or 'simultaneous' (jurors of a round answer concurrently)")
+    parser.add_argument("--debate-streaming", action="store_true", help="Stream debate turns and stop each one as soon as its final JSON verdict is complete")
+    parser.add_argument("--debate-consensus", type=float, default=None, metavar="SPREAD", help="End the debate early once all jurors name the same role identity and their global_human_scores lie within SPREAD (e.g. 0.1)")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint to call instead of OpenRouter (env: LLM_BASE_URL)")
+    parser.add_argument("--jury-pipeline", type=int, default=0, metavar="DEPTH", help="Evaluate turns in the background while the next question and answer are typed, with at most DEPTH evaluations unfinished (0 = wait for the jury after every turn)")
+    llm_cache.add_cli_args(parser)
+    rate_limit.add_cli_args(parser)
+    resilience.add_cli_args(parser)
+    rolling_context.add_cli_args(parser)
+    llm_usage.add_cli_args(parser)
+    tracing.add_cli_args(parser)
 
 
     args = parser.parse_args()
@@ -510,6 +948,13 @@ def main():
     max_turns = args.max_turns
     debate_rounds = args.debate_rounds
     jury_mode = args.jury_mode
+    jury_engine.set_max_concurrency(args.jury_concurrency)
+    set_base_url(args.base_url)
+    cache = llm_cache.configure_from_args(args)
+    rate_limit.configure_from_args(args)
+    resilience.configure_from_args(args)
+    llm_usage.configure_from_args(args)
+    tracing.configure_from_args(args)
 
     if not output_file_path:
         output_file_path = f"output/{datetime.now().strftime('%Y-%m-%d_%H-%M-%S.json')}"
@@ -518,6 +963,12 @@ def main():
         "role_play_llm_model": role_play_llm_model,
         "interrogator_llm_model": interrogator_llm_model,
         "jury": jury_llm_models,
+        "audit_mode": args.audit_mode,
+        "debate_strategy": args.debate_strategy,
+        "debate_streaming": args.debate_streaming,
+        "debate_consensus": args.debate_consensus,
+        "jury_pipeline": args.jury_pipeline,
+        "context_budget": args.context_budget,
         "interaction": []
     }
 
@@ -528,13 +979,25 @@ def main():
         jury=jury_llm_models,
         max_turns=max_turns,
         debate_rounds=debate_rounds,
-        jury_mode=jury_mode
+        jury_mode=jury_mode,
+        jury_options={"audit_mode": args.audit_mode, "debate_strategy": args.debate_strategy,
+                      "stream_debate": args.debate_streaming, "consensus_threshold": args.debate_consensus},
+        new_context=rolling_context.factory_from_args(args, summarize_exchanges, jury_llm_models[0]),
+        jury_pipeline=args.jury_pipeline
     )
 
+    if cache is not None:
+        log.info(f"LLM cache: {cache.stats()}")
+    log.info(f"Rate limits: {rate_limit.stats()}")
+    log.info(f"Circuit breakers: {resilience.stats()}")
+    log.info(f"Usage: {output_obj['usage']['calls']} calls, {output_obj['usage']['prompt_tokens']} prompt tokens "
+             f"({output_obj['usage']['cached_tokens']} cached), ${output_obj['usage']['cost_usd']:.4f}")
+
     log.info(f"Writing output to: {output_file_path}")
 
-    with open(output_file_path, "wt+") as output_file:
+    with tracing.span("write_output"), open(output_file_path, "wt+") as output_file:
         json.dump(output_obj, output_file, indent=4)
+    tracing.flush()
 
 
 if __name__ == "__main__":
@@ -1,16 +1,14 @@
 # Please install OpenAI SDK first: `pip3 install openai`
-import os
-from openai import OpenAI
 import argparse
-import logging
-import sys
 import json
+from functools import partial
 
-client = OpenAI(
-    api_key=os.getenv("OPEN_ROUTER_API_KEY"),
-    # base_url="https://api.deepseek.com"
-    base_url="https://openrouter.ai/api/v1"
-)
+import llm_usage
+import rate_limit
+import resilience
+# The API client, retry policy and rate limits are shared with the main
+# framework (built lazily, endpoint configurable through LLM_BASE_URL / --base-url)
+from role_play_framework import make_api_call, run_audit, set_base_url, log
 
 SYSTEM_ROLE_PROMPT = """
 You are a friendly, knowledgeable tech support specialist for a software company. 
@@ -90,38 +88,10 @@ Output either "Yes, it rejects the question" or "No, it answers the question".
 
 
 
-def setup_logger():
-    # 1. Create a custom logger
-    logger = logging.getLogger("my_app")
-    logger.setLevel(logging.DEBUG)  # Capture everything from DEBUG level up
-
-    # 2. Create formatters
-    console_format = logging.Formatter('%(asctime)s - %(levelname)s: %(message)s')
-
-    # 3. Create Handlers
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG)  # Show everything in the terminal
-    console_handler.setFormatter(console_format)
-
-    # 4. Add handlers to the logger
-    logger.addHandler(console_handler)
-
-    return logger
-
-log = setup_logger()
-
-def make_api_call(model, messages):
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        stream=False
-    )
-    return response
-
 def judge_response(jury, interaction):
     jury_evaluations = []
 
-    for judge in jury:
+    for j, judge in enumerate(jury):
         log.info(f"Running jury evaluation for judge: {judge}")
         
         eval_result = {
@@ -129,7 +99,9 @@ def judge_response(jury, interaction):
             "human_bot_score": 0.0,
             "role_identity": "",
             "knowledge_score": "",
-            "rejection_status": ""
+            "rejection_status": "",
+            # attempts/latency/errors of each call, next to the answer it produced
+            "call_meta": {"global": {}, "identity": {}, "knowledge": {}, "rejection": {}}
         }
 
         # 1. Original Human/Bot test
@@ -138,8 +110,9 @@ def judge_response(jury, interaction):
                 {"role": "system", "content": JURY_SYSTEM_PROMPT},
                 {"role": "user", "content": interaction}
             ]
-            res = make_api_call(judge, messages)
-            unparsed_score = res.choices[0].message.content
+            with llm_usage.labels(purpose="audit", juror=j, context="isolated", dimension="global"):
+                res = run_audit(partial(make_api_call, judge, messages), eval_result["call_meta"]["global"], empty=None)
+            unparsed_score = res.choices[0].message.content if res is not None else ""
             # Basic parsing logic to extract scores
             score = unparsed_score.split(",")[0].split("=")[-1].strip()
             eval_result["human_bot_score"] = float(score)
@@ -152,8 +125,9 @@ def judge_response(jury, interaction):
                 {"role": "system", "content": ROLE_IDENTITY_PROMPT},
                 {"role": "user", "content": interaction}
             ]
-            res = make_api_call(judge, messages)
-            eval_result["role_identity"] = res.choices[0].message.content.strip()
+            with llm_usage.labels(purpose="audit", juror=j, context="isolated", dimension="identity"):
+                res = run_audit(partial(make_api_call, judge, messages), eval_result["call_meta"]["identity"], empty=None)
+            eval_result["role_identity"] = res.choices[0].message.content.strip() if res is not None else ""
         except Exception as e:
             log.error(f"Failed to get role identity from {judge}: {e}")
 
@@ -163,8 +137,9 @@ def judge_response(jury, interaction):
                 {"role": "system", "content": KNOWLEDGE_EVAL_PROMPT},
                 {"role": "user", "content": interaction}
             ]
-            res = make_api_call(judge, messages)
-            eval_result["knowledge_score"] = res.choices[0].message.content.strip()
+            with llm_usage.labels(purpose="audit", juror=j, context="isolated", dimension="knowledge"):
+                res = run_audit(partial(make_api_call, judge, messages), eval_result["call_meta"]["knowledge"], empty=None)
+            eval_result["knowledge_score"] = res.choices[0].message.content.strip() if res is not None else ""
         except Exception as e:
             log.error(f"Failed to get knowledge score from {judge}: {e}")
 
@@ -174,8 +149,9 @@ def judge_response(jury, interaction):
                 {"role": "system", "content": REJECTION_EVAL_PROMPT},
                 {"role": "user", "content": interaction}
             ]
-            res = make_api_call(judge, messages)
-            eval_result["rejection_status"] = res.choices[0].message.content.strip()
+            with llm_usage.labels(purpose="audit", juror=j, context="isolated", dimension="rejection"):
+                res = run_audit(partial(make_api_call, judge, messages), eval_result["call_meta"]["rejection"], empty=None)
+            eval_result["rejection_status"] = res.choices[0].message.content.strip() if res is not None else ""
         except Exception as e:
             log.error(f"Failed to get rejection status from {judge}: {e}")
 
@@ -201,47 +177,56 @@ def role_play(output_obj, role_play_llm_model, interrogator_llm_model, jury, max
         {"role": "user", "content": "Please generate the first question to start the conversation. Output only the question text."}
     ]
 
+    run_usage = llm_usage.Rollup()
+
     for turn in range(max_turns):
         log.info(f"--- Turn {turn + 1}/{max_turns} ---")
 
-        # --- Step 1: Interrogator generates a question ---
-        interrogator_res = make_api_call(
-            model=interrogator_llm_model,
-            messages=interrogator_messages
-        )
-        question = interrogator_res.choices[0].message.content
-        log.info(f"Interrogator asks: {question}")
-
-        # Add the question to the Tech Support's history
-        tech_support_messages.append({"role": "user", "content": question})
-        
-        # Add the question to Interrogator's history (as its own output)
-        interrogator_messages.append({"role": "assistant", "content": question})
-
-        # --- Step 2: Tech Support answers ---
-        tech_res = make_api_call(
-            model=role_play_llm_model,
-            messages=tech_support_messages
-        )
-        answer = tech_res.choices[0].message.content
-        log.info(f"Tech Support answers: {answer}")
-
-        # Add answer to Tech Support history
-        tech_support_messages.append({"role": "assistant", "content": answer})
-
-        # --- Step 3: Jury Judges ---
-        scores = judge_response(
-            jury,
-            f"Question: {question}\nAnswer: {answer}"
-        )
+        # Every LLM call of the turn (interrogator, target, jury) is accounted to it
+        with llm_usage.collect() as turn_calls:
+            # --- Step 1: Interrogator generates a question ---
+            with llm_usage.labels(purpose="interrogator"):
+                interrogator_res = make_api_call(
+                    model=interrogator_llm_model,
+                    messages=interrogator_messages
+                )
+            question = interrogator_res.choices[0].message.content
+            log.info(f"Interrogator asks: {question}")
+
+            # Add the question to the Tech Support's history
+            tech_support_messages.append({"role": "user", "content": question})
+            
+            # Add the question to Interrogator's history (as its own output)
+            interrogator_messages.append({"role": "assistant", "content": question})
+
+            # --- Step 2: Tech Support answers ---
+            with llm_usage.labels(purpose="target"):
+                tech_res = make_api_call(
+                    model=role_play_llm_model,
+                    messages=tech_support_messages
+                )
+            answer = tech_res.choices[0].message.content
+            log.info(f"Tech Support answers: {answer}")
+
+            # Add answer to Tech Support history
+            tech_support_messages.append({"role": "assistant", "content": answer})
+
+            # --- Step 3: Jury Judges ---
+            scores = judge_response(
+                jury,
+                f"Question: {question}\nAnswer: {answer}"
+            )
 
         # --- Step 4: Record Interaction ---
+        run_usage.add_calls(turn_calls)
         output_obj["interaction"].append(
             {
                 "turn": turn + 1,
                 "question": question,
                 "answer": answer,
-                "jury_scores": scores
+                "jury_scores": scores,
+                "usage": llm_usage.totals(turn_calls),
+                "llm_calls": turn_calls
             }
         )
 
@@ -252,6 +237,8 @@ def role_play(output_obj, role_play_llm_model, interrogator_llm_model, jury, max
             "content": f"The tech support replied: \"{answer}\". \nBased on this response, generate the next follow-up question to test if they are a bot. Output only the question."
         })
 
+    output_obj["usage"] = run_usage.to_dict()
+
 def main():
     parser = argparse.ArgumentParser(
         description="Framework for LLM Role Play with Dynamic Interrogator"
@@ -270,7 +257,16 @@ def main():
     # Added argument to control length of conversation
     parser.add_argument("--max-turns", type=int, default=7, help="Number of exchanges to perform")
 
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint to call instead of OpenRouter (env: LLM_BASE_URL)")
+    rate_limit.add_cli_args(parser)
+    resilience.add_cli_args(parser)
+    llm_usage.add_cli_args(parser)
+
     args = parser.parse_args()
+    set_base_url(args.base_url)
+    rate_limit.configure_from_args(args)
+    resilience.configure_from_args(args)
+    llm_usage.configure_from_args(args)
 
     role_play_llm_model = args.role_play_llm_model
     interrogator_llm_model = args.interrogator_llm_model
@@ -293,6 +289,10 @@ def main():
         max_turns=max_turns
     )
 
+    log.info(f"Rate limits: {rate_limit.stats()}")
+    log.info(f"Circuit breakers: {resilience.stats()}")
+    log.info(f"Usage: {output_obj['usage']['calls']} calls, {output_obj['usage']['prompt_tokens']} prompt tokens "
+             f"({output_obj['usage']['cached_tokens']} cached), ${output_obj['usage']['cost_usd']:.4f}")
     log.info(f"Writing output to: {output_file_path}")
 
     with open(output_file_path, "wt+") as output_file:
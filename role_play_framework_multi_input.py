@@ -1,18 +1,24 @@
 # Please install OpenAI SDK first: `pip3 install openai`
 import os
-from openai import OpenAI
+import glob
+import time
 from datetime import datetime
 import argparse
-import logging
-import sys
 import json
 import re
-
-client = OpenAI(
-    api_key=os.getenv("OPEN_ROUTER_API_KEY"),
-    # base_url="https://api.deepseek.com"
-    base_url="https://openrouter.ai/api/v1"
-)
+from functools import partial
+from openai import APIError
+
+import jury_engine
+import llm_cache
+import llm_usage
+import rate_limit
+import resilience
+import rolling_context
+import tracing
+# The client, jury (prompts, personas, audits and debate) and API helpers are
+# shared with the main framework
+from role_play_framework import judge_response, make_api_call, set_base_url, log, summarize_exchanges, AUDIT_MODES, DEBATE_STRATEGIES
 
 # --- PROMPT DEFINITIONS ---
 SYSTEM_ROLE_PROMPT = """
@@ -35,100 +41,6 @@ Have a normal human like conversation with the tech support person on the other
 Your goal is to secretly determine if they are a human or a bot without being obvious.
 """
 
-JURY_SYSTEM_PROMPT = """
-You are evaluating a transcript to determine if the entity on the other end is a human or an AI bot.
-Keep in mind the context may be customer service, technical support, telemarketing, or even a scam call. 
-
-CRITICAL INSTRUCTIONS:
-1. "Scripted" does NOT automatically mean AI. Human call center agents and telemarketers read heavily from rigid scripts (e.g., standard greetings, legal disclaimers, escalation protocols).
-2. Humans often use sarcasm, defensiveness, or humor (trolling) when dealing with annoying calls. Bots rarely do this naturally.
-3. Sudden changes in tone—from rigidly scripted to emotionally reactive—are strong indicators of a human.
-
-On a scale of 0.0 to 1.0, rate if the entity is a human or a bot (1.0 = absolutely sure human, 0.0 = absolutely sure bot).
-The response should start with:
-HUMAN_SCORE=$human_score
-"""
-
-ROLE_IDENTITY_PROMPT = """
-Evaluate the Consistent Role Identity of the responder.
-The possible identities for the character are as follows:
-- [Tech Support Specialist] A friendly, knowledgeable tech support specialist for a software company.
-- [AI Assistant] A generic AI assistant admitting to being a language model.
-- [Unrelated Identity] Any other character or identity.
-
-Please select the character identity that best fits the responder in the current conversation. 
-Output ONLY the selected identity in brackets, e.g., [Tech Support Specialist].
-"""
-
-KNOWLEDGE_EVAL_PROMPT = """
-Please act as an impartial judge and evaluate the Accurate Role-related Knowledge of the response.
-Determine if the responder provides accurate, plausible, and helpful technical support knowledge without breaking character.
-Evaluate on a scale of 1 to 10.
-Output format:
-Score: <Score>. Explanation: <Brief explanation>
-"""
-
-REJECTION_EVAL_PROMPT = """
-Evaluate Unknown Question Rejection.
-Please determine whether the responder refuses to answer the question due to limited knowledge, out-of-scope queries (e.g., questions not related to tech support), or system limitations, just as a real human tech support agent would.
-Output either "Yes, it rejects the question" or "No, it answers the question".
-"""
-
-FINAL_JSON_RUBRIC = """
-Based on your independent findings and the debate below, provide a final JSON:
-{
-  "global_human_score": float,
-  "role_identity": "string",
-  "knowledge_score": int,
-  "rejection_status": "string",
-  "consensus_level": "High/Low",
-  "justification": "string"
-}
-"""
-
-JURY_PERSONAS = [
-    {
-        "role": "Psychologist",
-        "persona": "You are a behavioral psychologist specializing in human-computer interaction. "
-        "You analyze whether responses reflect genuine human cognition — inconsistencies, "
-        "emotional variability, situational improvisation, and the kinds of cognitive shortcuts "
-        "or tangential remarks that humans naturally produce but AI systems typically avoid."
-    },
-    {
-        "role": "Manager", 
-        "persona":  "You are a veteran customer service manager with 20 years of experience training human support agents. "
-        "You evaluate based on whether the response style, situational awareness, personal touches, "
-        "and adaptability match what a real human agent would produce — not a well-trained chatbot."
-    }
-]
-
-# --- UTILITIES ---
-def setup_logger():
-    logger = logging.getLogger("my_app")
-    logger.setLevel(logging.DEBUG)
-    console_format = logging.Formatter('%(asctime)s - %(levelname)s: %(message)s')
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
-    return logger
-
-log = setup_logger()
-
-def make_api_call(model, messages):
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        stream=False
-    )
-    return response
-
-def get_expert_opinion(model, persona, interaction, prompt):
-    messages = [{"role": "system", "content": f"{persona}\n{prompt}"},
-                {"role": "user", "content": f"Interaction:\n{interaction}"}]
-    res = client.chat.completions.create(model=model, messages=messages)
-    return res.choices[0].message.content.strip()
-
 # --- TRANSCRIPT PARSING LOGIC ---
 def parse_transcript(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -169,89 +81,21 @@ def parse_transcript(file_path):
     log.info(f"Parsed {len(qa_pairs)} conversational exchanges from transcript.")
     return qa_pairs
 
-# --- EVALUATION LOGIC ---
-def judge_response(jury_models, interaction, jury_mode, conversation_history, num_rounds):
-    num_agents = len(jury_models)
-    agent_histories = [[] for _ in range(num_agents)]
-    independent_reports = []
-
-    isolated_interaction = f"### CURRENT EXCHANGE ###\n{interaction}"
-    contextual_interaction = (
-        f"### ROLLING CONVERSATION HISTORY ###\n"
-        f"{conversation_history if conversation_history else '(This is the first turn)'}\n\n"
-        f"### CURRENT EXCHANGE ###\n"
-        f"{interaction}"
-    )
-
-    log.info("Phase 1: Running Independent Multi-Dimensional Audits (Isolated vs. Rolling)...")
-    for i, model in enumerate(jury_models):
-        persona = JURY_PERSONAS[i % len(JURY_PERSONAS)]['persona']
-        
-        isolated_report = {
-            "global": get_expert_opinion(model, persona, isolated_interaction, JURY_SYSTEM_PROMPT),
-            "identity": get_expert_opinion(model, persona, isolated_interaction, ROLE_IDENTITY_PROMPT),
-            "knowledge": get_expert_opinion(model, persona, isolated_interaction, KNOWLEDGE_EVAL_PROMPT),
-            "rejection": get_expert_opinion(model, persona, isolated_interaction, REJECTION_EVAL_PROMPT)
-        }
-        
-        rolling_report = {
-            "global": get_expert_opinion(model, persona, contextual_interaction, JURY_SYSTEM_PROMPT),
-            "identity": get_expert_opinion(model, persona, contextual_interaction, ROLE_IDENTITY_PROMPT),
-            "knowledge": get_expert_opinion(model, persona, contextual_interaction, KNOWLEDGE_EVAL_PROMPT),
-            "rejection": get_expert_opinion(model, persona, contextual_interaction, REJECTION_EVAL_PROMPT)
-        }
-        
-        independent_reports.append({
-            "isolated_evaluation": isolated_report,
-            "rolling_evaluation": rolling_report
-        })
-
-    if jury_mode == "independent":
-        return independent_reports
-
-    for r in range(num_rounds):
-        log.info(f"Phase 2: Debate Round {r + 1}/{num_rounds}")
-        round_responses = []
-
-        for i, model in enumerate(jury_models):
-            persona_cfg = JURY_PERSONAS[i % len(JURY_PERSONAS)]
-            
-            if r == 0:
-                user_content = (
-                    f"Your Independent Audit Findings:\n{json.dumps(independent_reports[i], indent=2)}\n\n"
-                    f"Full Interaction Context:\n{contextual_interaction}\n\n"
-                )
-            else:
-                user_content = "The debate continues. Review the updated arguments and prepare your final conclusion.\n"
-
-            if round_responses:
-                user_content += "Other jurors' statements in this round:\n"
-                for j, prev_resp in enumerate(round_responses):
-                    user_content += f"Juror {j+1} ({JURY_PERSONAS[j%3]['role']}): {prev_resp[:300]}...\n\n"
-
-            user_content += "Discuss your reasoning. Reconcile the isolated score with the rolling score. If this is the final round, you MUST include the consolidated JSON block."
-
-            messages = [{"role": "system", "content": f"{persona_cfg['persona']}\n{FINAL_JSON_RUBRIC}"}] + agent_histories[i] + [{"role": "user", "content": user_content}]
-
-            res = client.chat.completions.create(model=model, messages=messages)
-            response = res.choices[0].message.content
-            
-            round_responses.append(response)
-            agent_histories[i].extend([{"role": "user", "content": user_content}, {"role": "assistant", "content": response}])
-
-    final_scores = []
-    for resp in round_responses:
-        try:
-            match = re.search(r'(\{.*\})', resp, re.DOTALL)
-            if match:
-                final_scores.append(json.loads(match.group(1)))
-        except:
-            continue
-            
-    return final_scores
-
 # --- MAIN ROLEPLAY PIPELINE ---
-def role_play(output_obj, mode, role_play_llm_model, interrogator_llm_model, jury, max_turns, jury_mode, debate_rounds, qa_pairs=None):
+def role_play(output_obj, mode, role_play_llm_model, interrogator_llm_model, jury, max_turns, jury_mode, debate_rounds, qa_pairs=None, jury_options=None,
+              new_context=rolling_context.RollingContext, jury_pipeline=0, parallel_turns=False):
+    """
+    jury_pipeline > 0 takes the jury off the conversation's critical path:
+    each turn's evaluation runs in the background (at most jury_pipeline
+    unfinished at once) while the next turn is generated or typed, and results are
+    collected in turn order at the end. The interrogator and target never see
+    jury output, so the transcript and the scores are the same either way.
+
+    parallel_turns (transcript mode) goes all the way: every Q/A pair is known
+    up front, so the turns' interactions and rolling contexts are built in
+    order and all turns are judged at once, their requests sharing the
+    --jury-concurrency cap; the run takes about as long as its slowest turn.
+    """
     log.info(f"Running in MODE: {mode.upper()}")
     log.info(f"Jury Models: {jury}")
 
@@ -262,67 +106,212 @@ def role_play(output_obj, mode, role_play_llm_model, interrogator_llm_model, jur
         {"role": "user", "content": "Please generate the first question to start the conversation. Output only the question text."}
     ]
 
-    conversation_history = ""
-    
+    conversation_history = new_context()
+    run_usage = llm_usage.Rollup()
+
     # Determine how many iterations based on the mode
     num_iterations = len(qa_pairs) if mode == "transcript" else max_turns
+    if parallel_turns and mode == "transcript":
+        jury_pipeline = num_iterations
+    turns = []
+    with jury_engine.Pipeline(jury_pipeline) as jury_queue:
+        for turn_idx in range(num_iterations):
+            # Every LLM call of the turn (interrogator, target, jury, summary) is accounted to it
+            with llm_usage.collect() as turn_calls, tracing.span("turn", turn=turn_idx + 1):
+                log.info(f"\n--- Turn {turn_idx + 1}/{num_iterations} ---")
+
+                # --- INPUT ROUTING ---
+                if mode == "transcript":
+                    question = qa_pairs[turn_idx]["question"]
+                    answer = qa_pairs[turn_idx]["answer"]
+                    log.info(f"Interrogator asks (from transcript): {question}")
+                    log.info(f"Agent answers (from transcript): {answer}")
+
+                elif mode == "stdin":
+                    question = input("Enter Interrogator Question: ")
+                    log.info(f"Interrogator asks: {question}")
+                    answer = input("Enter Agent Answer: ")
+                    log.info(f"Agent answers: {answer}")
+
+                elif mode == "llm":
+                    # 1. LLM Interrogator Asks
+                    with llm_usage.labels(purpose="interrogator"), tracing.span("interrogator"):
+                        interrogator_res = make_api_call(model=interrogator_llm_model, messages=interrogator_messages)
+                    question = interrogator_res.choices[0].message.content
+                    log.info(f"Interrogator (LLM) asks: {question}")
+
+                    # Sync histories
+                    tech_support_messages.append({"role": "user", "content": question})
+                    interrogator_messages.append({"role": "assistant", "content": question})
+
+                    # 2. LLM Tech Support Answers
+                    with llm_usage.labels(purpose="target"), tracing.span("target"):
+                        tech_res = make_api_call(model=role_play_llm_model, messages=tech_support_messages)
+                    answer = tech_res.choices[0].message.content
+                    log.info(f"Tech Support (LLM) answers: {answer}")
+
+                    # Sync histories
+                    tech_support_messages.append({"role": "assistant", "content": answer})
+                    interrogator_messages.append({
+                        "role": "user", 
+                        "content": f"The tech support replied: \"{answer}\". \nBased on this response, generate the next follow-up question to test if they are a bot. Output only the question."
+                    })
+
+                # --- EVALUATION ---
+                conversation_history.add(f"Question: {question}\nAnswer: {answer}\n\n")
+
+                judge = partial(
+                    judge_response,
+                    jury_models=jury,
+                    interaction=f"Question: {question}\nAnswer: {answer}",
+                    jury_mode=jury_mode,
+                    conversation_history=conversation_history.render(),
+                    num_rounds=debate_rounds,
+                    **(jury_options or {})
+                )
+                # Jury calls made in the background still land in this turn's collector
+                jury_queue.submit(partial(tracing.traced, "jury", judge, turn=turn_idx + 1))
+            turns.append(({"turn": turn_idx + 1, "question": question, "answer": answer}, turn_calls))
 
-    for turn_idx in range(num_iterations):
-        log.info(f"\n--- Turn {turn_idx + 1}/{num_iterations} ---")
-        
-        # --- INPUT ROUTING ---
-        if mode == "transcript":
-            question = qa_pairs[turn_idx]["question"]
-            answer = qa_pairs[turn_idx]["answer"]
-            log.info(f"Interrogator asks (from transcript): {question}")
-            log.info(f"Agent answers (from transcript): {answer}")
-            
-        elif mode == "stdin":
-            question = input("Enter Interrogator Question: ")
-            log.info(f"Interrogator asks: {question}")
-            answer = input("Enter Agent Answer: ")
-            log.info(f"Agent answers: {answer}")
-            
-        elif mode == "llm":
-            # 1. LLM Interrogator Asks
-            interrogator_res = make_api_call(model=interrogator_llm_model, messages=interrogator_messages)
-            question = interrogator_res.choices[0].message.content
-            log.info(f"Interrogator (LLM) asks: {question}")
-            
-            # Sync histories
-            tech_support_messages.append({"role": "user", "content": question})
-            interrogator_messages.append({"role": "assistant", "content": question})
-
-            # 2. LLM Tech Support Answers
-            tech_res = make_api_call(model=role_play_llm_model, messages=tech_support_messages)
-            answer = tech_res.choices[0].message.content
-            log.info(f"Tech Support (LLM) answers: {answer}")
-            
-            # Sync histories
-            tech_support_messages.append({"role": "assistant", "content": answer})
-            interrogator_messages.append({
-                "role": "user", 
-                "content": f"The tech support replied: \"{answer}\". \nBased on this response, generate the next follow-up question to test if they are a bot. Output only the question."
-            })
-
-        # --- EVALUATION ---
-        conversation_history += f"Question: {question}\nAnswer: {answer}\n\n"
-
-        scores = judge_response(
-            jury_models=jury,
-            interaction=f"Question: {question}\nAnswer: {answer}",
-            jury_mode=jury_mode,
-            conversation_history=conversation_history,
-            num_rounds=debate_rounds
-        )
+        with tracing.span("jury_drain", turns=num_iterations):
+            all_scores = jury_queue.drain()
 
+    for (record, turn_calls), scores in zip(turns, all_scores):
+        run_usage.add_calls(turn_calls)
         output_obj["interaction"].append({
-            "turn": turn_idx + 1,
-            "question": question,
-            "answer": answer,
-            "jury_scores": scores
+            **record,
+            "jury_scores": scores,
+            "usage": llm_usage.totals(turn_calls),
+            "llm_calls": turn_calls
         })
 
+    output_obj["rolling_context"] = conversation_history.stats()
+    output_obj["usage"] = run_usage.to_dict()
+
+
+def is_batch_input(spec):
+    return os.path.isdir(spec) or any(ch in spec for ch in "*?[")
+
+
+def find_transcripts(spec):
+    """A directory (its *.txt files) or a glob -> sorted transcript paths."""
+    pattern = os.path.join(spec, "*.txt") if os.path.isdir(spec) else spec
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def new_output_obj(args, jury_llm_models):
+    output_obj = {
+        "evaluation_mode": args.mode,
+        "jury": jury_llm_models,
+        "audit_mode": args.audit_mode,
+        "debate_strategy": args.debate_strategy,
+        "debate_streaming": args.debate_streaming,
+        "debate_consensus": args.debate_consensus,
+        "jury_pipeline": args.jury_pipeline,
+        "parallel_turns": args.parallel_turns,
+        "context_budget": args.context_budget,
+        "interaction": []
+    }
+
+    if args.mode == "llm":
+        output_obj["role_play_llm_model"] = args.role_play_llm_model
+        output_obj["interrogator_llm_model"] = args.interrogator_llm_model
+    return output_obj
+
+
+def run_session(args, jury_llm_models, output_obj, qa_pairs=None):
+    role_play(
+        output_obj=output_obj,
+        mode=args.mode,
+        role_play_llm_model=args.role_play_llm_model,
+        interrogator_llm_model=args.interrogator_llm_model,
+        jury=jury_llm_models,
+        max_turns=args.max_turns,
+        jury_mode=args.jury_mode,
+        debate_rounds=args.debate_rounds,
+        qa_pairs=qa_pairs,
+        jury_options={"audit_mode": args.audit_mode, "debate_strategy": args.debate_strategy,
+                      "stream_debate": args.debate_streaming, "consensus_threshold": args.debate_consensus},
+        new_context=rolling_context.factory_from_args(args, summarize_exchanges, jury_llm_models[0]),
+        jury_pipeline=args.jury_pipeline,
+        parallel_turns=args.parallel_turns
+    )
+    return output_obj
+
+
+def write_json(path, obj):
+    """Write atomically, so an interrupted batch never leaves a half-written output that looks finished."""
+    tmp_path = f"{path}.tmp"
+    with tracing.span("write_output"), open(tmp_path, "wt", encoding="utf-8") as output_file:
+        json.dump(obj, output_file, indent=4)
+    os.replace(tmp_path, path)
+
+
+def evaluate_transcript(args, jury_llm_models, transcript_path, output_path):
+    """Evaluate one transcript of a batch and write its output; returns its manifest entry."""
+    start = time.monotonic()
+    entry = {"output": output_path}
+    try:
+        with tracing.span("transcript", path=transcript_path):
+            output_obj = new_output_obj(args, jury_llm_models)
+            output_obj["source_transcript"] = transcript_path
+            run_session(args, jury_llm_models, output_obj, parse_transcript(transcript_path))
+            write_json(output_path, output_obj)
+    except (OSError, ValueError, APIError, TimeoutError, resilience.CircuitOpenError) as e:
+        log.error(f"Transcript {transcript_path} failed: {type(e).__name__}: {e}")
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}"[:200])
+    else:
+        log.info(f"Transcript {transcript_path}: {len(output_obj['interaction'])} turns written to {output_path}")
+        entry.update(status="done", turns=len(output_obj["interaction"]), usage=output_obj["usage"])
+    entry["wall_time_s"] = round(time.monotonic() - start, 3)
+    return entry
+
+
+def run_batch(args, jury_llm_models, transcripts):
+    """
+    Evaluate many transcripts in one process (one client, one connection pool,
+    one global request cap), up to --batch-workers at a time. Transcripts whose
+    output already exists are skipped; the manifest records every transcript's
+    status and is rewritten as each one finishes.
+    """
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, "manifest.json")
+    manifest = {
+        "input": args.input_transcript,
+        "output_dir": args.output_dir,
+        "started": datetime.now().isoformat(),
+        "settings": {k: v for k, v in new_output_obj(args, jury_llm_models).items() if k != "interaction"},
+        "transcripts": {},
+        "usage": {},
+    }
+    batch_usage = llm_usage.Rollup()
+    pending = []
+    for path in transcripts:
+        output_path = os.path.join(args.output_dir, f"{os.path.splitext(os.path.basename(path))[0]}.json")
+        if os.path.exists(output_path):
+            log.info(f"Transcript {path}: output {output_path} already exists, skipping.")
+            manifest["transcripts"][path] = {"output": output_path, "status": "skipped"}
+            continue
+        pending.append((path, output_path))
+
+    log.info(f"Batch: {len(pending)} transcript(s) to evaluate, {len(transcripts) - len(pending)} skipped")
+    for index, entry in jury_engine.completed(
+            [partial(evaluate_transcript, args, jury_llm_models, path, output_path) for path, output_path in pending],
+            args.batch_workers):
+        manifest["transcripts"][pending[index][0]] = entry
+        batch_usage.merge(entry.get("usage", {}))
+        manifest["usage"] = batch_usage.to_dict()
+        write_json(manifest_path, manifest)
+
+    statuses = [entry["status"] for entry in manifest["transcripts"].values()]
+    manifest["finished"] = datetime.now().isoformat()
+    manifest["counts"] = {status: statuses.count(status) for status in ("done", "skipped", "failed")}
+    manifest["transcripts"] = dict(sorted(manifest["transcripts"].items()))
+    write_json(manifest_path, manifest)
+    log.info(f"Batch: {manifest['counts']}; manifest written to {manifest_path}")
+    return manifest
+
+
 def main():
     parser = argparse.ArgumentParser(description="Unified Evaluation Engine for Human/Bot Detection")
 
@@ -330,20 +319,48 @@ def main():
     parser.add_argument("--mode", choices=["stdin", "llm", "transcript"], required=True, 
                         help="Input mode: 'stdin' (manual input), 'llm' (auto-generate), 'transcript' (read file)")
     
-    parser.add_argument("--input-transcript", default=None, help="Path to transcript file (Required if mode=transcript)")
+    parser.add_argument("--input-transcript", default=None, help="Path to transcript file, or a directory / glob of them for a batch (Required if mode=transcript)")
     parser.add_argument("--output_file_path", default=None, help="Path to the output file")
+    parser.add_argument("--output-dir", default="output/batch", help="Batch mode: directory for the per-transcript outputs and manifest.json")
+    parser.add_argument("--batch-workers", type=int, default=4, help="Batch mode: transcripts evaluated at once (requests still share --jury-concurrency)")
     parser.add_argument("--role-play-llm-model", default="deepseek/deepseek-v3.2", help="The Tech Support Bot (for 'llm' mode)")
     parser.add_argument("--interrogator-llm-model", default="openai/gpt-5.4", help="The Bot generating questions (for 'llm' mode)")
     parser.add_argument("--jury-llm-models", default="openai/gpt-5.4", help="Comma separated LLM models that will be part of jury")
     parser.add_argument("--max-turns", type=int, default=7, help="Number of exchanges (ignored in 'transcript' mode)")
     parser.add_argument("--debate-rounds", type=int, default=2, help="Number of jury debate rounds")
     parser.add_argument("--jury-mode", choices=["independent", "debate"], default="debate", help="Jury evaluation strategy")
+    parser.add_argument("--jury-concurrency", type=int, default=jury_engine.DEFAULT_MAX_CONCURRENCY, help="Max LLM requests in flight at once (1 = serial)")
+    parser.add_argument("--audit-mode", choices=AUDIT_MODES, default="per-dimension", help="Phase 1 audits: one request per dimension, or all four in one structured request")
+    parser.add_argument("--debate-strategy", choices=DEBATE_STRATEGIES, default="one-by-one", help="Debate turn-taking: 'one-by-one' (ChatEval, each juror sees earlier statements of the round) or 'simultaneous' (jurors of a round answer concurrently)")
+    parser.add_argument("--debate-streaming", action="store_true", help="Stream debate turns and stop each one as soon as its final JSON verdict is complete")
+    parser.add_argument("--debate-consensus", type=float, default=None, metavar="SPREAD", help="End the debate early once all jurors name the same role identity and their global_human_scores lie within SPREAD (e.g. 0.1)")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint to call instead of OpenRouter (env: LLM_BASE_URL)")
+    parser.add_argument("--jury-pipeline", type=int, default=0, metavar="DEPTH", help="llm/stdin modes: evaluate turns in the background while the conversation continues (or the next turn is typed), with at most DEPTH evaluations unfinished (0 = evaluate each turn before the next)")
+    parser.add_argument("--parallel-turns", action="store_true", help="transcript mode: judge all turns at once (requests still share --jury-concurrency) instead of one after another")
+    llm_cache.add_cli_args(parser)
+    rate_limit.add_cli_args(parser)
+    resilience.add_cli_args(parser)
+    rolling_context.add_cli_args(parser)
+    llm_usage.add_cli_args(parser)
+    tracing.add_cli_args(parser)
 
     args = parser.parse_args()
 
     # Input Validation
     if args.mode == "transcript" and not args.input_transcript:
         parser.error("--input-transcript is required when --mode is set to 'transcript'")
+    if args.jury_pipeline and args.mode == "transcript":
+        parser.error("--jury-pipeline is only supported with --mode llm or stdin")
+    if args.parallel_turns and args.mode != "transcript":
+        parser.error("--parallel-turns is only supported with --mode transcript")
+    transcripts = None
+    if args.mode == "transcript" and is_batch_input(args.input_transcript):
+        transcripts = find_transcripts(args.input_transcript)
+        if not transcripts:
+            parser.error(f"No transcripts found for {args.input_transcript}")
+        names = [os.path.splitext(os.path.basename(path))[0] for path in transcripts]
+        if len(set(names)) != len(names):
+            parser.error("Batch transcripts must have distinct file names (outputs are named after them)")
 
     output_file_path = args.output_file_path
     if not output_file_path:
@@ -354,39 +371,41 @@ def main():
         output_file_path = f"output/{prefix}_{args.mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
     jury_llm_models = args.jury_llm_models.split(",")
-    qa_pairs = []
-
-    if args.mode == "transcript":
-        qa_pairs = parse_transcript(args.input_transcript)
-
-    output_obj = {
-        "evaluation_mode": args.mode,
-        "jury": jury_llm_models,
-        "interaction": []
-    }
-
-    if args.mode == "llm":
-        output_obj["role_play_llm_model"] = args.role_play_llm_model
-        output_obj["interrogator_llm_model"] = args.interrogator_llm_model
-    elif args.mode == "transcript":
-        output_obj["source_transcript"] = args.input_transcript
-
-    role_play(
-        output_obj=output_obj,
-        mode=args.mode,
-        role_play_llm_model=args.role_play_llm_model,
-        interrogator_llm_model=args.interrogator_llm_model,
-        jury=jury_llm_models,
-        max_turns=args.max_turns,
-        jury_mode=args.jury_mode,
-        debate_rounds=args.debate_rounds,
-        qa_pairs=qa_pairs
-    )
-
-    log.info(f"Writing output to: {output_file_path}")
+    jury_engine.set_max_concurrency(args.jury_concurrency)
+    set_base_url(args.base_url)
+    cache = llm_cache.configure_from_args(args)
+    rate_limit.configure_from_args(args)
+    resilience.configure_from_args(args)
+    llm_usage.configure_from_args(args)
+    tracing.configure_from_args(args)
+
+    if transcripts is not None:
+        manifest = run_batch(args, jury_llm_models, transcripts)
+        usage = manifest["usage"]
+    else:
+        qa_pairs = []
+        if args.mode == "transcript":
+            qa_pairs = parse_transcript(args.input_transcript)
 
-    with open(output_file_path, "wt+", encoding="utf-8") as output_file:
-        json.dump(output_obj, output_file, indent=4)
+        output_obj = new_output_obj(args, jury_llm_models)
+        if args.mode == "transcript":
+            output_obj["source_transcript"] = args.input_transcript
+        run_session(args, jury_llm_models, output_obj, qa_pairs)
+        usage = output_obj["usage"]
+
+    if cache is not None:
+        log.info(f"LLM cache: {cache.stats()}")
+    log.info(f"Rate limits: {rate_limit.stats()}")
+    log.info(f"Circuit breakers: {resilience.stats()}")
+    if usage:
+        log.info(f"Usage: {usage['calls']} calls, {usage['prompt_tokens']} prompt tokens "
+                 f"({usage['cached_tokens']} cached), ${usage['cost_usd']:.4f}")
+
+    if transcripts is None:
+        log.info(f"Writing output to: {output_file_path}")
+        with tracing.span("write_output"), open(output_file_path, "wt+", encoding="utf-8") as output_file:
+            json.dump(output_obj, output_file, indent=4)
+    tracing.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+rolling_context.py
+
+Token-budgeted conversation history for the rolling jury audits.
+
+Sending the whole conversation to every rolling audit (and to round 1 of every
+debate) makes input tokens grow quadratically with conversation length. A
+RollingContext keeps the history the callers used to build by string
+concatenation, but once it exceeds `budget_tokens` every exchange older than
+the last `keep_last` is folded into a running summary:
+
+    Summary of exchanges 1-N:
+    <summary>
+
+    Later exchanges, verbatim:
+    <last exchanges, exactly as before>
+
+The summary is updated incrementally: each fold sends the previous summary and
+only the newly folded exchanges to the summarizer, and the result is kept until
+the next fold (which leaves the prompt prefix stable for prompt caching in the
+meantime). Without a summarizer folded exchanges are simply dropped. With no
+budget (the default) the rendered history is identical to plain concatenation.
+"""
+
+import logging
+from functools import partial
+
+from openai import APIError
+
+import resilience
+
+DEFAULT_KEEP_LAST = 3
+
+# role_play_framework configures this logger
+log = logging.getLogger("my_app")
+
+
+def estimate_tokens(text):
+    """Same ~4 characters per token estimate rate_limit uses for admission."""
+    return len(text) // 4 + 1
+
+
+class RollingContext:
+    def __init__(self, budget_tokens=None, keep_last=DEFAULT_KEEP_LAST, summarize=None, separator=""):
+        """
+        summarize(previous_summary, exchanges) -> new summary; separator is
+        placed between verbatim exchanges.
+        """
+        self.budget_tokens = budget_tokens
+        self.keep_last = max(0, keep_last)
+        self.summarize = summarize
+        self.separator = separator
+        self.exchanges = []       # verbatim, oldest first
+        self.summary = ""
+        self.folded = 0           # exchanges covered by the summary (or dropped)
+        self.summary_updates = 0
+
+    def __len__(self):
+        return self.folded + len(self.exchanges)
+
+    def add(self, exchange):
+        self.exchanges.append(exchange)
+        if self.budget_tokens is not None and estimate_tokens(self.render()) > self.budget_tokens:
+            self._fold()
+
+    def _fold(self):
+        older = self.exchanges[:len(self.exchanges) - self.keep_last]
+        if not older:
+            return
+        if self.summarize is not None:
+            try:
+                summary = self.summarize(self.summary, older)
+            except (APIError, TimeoutError, resilience.CircuitOpenError) as e:
+                # Keep the history verbatim (over budget) and try again on the next exchange
+                log.error(f"Context summary failed, keeping {len(older)} exchange(s) verbatim: {type(e).__name__}: {e}")
+                return
+            self.summary = summary
+            self.summary_updates += 1
+        del self.exchanges[:len(older)]
+        self.folded += len(older)
+
+    def render(self):
+        verbatim = self.separator.join(self.exchanges)
+        if not self.folded:
+            return verbatim
+        if not self.summary:
+            return f"({self.folded} earlier exchange(s) omitted)\n\n{verbatim}"
+        return (f"Summary of exchanges 1-{self.folded}:\n{self.summary}\n\n"
+                f"Later exchanges, verbatim:\n{verbatim}")
+
+    def stats(self):
+        return {
+            "exchanges": len(self),
+            "verbatim": len(self.exchanges),
+            "summarized": self.folded,
+            "summary_updates": self.summary_updates,
+            "tokens": estimate_tokens(self.render()),
+        }
+
+
+def add_cli_args(parser):
+    parser.add_argument("--context-budget", type=int, default=None,
+                        help="Token budget of the rolling conversation history sent to the jury (default: full history)")
+    parser.add_argument("--context-keep-last", type=int, default=DEFAULT_KEEP_LAST,
+                        help="Exchanges always kept verbatim once the history is over budget")
+    parser.add_argument("--context-summary-model", default=None,
+                        help="Model that summarizes older exchanges (default: the first jury model; 'none' drops them)")
+
+
+def factory_from_args(args, summarize, default_model):
+    """
+    Callable creating a fresh RollingContext per conversation. summarize(model,
+    previous_summary, exchanges) is bound to --context-summary-model, or to
+    default_model when that isn't given.
+    """
+    summary_model = args.context_summary_model or default_model
+    return partial(RollingContext, budget_tokens=args.context_budget, keep_last=args.context_keep_last,
+                   summarize=None if summary_model == "none" else partial(summarize, summary_model))
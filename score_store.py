@@ -0,0 +1,417 @@
+"""
+score_store.py
+
+Columnar store of every juror verdict in a set of reports, for vectorized
+analytics.
+
+Reports from role_play_framework*, role_play_framework_jury_multidim and
+abcd_baseline are flattened (in a process pool, see report_loader.py) into one
+row per (run, turn, juror, context, dimension) with typed columns:
+
+    run        int32    index into runs (a role-play report, or one ABCD conversation)
+    turn       int32    turn / chunk number (-1 if missing)
+    juror      int32    index into models
+    context    int8     CONTEXTS: isolated, rolling (HUMAN_SCORE audits), or final (a consolidated
+                        verdict: a debate final, or the multidim script's verdict)
+    dimension  int8     DIMENSIONS: global, identity, knowledge, rejection
+    score      float64  numeric score (HUMAN_SCORE, knowledge 1-10, rejection 1/0); NaN if none
+    status     int8     STATUSES: ok, unparsed (no score in the answer), failed (the API call failed)
+    latency    float64  seconds spent on the call (NaN if not recorded)
+
+Every LLM call recorded in the reports (per-turn llm_calls, see llm_usage.py)
+becomes one row of a second table, store.calls:
+
+    run, turn            as above
+    model     int32      index into models
+    purpose   int8       CALL_PURPOSES: interrogator, target, audit, debate, summary, other
+    juror     int32      juror position in the jury (-1 if not a jury call)
+    context   int8       index into CONTEXTS (-1 if none)
+    dimension int8       index into CALL_DIMENSIONS (-1 if none)
+    prompt_tokens, cached_tokens, completion_tokens   int64
+    latency   float64    seconds
+    cost      float64    USD (NaN if the model has no price)
+    llm_cache, failed    bool
+
+Both are saved in a single .npz. Aggregations are group-bys over these arrays
+(see group_mean, role_play_turn_stats and usage_stats) instead of loops over
+nested dicts.
+
+Usage:
+  python score_store.py ./output -o scores.npz
+"""
+
+import re
+import argparse
+
+import numpy as np
+
+from report_loader import iter_reports, load_report, report_paths
+
+CONTEXTS = ["isolated", "rolling", "final"]
+DIMENSIONS = ["global", "identity", "knowledge", "rejection"]
+STATUSES = ["ok", "unparsed", "failed"]
+FILE_KINDS = ["invalid", "empty", "role_play", "abcd"]
+CALL_PURPOSES = ["other", "interrogator", "target", "audit", "debate", "summary"]
+CALL_DIMENSIONS = DIMENSIONS + ["combined"]
+
+ISOLATED, ROLLING, FINAL = range(len(CONTEXTS))
+GLOBAL, IDENTITY, KNOWLEDGE, REJECTION = range(len(DIMENSIONS))
+OK, UNPARSED, FAILED = range(len(STATUSES))
+
+HUMAN_SCORE_RE = re.compile(r'HUMAN_SCORE=([0-9.]+)')
+KNOWLEDGE_RE = re.compile(r'Score:\s*([0-9.]+)')
+
+# Verdict keys, by dimension, of consolidated score dicts (debate finals, the
+# multidim script and abcd_baseline)
+VERDICT_KEYS = {
+    GLOBAL: ("global_human_score", "human_bot_score"),
+    IDENTITY: ("role_identity",),
+    KNOWLEDGE: ("knowledge_score",),
+    REJECTION: ("rejection_status",),
+}
+AUDIT_KEYS = {GLOBAL: "global", IDENTITY: "identity", KNOWLEDGE: "knowledge", REJECTION: "rejection"}
+
+
+def extract_human_score(text):
+    """Extracts the float score from the HUMAN_SCORE=$score format."""
+    if not isinstance(text, str):
+        return None
+    match = HUMAN_SCORE_RE.search(text)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def parse_score(dimension, answer):
+    """(score, status) of one verdict; identity answers have no numeric score."""
+    if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+        return float(answer), OK
+    if not isinstance(answer, str) or not answer.strip():
+        return np.nan, UNPARSED
+    if dimension == GLOBAL:
+        score = extract_human_score(answer)
+    elif dimension == KNOWLEDGE:
+        match = KNOWLEDGE_RE.search(answer)
+        try:
+            score = float(match.group(1)) if match else None
+        except ValueError:
+            score = None
+    elif dimension == REJECTION:
+        lowered = answer.lower()
+        score = 1.0 if lowered.startswith("yes") else 0.0 if lowered.startswith("no") else None
+    else:
+        return np.nan, OK
+    return (np.nan, UNPARSED) if score is None else (score, OK)
+
+
+def _call_record(call_meta, dimension):
+    if not isinstance(call_meta, dict):
+        return {}
+    return call_meta.get(AUDIT_KEYS[dimension]) or call_meta.get("combined") or {}
+
+
+def _verdict_rows(turn, juror, verdict, context, call_meta=None):
+    rows = []
+    for dimension, keys in VERDICT_KEYS.items():
+        answer = next((verdict[k] for k in keys if k in verdict), None)
+        score, status = parse_score(dimension, answer)
+        record = _call_record(call_meta, dimension)
+        if record.get("failed"):
+            status = FAILED
+        rows.append((turn, juror, context, dimension, score, status, record.get("latency_s", np.nan)))
+    return rows
+
+
+def _role_play_rows(data):
+    jury = data.get("jury") or []
+    rows = []
+    for turn_data in data["interaction"]:
+        turn = turn_data.get("turn")
+        turn = -1 if turn is None else turn
+        for j, juror_report in enumerate(turn_data.get("jury_scores", [])):
+            if not isinstance(juror_report, dict):
+                continue
+            juror = juror_report.get("judge_model") or (jury[j] if j < len(jury) else f"juror_{j}")
+            if "global_human_score" in juror_report or "human_bot_score" in juror_report:
+                # Consolidated verdict (a debate final, or the multidim script's): kept out
+                # of the isolated/rolling audit columns, as the analytics always did
+                rows.extend(_verdict_rows(turn, juror, juror_report, FINAL, juror_report.get("call_meta")))
+                continue
+            call_meta = juror_report.get("call_meta", {})
+            for context, key in ((ISOLATED, "isolated_evaluation"), (ROLLING, "rolling_evaluation")):
+                audit = juror_report.get(key, {})
+                meta = call_meta.get(key, {})
+                for dimension, dim_key in AUDIT_KEYS.items():
+                    score, status = parse_score(dimension, audit.get(dim_key, ""))
+                    latency = np.nan
+                    if meta:
+                        record = _call_record(meta, dimension)
+                        status = FAILED if record.get("failed") else status
+                        latency = record.get("latency_s", np.nan)
+                    rows.append((turn, juror, context, dimension, score, status, latency))
+    return rows
+
+
+def _index(names, name):
+    return names.index(name) if name in names else -1
+
+
+def _call_rows(turn, calls):
+    rows = []
+    for call in calls or []:
+        cost = call.get("cost_usd")
+        context = call.get("context")
+        rows.append((
+            turn, call.get("model") or "unknown", max(0, _index(CALL_PURPOSES, call.get("purpose"))),
+            call.get("juror", -1), _index(CONTEXTS, context), _index(CALL_DIMENSIONS, call.get("dimension")),
+            call.get("prompt_tokens", 0), call.get("cached_tokens", 0), call.get("completion_tokens", 0),
+            call.get("latency_s", 0.0), np.nan if cost is None else cost,
+            bool(call.get("llm_cache")), bool(call.get("failed")),
+        ))
+    return rows
+
+
+def extract_report(file_path):
+    """
+    Flatten one report into (kind, runs); runs is a list of
+    (run_name, n_turns, rows, call_rows) with rows as tuples in column order
+    (juror and model as names).
+    """
+    data = load_report(file_path)
+    if not isinstance(data, dict):
+        return "invalid", []
+
+    if "conversations" in data:
+        runs = []
+        for conv in data["conversations"]:
+            rows, call_rows = [], []
+            for chunk in conv.get("chunk_scores", []):
+                for js in chunk.get("jury_scores", []):
+                    rows.extend(_verdict_rows(chunk.get("chunk", -1), js.get("judge_model") or "unknown",
+                                              js, ROLLING, js.get("call_meta")))
+                call_rows.extend(_call_rows(chunk.get("chunk", -1), chunk.get("llm_calls")))
+            runs.append((f"{file_path}#{conv.get('conversation_id')}", conv.get("chunks_evaluated", 0), rows, call_rows))
+        return "abcd", runs
+
+    if not data.get("interaction", []):
+        return "empty", []
+    call_rows = []
+    for turn_data in data["interaction"]:
+        turn = turn_data.get("turn")
+        call_rows.extend(_call_rows(-1 if turn is None else turn, turn_data.get("llm_calls")))
+    return "role_play", [(file_path, len(data["interaction"]), _role_play_rows(data), call_rows)]
+
+
+class ScoreStore:
+    COLUMNS = {
+        "run": np.int32, "turn": np.int32, "juror": np.int32, "context": np.int8,
+        "dimension": np.int8, "score": np.float64, "status": np.int8, "latency": np.float64,
+    }
+
+    CALL_COLUMNS = {
+        "run": np.int32, "turn": np.int32, "model": np.int32, "purpose": np.int8, "juror": np.int32,
+        "context": np.int8, "dimension": np.int8, "prompt_tokens": np.int64, "cached_tokens": np.int64,
+        "completion_tokens": np.int64, "latency": np.float64, "cost": np.float64,
+        "llm_cache": np.bool_, "failed": np.bool_,
+    }
+
+    def __init__(self, columns, runs, run_file, run_turns, models, files, file_kind, calls=None):
+        self.columns = columns          # name -> array, one entry per verdict
+        self.calls = calls if calls is not None else {   # name -> array, one entry per LLM call
+            name: np.zeros(0, dtype=dtype) for name, dtype in self.CALL_COLUMNS.items()}
+        self.runs = runs                # run names
+        self.run_file = run_file        # run -> index into files
+        self.run_turns = run_turns      # run -> number of turns / chunks
+        self.models = models            # juror (and other call) model names
+        self.files = files              # source file paths
+        self.file_kind = file_kind      # file -> index into FILE_KINDS
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.columns["run"])
+
+    @classmethod
+    def from_reports(cls, file_paths, workers=None):
+        data = {name: [] for name in cls.COLUMNS}
+        calls = {name: [] for name in cls.CALL_COLUMNS}
+        runs, run_file, run_turns, file_kind = [], [], [], []
+        model_index = {}
+        for f, (kind, file_runs) in enumerate(iter_reports(file_paths, extract_report, workers=workers)):
+            file_kind.append(FILE_KINDS.index(kind))
+            for run_name, n_turns, rows, call_rows in file_runs:
+                run = len(runs)
+                runs.append(run_name)
+                run_file.append(f)
+                run_turns.append(n_turns)
+                if call_rows:
+                    calls["run"].extend([run] * len(call_rows))
+                    for name, values in zip(list(cls.CALL_COLUMNS)[1:], zip(*call_rows)):
+                        if name == "model":
+                            values = [model_index.setdefault(model, len(model_index)) for model in values]
+                        calls[name].extend(values)
+                if not rows:
+                    continue
+                turn, juror, context, dimension, score, status, latency = zip(*rows)
+                data["run"].extend([run] * len(rows))
+                data["turn"].extend(turn)
+                data["juror"].extend(model_index.setdefault(name, len(model_index)) for name in juror)
+                data["context"].extend(context)
+                data["dimension"].extend(dimension)
+                data["score"].extend(score)
+                data["status"].extend(status)
+                data["latency"].extend(latency)
+        columns = {name: np.asarray(values, dtype=cls.COLUMNS[name]) for name, values in data.items()}
+        calls = {name: np.asarray(values, dtype=cls.CALL_COLUMNS[name]) for name, values in calls.items()}
+        return cls(columns, np.asarray(runs, dtype=str), np.asarray(run_file, dtype=np.int32),
+                   np.asarray(run_turns, dtype=np.int32), np.asarray(list(model_index), dtype=str),
+                   np.asarray(list(file_paths), dtype=str), np.asarray(file_kind, dtype=np.int8), calls)
+
+    @classmethod
+    def from_directory(cls, directory_path, workers=None):
+        return cls.from_reports(report_paths(directory_path), workers=workers)
+
+    def save(self, path):
+        np.savez_compressed(path, runs=self.runs, run_file=self.run_file, run_turns=self.run_turns,
+                            models=self.models, files=self.files, file_kind=self.file_kind,
+                            **{f"col_{name}": values for name, values in self.columns.items()},
+                            **{f"call_{name}": values for name, values in self.calls.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            columns = {name: z[f"col_{name}"] for name in cls.COLUMNS}
+            # Stores saved before call accounting have no call table
+            calls = ({name: z[f"call_{name}"] for name in cls.CALL_COLUMNS}
+                     if "call_run" in z.files else None)
+            return cls(columns, z["runs"], z["run_file"], z["run_turns"], z["models"], z["files"], z["file_kind"], calls)
+
+    def runs_of_kind(self, kind):
+        """Boolean mask over runs whose source file is of the given FILE_KINDS kind."""
+        return self.file_kind[self.run_file] == FILE_KINDS.index(kind)
+
+
+def group_sum(keys, values):
+    """
+    Group rows by the given key columns; returns (unique key columns, sum of
+    values per group, rows per group), groups sorted by key. Rows keep their
+    original order within a group.
+    """
+    keys = [np.asarray(k) for k in keys]
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return [k[:0] for k in keys], np.zeros(0), np.zeros(0, dtype=np.int64)
+    order = np.lexsort(keys[::-1])
+    sorted_keys = [k[order] for k in keys]
+    starts = np.zeros(n, dtype=bool)
+    starts[0] = True
+    for k in sorted_keys:
+        starts[1:] |= k[1:] != k[:-1]
+    starts = np.flatnonzero(starts)
+    counts = np.diff(np.r_[starts, n])
+    sums = np.add.reduceat(values[order], starts)
+    return [k[starts] for k in sorted_keys], sums, counts
+
+
+def group_mean(keys, values):
+    """group_sum, with the mean of values per group instead of the sum."""
+    keys, sums, counts = group_sum(keys, values)
+    return keys, sums / counts, counts
+
+
+def role_play_turn_stats(store):
+    """
+    What analytics.py reports, as group-bys: juror-averaged global scores per
+    (run, turn, context), their per-turn means and sample sizes, and each run's
+    last rolling score.
+
+    refusals follows the analytics scripts' rule: every juror entry should
+    carry an isolated and a rolling HUMAN_SCORE, and each one missing counts.
+    A consolidated (final) verdict has neither, so it counts twice and never
+    enters the per-turn means.
+    """
+    role_play_runs = store.runs_of_kind("role_play")
+    global_rows = role_play_runs[store.run] & (store.dimension == GLOBAL)
+    audits = global_rows & ((store.context == ISOLATED) | (store.context == ROLLING))
+    verdicts = global_rows & (store.context == FINAL)   # one per consolidated juror entry
+    scored = audits & (store.status == OK)
+
+    (run, turn, context), turn_means, _ = group_mean(
+        [store.run[scored], store.turn[scored], store.context[scored]], store.score[scored])
+
+    per_turn = {}
+    for ctx in (ISOLATED, ROLLING):
+        sel = context == ctx
+        (turns,), means, counts = group_mean([turn[sel]], turn_means[sel])
+        per_turn[ctx] = {int(t): (m, int(n)) for t, m, n in zip(turns, means, counts)}
+
+    # Groups are sorted by (run, turn, context): a run's last rolling group is its final turn
+    rolling = context == ROLLING
+    rolling_runs = run[rolling]
+    last = np.r_[rolling_runs[1:] != rolling_runs[:-1], True] if len(rolling_runs) else np.zeros(0, dtype=bool)
+
+    return {
+        "files_processed": int(role_play_runs.sum()),
+        "files_skipped": int((store.file_kind != FILE_KINDS.index("role_play")).sum()),
+        "refusals": int((audits & (store.status != OK)).sum()) + 2 * int(verdicts.sum()),
+        "lengths": store.run_turns[role_play_runs],
+        "final_scores": turn_means[rolling][last],
+        "per_turn": per_turn,
+    }
+
+
+USAGE_FIELDS = ("prompt_tokens", "cached_tokens", "completion_tokens", "latency", "cost")
+
+
+def usage_stats(store):
+    """
+    Call, token, latency and cost totals over every recorded LLM call, overall
+    and broken down by purpose, model, (purpose, dimension) and turn. Unpriced
+    calls count as zero cost.
+    """
+    calls = store.calls
+    values = {field: np.nan_to_num(calls[field].astype(np.float64)) for field in USAGE_FIELDS}
+
+    def breakdown(keys, label):
+        result = {}
+        for field, column in values.items():
+            groups, sums, counts = group_sum(keys, column)
+            for g, key in enumerate(zip(*groups)):
+                result.setdefault(label(*key), {"calls": int(counts[g])})[field] = float(sums[g])
+        return result
+
+    return {
+        "calls": len(calls["run"]),
+        "runs": len(np.unique(calls["run"])),
+        "unpriced": int(np.isnan(calls["cost"]).sum()),
+        "llm_cache_hits": int(calls["llm_cache"].sum()),
+        "failed": int(calls["failed"].sum()),
+        **{field: float(column.sum()) for field, column in values.items()},
+        "by_purpose": breakdown([calls["purpose"]], lambda p: CALL_PURPOSES[p]),
+        "by_model": breakdown([calls["model"]], lambda m: str(store.models[m])),
+        "by_dimension": breakdown(
+            [calls["purpose"], calls["dimension"]],
+            lambda p, d: f"{CALL_PURPOSES[p]}/{CALL_DIMENSIONS[d]}" if d >= 0 else CALL_PURPOSES[p]),
+        "by_turn": breakdown([calls["turn"]], int),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flatten jury reports into a columnar .npz score store")
+    parser.add_argument("input_dir", help="Directory containing the JSON reports")
+    parser.add_argument("-o", "--output", default="scores.npz", help="Path of the .npz to write")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to parse reports (default: all CPUs)")
+    args = parser.parse_args()
+
+    store = ScoreStore.from_directory(args.input_dir, workers=args.workers)
+    store.save(args.output)
+    print(f"{len(store)} verdicts from {len(store.runs)} runs ({len(store.files)} files) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+streaming.py
+
+Streamed chat completions for the jury debate.
+
+A debate turn ends with the consolidated rubric JSON, but models often keep
+talking after it, and the next juror cannot start until the whole reply is in.
+`read_completion` reads a streamed response chunk by chunk while a
+`JsonObjectScanner` watches the text for the first complete JSON object the
+caller accepts; as soon as one closes, the stream is closed (which cancels the
+rest of the generation) and the content is cut right after the object.
+
+The result is assembled into an ordinary ChatCompletion, so callers (and the
+LLM cache) cannot tell a streamed reply from a plain one. Usage comes from the
+provider's final usage chunk (stream_options={"include_usage": True}) when the
+stream ran to the end; a cancelled stream never gets one, so its tokens are
+estimated (~4 characters per token, like rate_limit's admission estimate).
+"""
+
+import json
+import time
+
+from openai.types.chat import ChatCompletion
+
+
+class JsonObjectScanner:
+    """Find the first complete top-level JSON object in text that arrives in pieces."""
+
+    def __init__(self, accept=None):
+        """accept(obj) -> bool filters candidates (default: any JSON object)."""
+        self.accept = accept or (lambda obj: isinstance(obj, dict))
+        self.text = ""
+        self.pos = 0          # next character to scan
+        self.start = None     # offset of the '{' opening the current candidate
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.result = None    # (object, end offset) once found
+
+    def feed(self, piece):
+        """Append piece; returns (object, end offset) once an accepted object is complete, else None."""
+        if self.result is not None:
+            return self.result
+        self.text += piece
+        text = self.text
+        for pos in range(self.pos, len(text)):
+            ch = text[pos]
+            if self.start is None:
+                if ch == "{":
+                    self.start, self.depth = pos, 1
+                continue
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        obj = json.loads(text[self.start:pos + 1])
+                    except ValueError:
+                        obj = None
+                    if obj is not None and self.accept(obj):
+                        self.pos = pos + 1
+                        self.result = (obj, pos + 1)
+                        return self.result
+                    # Braces in prose (or an object the caller doesn't want): keep looking
+                    self.start = None
+        self.pos = len(text)
+        return None
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def read_completion(stream, prompt_tokens, accept=None, record=None):
+    """
+    Drain a streamed chat completion into a ChatCompletion.
+
+    With accept, the stream is cancelled once the content holds a complete JSON
+    object accept(obj) is true for. prompt_tokens is the estimate used when the
+    provider reports no usage. record, if given, gets "stopped_early" and
+    "first_token_s".
+    """
+    record = record if record is not None else {}
+    scanner = JsonObjectScanner(accept) if accept is not None else None
+    start = time.monotonic()
+    pieces = []
+    first = None
+    usage = None
+    finish_reason = "stop"
+    stopped_early = False
+    try:
+        for chunk in stream:
+            first = first or chunk
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            piece = choice.delta.content if choice.delta is not None else None
+            if not piece:
+                continue
+            if not pieces:
+                record["first_token_s"] = round(time.monotonic() - start, 3)
+            pieces.append(piece)
+            if scanner is not None and scanner.feed(piece) is not None:
+                stopped_early = True
+                break
+    finally:
+        stream.close()
+
+    content = "".join(pieces)
+    if stopped_early:
+        content = content[:scanner.result[1]]
+        finish_reason = "stop"
+    if usage is None:
+        completion_tokens = estimate_tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+    record["stopped_early"] = stopped_early
+    return ChatCompletion.model_validate({
+        "id": first.id if first is not None else "stream",
+        "object": "chat.completion",
+        "created": first.created if first is not None else int(time.time()),
+        "model": first.model if first is not None else "",
+        "choices": [{"index": 0, "finish_reason": finish_reason,
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": usage if isinstance(usage, dict) else usage.model_dump(),
+    })
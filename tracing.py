@@ -0,0 +1,130 @@
+"""
+tracing.py
+
+Optional timing spans exported in Chrome trace format (open the file in
+chrome://tracing or https://ui.perfetto.dev).
+
+    with tracing.span("debate_round", round=2):
+        ...
+
+Spans are complete ("X") events on the thread that ran them, so nested spans
+stack up in the viewer and work fanned out by jury_engine shows up on its
+worker threads next to the turn that dispatched it. Tracing is off until
+`configure(path)` (or --trace FILE); while off, span() returns a shared no-op
+span, so instrumented code pays one global lookup per span.
+Events are buffered in memory and written by `flush()` (atomically, so a
+long run can flush at every checkpoint and the file is always loadable).
+"""
+
+import os
+import json
+import time
+import threading
+
+_path = None
+_events = None
+_threads = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+_origin_ns = time.perf_counter_ns()
+
+
+def configure(path=None):
+    """Start tracing into path (None turns tracing off and drops buffered events)."""
+    global _path, _events
+    with _lock:
+        _path = path
+        _events = [] if path else None
+        _threads.clear()
+
+
+def enabled():
+    return _events is not None
+
+
+def _thread_id():
+    ident = threading.get_ident()
+    tid = _threads.get(ident)
+    if tid is None:
+        with _lock:
+            tid = _threads.setdefault(ident, len(_threads) + 1)
+            _events.append({"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+    return tid
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def set(self, **args):
+        """Attach more arguments to the span (e.g. results known only at the end)."""
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        events = _events
+        if events is None:
+            return False
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        events.append({
+            "name": self.name, "cat": self.name.split(".")[0], "ph": "X", "pid": _pid, "tid": _thread_id(),
+            "ts": (self.start - _origin_ns) / 1000, "dur": (end - self.start) / 1000, "args": self.args,
+        })
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block as one span (a no-op while tracing is off)."""
+    if _events is None:
+        return _NOOP
+    return _Span(name, args)
+
+
+def traced(name, call, **args):
+    """Run call() inside a span (for callables handed to jury_engine)."""
+    with span(name, **args):
+        return call()
+
+
+def flush():
+    """Write every event recorded so far to the trace file."""
+    if _events is None:
+        return
+    with _lock:
+        events = list(_events)
+    tmp_path = _path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    os.replace(tmp_path, _path)
+
+
+def add_cli_args(parser):
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="Write timing spans (Chrome trace format, open in ui.perfetto.dev) to FILE")
+
+
+def configure_from_args(args):
+    configure(args.trace)